@@ -0,0 +1,140 @@
+"""Клиент HTTP API GroupTasker (см. api_server.py) с теми же функциями, что в database.py.
+
+Функции блокирующие, как и в database.py, поэтому виджеты вызывают их так же —
+через db_worker в фоновом потоке. Несколько вызовов можно отправить одним запросом
+через call_batch.
+
+Успешный вход (verify_user_password, add_user_to_group, create_group) открывает на
+сервере сессию, и дальше все функции выполняются от имени вошедшего пользователя.
+"""
+import json
+import os
+import threading
+from datetime import date, datetime
+
+import requests
+
+from database import DELETED, NOT_FOUND, NOT_OWNER, message_checksum
+
+API_URL = os.environ.get("GROUPTASKER_API_URL", "").rstrip("/")
+API_TIMEOUT = float(os.environ.get("GROUPTASKER_API_TIMEOUT", "10"))  # сек
+
+# Функции database.py, доступные через API (см. api_server.py)
+API_METHODS = (
+    "create_group", "check_group_exists", "add_user_to_group", "check_user_exists_in_group",
+    "verify_user_password", "delete_group", "get_group_overview", "get_session_bootstrap",
+    "remove_group_member",
+    "save_note", "save_notes", "get_notes", "delete_own_note",
+    "save_task", "save_tasks", "get_tasks", "delete_own_task",
+    "save_message", "get_messages", "delete_own_message", "get_last_tombstone_id",
+    "get_message_changes", "get_conversation_state",
+    "get_group_users", "save_private_message", "get_private_messages", "delete_own_private_message",
+    "get_private_conversation_state",
+)
+
+_local = threading.local()
+# Токен сессии, открытой последним входом (общий для всех потоков db_worker)
+_current = {"token": None}
+
+
+class ApiError(Exception):
+    """Ошибка, которую вернул сервер API при выполнении функции."""
+
+    def __init__(self, message, error_type=None):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def _decode(value):
+    if "$tuple" in value:
+        return tuple(value["$tuple"])
+    if "$datetime" in value:
+        return datetime.fromisoformat(value["$datetime"])
+    if "$date" in value:
+        return date.fromisoformat(value["$date"])
+    return value
+
+
+def _session():
+    # Отдельная сессия (и keep-alive соединение) на каждый поток db_worker
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def _post(calls, token):
+    if not API_URL:
+        raise ApiError("Адрес API не задан (GROUPTASKER_API_URL)")
+    payload = {"calls": [[name, list(args), kwargs] for name, args, kwargs in calls]}
+    headers = {"Content-Type": "application/json"}
+    if token is not None:
+        headers["Authorization"] = f"Bearer {token}"
+    response = _session().post(f"{API_URL}/api/batch", data=json.dumps(payload),
+                               headers=headers, timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return json.loads(response.text, object_hook=_decode)["results"]
+
+
+def call_batch(calls, token=None):
+    """Выполняет вызовы [(имя, аргументы, именованные аргументы), ...] одним запросом
+    и возвращает их результаты. Если какой-либо вызов завершился ошибкой, бросает ApiError.
+
+    Без token вызовы выполняются в сессии последнего входа, а вход внутри пачки
+    делает открытую им сессию текущей."""
+    items = _post(calls, token if token is not None else _current["token"])
+
+    results = []
+    for item in items:
+        if "session" in item and token is None:
+            _current["token"] = item["session"]
+        if "error" in item:
+            raise ApiError(item["error"], item.get("type"))
+        results.append(item["result"])
+    return results
+
+
+def _remote(name, token=None):
+    def call(*args, **kwargs):
+        return call_batch([(name, args, kwargs)], token)[0]
+
+    call.__name__ = call.__qualname__ = name
+    call.__doc__ = f"Вызывает {name} на сервере API (см. database.{name})."
+    return call
+
+
+class Session:
+    """Функции API от имени пользователя отдельной сессии (см. open_session)."""
+
+    def __init__(self, token):
+        self.token = token
+
+    def __getattr__(self, name):
+        if name not in API_METHODS:
+            raise AttributeError(name)
+        return _remote(name, self.token)
+
+
+def open_session(name, password, group_code):
+    """Входит в группу и возвращает Session (None при неверном пароле), не меняя сессию
+    функций модуля. Так в одном процессе могут работать несколько пользователей."""
+    item = _post([("verify_user_password", (name, password, group_code), {})], None)[0]
+    if "error" in item:
+        raise ApiError(item["error"], item.get("type"))
+    return Session(item["session"]) if item["result"] else None
+
+
+for _name in API_METHODS:
+    globals()[_name] = _remote(_name)
+
+
+def close_pool():
+    """Закрывает HTTP-соединение текущего потока (аналог database.close_pool)."""
+    session = getattr(_local, "session", None)
+    if session is not None:
+        session.close()
+        _local.session = None
+
+
+__all__ = list(API_METHODS) + ["ApiError", "Session", "call_batch", "open_session", "close_pool",
+                              "message_checksum", "DELETED", "NOT_OWNER", "NOT_FOUND"]
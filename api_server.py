@@ -0,0 +1,314 @@
+"""HTTP/JSON API GroupTasker: клиенты обращаются к базе данных через этот сервер.
+
+Сервер выполняет функции database_async.py (те же имена и параметры, что в database.py)
+на общем пуле соединений, поэтому множество клиентов обходится несколькими десятками
+соединений с PostgreSQL, а учетные данные базы есть только у сервера. Клиент (api_client.py)
+отправляет вызовы пачкой:
+
+    POST /api/batch  {"calls": [["get_messages", ["100001"], {"limit": 50}], ...]}
+    ->               {"results": [{"result": ...}, {"error": "...", "type": "..."}, ...]}
+
+Через API доступны только функции, которые вызывают виджеты (см. PUBLIC_METHODS,
+LOGIN_METHODS и SESSION_METHODS). Вход (проверка пароля, вступление в группу, создание
+группы) при успехе открывает сессию: в ответ на такой вызов добавляется "session" —
+токен, который клиент дальше передает в заголовке "Authorization: Bearer <токен>".
+Остальные функции выполняются только в сессии, причем код группы и имя действующего
+пользователя сервер берет из сессии, а не из параметров вызова.
+
+Вызовы пачки выполняются по порядку. Результаты чтения кэшируются на API_CACHE_TTL секунд,
+а одинаковые одновременные запросы выполняются один раз; любое изменение группы сбрасывает
+ее записи кэша.
+
+Запуск: python api_server.py --host 127.0.0.1 --port 8080
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import secrets
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+from aiohttp import web
+
+import database_async
+
+API_CACHE_TTL = float(os.environ.get("GROUPTASKER_API_CACHE_TTL", "1"))  # сек
+API_SESSION_TTL = float(os.environ.get("GROUPTASKER_API_SESSION_TTL", str(12 * 3600)))  # сек
+
+# Функции экранов входа, доступные без сессии
+PUBLIC_METHODS = {"check_group_exists", "check_user_exists_in_group"}
+# Функции входа: при успехе открывают сессию (параметр кода группы, параметр имени пользователя)
+LOGIN_METHODS = {
+    "verify_user_password": ("group_code", "name"),
+    "add_user_to_group": ("group_code", "name"),
+    "create_group": ("code", "creator_name"),
+}
+# Функции, доступные в сессии, и их параметры, в которые сервер подставляет имя
+# пользователя сессии. Параметр group_code всегда заменяется кодом группы сессии.
+SESSION_METHODS = {
+    "get_session_bootstrap": ("user_name",),
+    "get_group_overview": (),
+    "remove_group_member": (),  # исключить другого участника может только создатель группы
+    "delete_group": (),  # только создатель группы
+    "save_note": ("user_name",),
+    "save_notes": (),  # автор — последний элемент каждой заметки, см. AUTHORED_ROWS
+    "get_notes": (),
+    "delete_own_note": ("user_name",),
+    "save_task": ("user_name",),
+    "save_tasks": (),
+    "get_tasks": ("user_name",),
+    "delete_own_task": ("user_name",),
+    "save_message": ("user_name",),
+    "get_messages": (),
+    "delete_own_message": ("user_name",),
+    "get_last_tombstone_id": (),
+    "get_message_changes": (),
+    "get_conversation_state": (),
+    "get_group_users": (),
+    "save_private_message": ("sender",),
+    "get_private_messages": ("user1",),
+    "delete_own_private_message": ("user_name",),
+    "get_private_conversation_state": ("user1",),
+}
+# Пакетные записи: параметр со строками, последний элемент которых — автор
+AUTHORED_ROWS = {"save_notes": "notes", "save_tasks": "tasks"}
+READ_PREFIXES = ("get_", "check_", "is_", "verify_")
+# Результаты проверки пароля не кэшируются
+NOT_CACHED = {"verify_user_password"}
+
+METHODS = {name: getattr(database_async, name) for name in (*PUBLIC_METHODS, *LOGIN_METHODS, *SESSION_METHODS)}
+
+Session = namedtuple("Session", "group_code user_name")
+
+
+def encode(value):
+    """Переводит результат функции в JSON с сохранением кортежей и времени."""
+    if isinstance(value, tuple):
+        return {"$tuple": [encode(item) for item in value]}
+    if isinstance(value, dict) or hasattr(value, "keys"):
+        return {key: encode(value[key]) for key in value.keys()}
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+class ResponseCache:
+    """Кэш результатов чтения с коротким временем жизни.
+
+    Хранит задачи asyncio, а не готовые результаты: одновременные одинаковые запросы
+    ждут одну и ту же задачу. Записи относятся к группе (параметр group_code или code),
+    изменение группы удаляет ее записи, а изменение без кода группы (удаление по ID) —
+    весь кэш.
+    """
+
+    def __init__(self, ttl=API_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}  # ключ -> (группа, срок действия, задача)
+
+    def get(self, key, group, factory):
+        loop = asyncio.get_running_loop()
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > loop.time():
+            return entry[2]
+
+        task = loop.create_task(factory())
+        task.add_done_callback(lambda done: self._forget_failed(key, done))
+        self._entries[key] = (group, loop.time() + self.ttl, task)
+        return task
+
+    def invalidate(self, group=None):
+        if group is None:
+            self._entries.clear()
+        else:
+            self._entries = {key: entry for key, entry in self._entries.items()
+                             if entry[0] is not None and entry[0] != group}
+
+    def _forget_failed(self, key, task):
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] is task and (task.cancelled() or task.exception()):
+            del self._entries[key]
+
+
+cache = ResponseCache()
+
+
+class SessionStore:
+    """Сессии вошедших пользователей: токен -> Session.
+
+    Сессии хранятся в памяти процесса, поэтому после перезапуска сервера клиенты входят
+    заново. Каждый вызов в сессии продлевает ее на ttl секунд.
+    """
+
+    def __init__(self, ttl=API_SESSION_TTL):
+        self.ttl = ttl
+        self._sessions = {}  # токен -> (Session, срок действия)
+
+    def open(self, group_code, user_name):
+        now = asyncio.get_running_loop().time()
+        self._sessions = {token: entry for token, entry in self._sessions.items() if entry[1] > now}
+        token = secrets.token_urlsafe(32)
+        self._sessions[token] = (Session(group_code, user_name), now + self.ttl)
+        return token
+
+    def get(self, token):
+        entry = self._sessions.get(token)
+        if entry is None:
+            return None
+        now = asyncio.get_running_loop().time()
+        if entry[1] <= now:
+            del self._sessions[token]
+            return None
+        self._sessions[token] = (entry[0], now + self.ttl)
+        return entry[0]
+
+    def close(self, group_code, user_name=None):
+        """Закрывает сессии участника группы (без user_name — всей группы)."""
+        self._sessions = {token: entry for token, entry in self._sessions.items()
+                          if entry[0].group_code != group_code
+                          or (user_name is not None and entry[0].user_name != user_name)}
+
+
+sessions = SessionStore()
+
+
+def call_group(func, args, kwargs):
+    """Код группы, к которой относится вызов (None, если вызов не привязан к группе)."""
+    arguments = inspect.signature(func).bind(*args, **kwargs).arguments
+    return arguments.get("group_code", arguments.get("code"))
+
+
+def bind_session(name, func, args, kwargs, session):
+    """Подставляет в параметры вызова код группы и имя пользователя сессии."""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    arguments = bound.arguments
+    if "group_code" in arguments:
+        arguments["group_code"] = session.group_code
+    for parameter in SESSION_METHODS[name]:
+        arguments[parameter] = session.user_name
+    if name in AUTHORED_ROWS:
+        rows = AUTHORED_ROWS[name]
+        arguments[rows] = [(*row[:-1], session.user_name) for row in arguments[rows]]
+    return list(bound.args), bound.kwargs
+
+
+async def authorize(name, args, session):
+    """Проверяет права на удаление группы и исключение других участников."""
+    if name == "remove_group_member" and args[1] == session.user_name:
+        return
+    if name in ("remove_group_member", "delete_group"):
+        if not await database_async.is_group_creator(session.user_name, session.group_code):
+            raise PermissionError("Это может сделать только создатель группы")
+
+
+async def call(name, args, kwargs, session=None):
+    """Выполняет вызов. Для функций входа возвращает (результат, токен новой сессии или None)."""
+    func = METHODS.get(name)
+    if func is None:
+        raise LookupError(f"Неизвестная функция: {name}")
+
+    if name in LOGIN_METHODS:
+        arguments = inspect.signature(func).bind(*args, **kwargs).arguments
+        group_parameter, user_parameter = LOGIN_METHODS[name]
+        group = arguments[group_parameter]
+        try:
+            result = await func(*args, **kwargs)
+        finally:
+            if not name.startswith(READ_PREFIXES):
+                cache.invalidate(group)
+        token = sessions.open(group, arguments[user_parameter]) if result else None
+        return result, token
+
+    if name in SESSION_METHODS:
+        if session is None:
+            raise PermissionError("Требуется вход в группу")
+        args, kwargs = bind_session(name, func, args, kwargs, session)
+        await authorize(name, args, session)
+        group = session.group_code
+    else:
+        group = call_group(func, args, kwargs)
+
+    if name.startswith(READ_PREFIXES):
+        if name in NOT_CACHED or cache.ttl <= 0:
+            return await func(*args, **kwargs)
+        key = (name, json.dumps([args, kwargs], sort_keys=True, default=str))
+        # shield: отмена одного запроса не должна отменять общую задачу
+        return await asyncio.shield(cache.get(key, group, lambda: func(*args, **kwargs)))
+
+    try:
+        result = await func(*args, **kwargs)
+    finally:
+        cache.invalidate(group)
+    if name == "delete_group":
+        sessions.close(group)
+    elif name == "remove_group_member" and result:
+        sessions.close(group, args[1])
+    return result
+
+
+def request_session(request):
+    """Сессия из заголовка Authorization: Bearer <токен> (None, если ее нет)."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return sessions.get(token.strip()) if scheme == "Bearer" else None
+
+
+async def batch(request):
+    try:
+        calls = [(name, list(args), dict(kwargs)) for name, args, kwargs in (await request.json())["calls"]]
+    except (ValueError, KeyError, TypeError):
+        raise web.HTTPBadRequest(text="Ожидается {\"calls\": [[имя, аргументы, именованные аргументы], ...]}")
+
+    session = request_session(request)
+    results = []
+    for name, args, kwargs in calls:
+        try:
+            if name in LOGIN_METHODS:
+                result, token = await call(name, args, kwargs)
+                item = {"result": encode(result)}
+                if token is not None:
+                    # Следующие вызовы пачки уже выполняются от имени вошедшего пользователя
+                    item["session"] = token
+                    session = sessions.get(token)
+                results.append(item)
+            else:
+                results.append({"result": encode(await call(name, args, kwargs, session))})
+        except Exception as e:
+            results.append({"error": str(e), "type": type(e).__name__})
+    return web.json_response({"results": results})
+
+
+async def health(request):
+    pool = database_async.get_pool()
+    return web.json_response({"ok": True, "connections": pool.size, "idle": pool.idle_count})
+
+
+async def close_database(app):
+    await database_async.close_pool()
+
+
+def create_app():
+    app = web.Application(client_max_size=4 * 1024 * 1024)
+    app.router.add_post("/api/batch", batch)
+    app.router.add_get("/api/health", health)
+    app.on_cleanup.append(close_database)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API GroupTasker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
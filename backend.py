@@ -0,0 +1,18 @@
+"""Слой доступа к данным для виджетов.
+
+Если задан GROUPTASKER_API_URL, функции выполняются на сервере API (api_client.py),
+иначе клиент подключается к PostgreSQL напрямую (database.py). Имена и результаты
+функций в обоих случаях одинаковые.
+"""
+import api_client
+from api_client import API_METHODS, API_URL
+
+USE_API = bool(API_URL)
+
+if USE_API:
+    _backend = api_client
+else:
+    import database as _backend
+
+for _name in API_METHODS + ("close_pool", "DELETED", "NOT_OWNER", "NOT_FOUND"):
+    globals()[_name] = getattr(_backend, _name)
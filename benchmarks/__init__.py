@@ -0,0 +1,4 @@
+"""Инструменты для проверки производительности работы с базой данных.
+
+Запускаются из корня проекта, например: python -m benchmarks.explain_check
+"""
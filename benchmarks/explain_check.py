@@ -0,0 +1,287 @@
+"""Проверка планов запросов всех функций database.py на большом наборе данных.
+
+Создает отдельную базу, применяет миграции, заполняет ее данными (benchmarks.seed),
+вызывает каждую функцию database.py и через EXPLAIN получает план каждого ее запроса.
+Завершается с кодом 1, если какой-либо запрос читает большую таблицу последовательным
+сканированием, если запрос из INDEX_ONLY читает таблицу не только из индекса
+(покрывающие индексы миграции covering_indexes; таблицы меньше --min-rows строк
+не проверяются) или если для функции из database.py
+нет проверки.
+
+Запуск: python -m benchmarks.explain_check [--database grouptasker_explain] [--scale large]
+"""
+import argparse
+import inspect
+import sys
+import uuid
+
+import psycopg2
+from psycopg2.extras import DictCursor
+
+import database
+import queries
+from benchmarks.seed import SCALES, create_database, group_code, seed, user_name
+from migrations import migrate_up
+
+# Функции database.py, которые не выполняют запросов приложения
+NOT_QUERIES = database.NOT_INSTRUMENTED
+EXPLAINED_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "EXECUTE")
+
+# Функции, запросы которых должны читать указанные таблицы только из индекса (Index Only Scan)
+INDEX_ONLY = {
+    "resolve_group_id": ("groups",),
+    "check_group_exists": ("groups",),
+    "check_user_exists_in_group": ("groups", "users"),
+    "is_group_creator": ("groups", "users"),
+    "get_group_users": ("users",),
+    "get_group_users_by_group_id": ("users",),
+    "get_last_message_id": ("group_messages",),
+    "get_last_message_id_by_group_id": ("group_messages",),
+    "get_message_count": ("group_messages",),
+    "get_message_count_by_group_id": ("group_messages",),
+    "get_conversation_state": ("group_messages",),
+    "get_conversation_state_by_group_id": ("group_messages",),
+    "get_last_tombstone_id": ("message_tombstones",),
+    "get_last_tombstone_id_by_group_id": ("message_tombstones",),
+    "get_private_message_count": ("private_messages",),
+    "get_private_message_count_by_group_id": ("private_messages",),
+    "get_private_conversation_state": ("private_messages",),
+    "get_private_conversation_state_by_group_id": ("private_messages",),
+}
+
+_plans = None  # список планов текущей проверяемой функции
+
+
+class ExplainCursor(DictCursor):
+    """Курсор, который перед каждым запросом сохраняет его план."""
+
+    def execute(self, query, vars=None):
+        text = query if isinstance(query, str) else query.as_string(self.connection)
+        if _plans is not None and text.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            super().execute("EXPLAIN (FORMAT JSON) " + text, vars)
+            _plans.append((text, self.fetchone()[0][0]["Plan"]))
+        return super().execute(query, vars)
+
+
+class ExplainConnection(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        kwargs["cursor_factory"] = ExplainCursor
+        return super().cursor(*args, **kwargs)
+
+
+def helper_calls(code, user, other):
+    """Вызовы всех функций database.py с параметрами, подходящими заполненной базе.
+    Для функций с несколькими вариантами запроса указывается кортеж вызовов."""
+    new_code = f"x{uuid.uuid4().hex[:8]}"
+    group_id = database.resolve_group_id(code)
+    return {
+        "create_group": lambda: database.create_group("explain", new_code, "creator", "pw"),
+        "check_group_exists": lambda: database.check_group_exists(code),
+        "check_user_exists": lambda: database.check_user_exists(user, "pass0", code),
+        "add_user_to_group": lambda: database.add_user_to_group(f"u{uuid.uuid4().hex[:8]}", "pw", code),
+        "save_note": lambda: database.save_note(code, "explain", user),
+        "save_notes": lambda: database.save_notes(code, [("explain", user)] * 3),
+        "get_notes": lambda: database.get_notes(code),
+        "delete_note": lambda: database.delete_note(-1),
+        "delete_own_note": lambda: database.delete_own_note(code, -1, user),
+        "get_group_code": lambda: database.get_group_code(1),
+        "delete_group": lambda: database.delete_group("missing"),
+        "get_group_overview": lambda: database.get_group_overview(code),
+        "get_session_bootstrap": lambda: database.get_session_bootstrap(code, user),
+        "remove_group_member": lambda: database.remove_group_member(code, "missing"),
+        "save_task": lambda: database.save_task(code, "explain", "", "01.01.2030", user),
+        "save_tasks": lambda: database.save_tasks(code, [("explain", "", "01.01.2030", user)] * 3),
+        "get_tasks": lambda: database.get_tasks(code, user),
+        "delete_task": lambda: database.delete_task(-1),
+        "delete_own_task": lambda: database.delete_own_task(code, -1, user),
+        "save_message": lambda: database.save_message(code, user, "explain"),
+        "save_messages": lambda: database.save_messages(code, [(user, "explain")] * 3),
+        "get_messages": (
+            lambda: database.get_messages(code),
+            lambda: database.get_messages(code, limit=50),
+            lambda: database.get_messages(code, before_id=database.MAX_ID, limit=50),
+        ),
+        "delete_message": lambda: database.delete_message(-1),
+        "delete_own_message": lambda: database.delete_own_message(code, -1, user),
+        "get_last_message_id": lambda: database.get_last_message_id(code),
+        "get_message_count": lambda: database.get_message_count(code, 1),
+        "get_last_tombstone_id": lambda: database.get_last_tombstone_id(code),
+        "get_message_changes": lambda: database.get_message_changes(code, 0, 0),
+        "get_group_users": lambda: database.get_group_users(code, user),
+        "save_private_message": lambda: database.save_private_message(code, user, other, "explain"),
+        "get_private_messages": (
+            lambda: database.get_private_messages(code, user, other),
+            lambda: database.get_private_messages(code, user, other, limit=50),
+            lambda: database.get_private_messages(code, user, other, before_id=database.MAX_ID, limit=50),
+        ),
+        "delete_private_message": lambda: database.delete_private_message(-1),
+        "delete_own_private_message": lambda: database.delete_own_private_message(code, -1, user),
+        "get_private_message_count": lambda: database.get_private_message_count(code, user, other, 1),
+        "check_user_exists_in_group": lambda: database.check_user_exists_in_group(user, code),
+        "verify_user_password": lambda: database.verify_user_password(user, "pass0", code),
+        "is_group_creator": lambda: database.is_group_creator(user, code),
+        "get_note_author": lambda: database.get_note_author(1),
+        "resolve_group_id": lambda: (database.forget_group_id(code), database.resolve_group_id(code)),
+        "save_note_by_group_id": lambda: database.save_note_by_group_id(group_id, "explain", user),
+        "save_notes_by_group_id": lambda: database.save_notes_by_group_id(group_id, [("explain", user)] * 3),
+        "get_notes_by_group_id": lambda: database.get_notes_by_group_id(group_id),
+        "save_task_by_group_id": lambda: database.save_task_by_group_id(group_id, "explain", "", "01.01.2030", user),
+        "save_tasks_by_group_id": lambda: database.save_tasks_by_group_id(
+            group_id, [("explain", "", "01.01.2030", user)] * 3),
+        "get_tasks_by_group_id": lambda: database.get_tasks_by_group_id(group_id, user),
+        "save_message_by_group_id": lambda: database.save_message_by_group_id(group_id, user, "explain"),
+        "save_messages_by_group_id": lambda: database.save_messages_by_group_id(group_id, [(user, "explain")] * 3),
+        "get_messages_by_group_id": (
+            lambda: database.get_messages_by_group_id(group_id),
+            lambda: database.get_messages_by_group_id(group_id, before_id=database.MAX_ID, limit=50),
+        ),
+        "get_last_message_id_by_group_id": lambda: database.get_last_message_id_by_group_id(group_id),
+        "get_message_count_by_group_id": lambda: database.get_message_count_by_group_id(group_id, 1),
+        "get_last_tombstone_id_by_group_id": lambda: database.get_last_tombstone_id_by_group_id(group_id),
+        "get_message_changes_by_group_id": lambda: database.get_message_changes_by_group_id(group_id, 0, 0),
+        "get_group_users_by_group_id": lambda: database.get_group_users_by_group_id(group_id, user),
+        "save_private_message_by_group_id": (
+            lambda: database.save_private_message_by_group_id(group_id, user, other, "explain")),
+        "get_private_messages_by_group_id": (
+            lambda: database.get_private_messages_by_group_id(group_id, user, other),
+            lambda: database.get_private_messages_by_group_id(group_id, user, other,
+                                                              before_id=database.MAX_ID, limit=50),
+        ),
+        "get_private_message_count_by_group_id": (
+            lambda: database.get_private_message_count_by_group_id(group_id, user, other, 1)),
+        "get_conversation_state": lambda: database.get_conversation_state(code, 1),
+        "get_conversation_state_by_group_id": lambda: database.get_conversation_state_by_group_id(group_id, 1),
+        "get_private_conversation_state": lambda: database.get_private_conversation_state(code, user, other, 1),
+        "get_private_conversation_state_by_group_id": (
+            lambda: database.get_private_conversation_state_by_group_id(group_id, user, other, 1)),
+    }
+
+
+def database_helpers():
+    """Имена всех функций database.py, выполняющих запросы."""
+    return sorted(
+        name for name, obj in inspect.getmembers(database, inspect.isfunction)
+        if obj.__module__ == database.__name__ and not name.startswith("_") and name not in NOT_QUERIES
+    )
+
+
+def table_sizes():
+    with database.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT relname, reltuples FROM pg_class
+                WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace;
+            """)
+            return {name: rows for name, rows in cursor.fetchall()}
+
+
+def seq_scans(plan):
+    """Возвращает таблицы, которые план читает последовательным сканированием."""
+    tables = []
+    if plan.get("Node Type") == "Seq Scan":
+        tables.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        tables.extend(seq_scans(child))
+    return tables
+
+
+def table_scans(plan):
+    """Возвращает (таблица, вид сканирования) для каждого чтения таблицы в плане."""
+    scans = []
+    if "Relation Name" in plan:
+        scans.append((plan["Relation Name"], plan["Node Type"]))
+    for child in plan.get("Plans", []):
+        scans.extend(table_scans(child))
+    return scans
+
+
+def vacuum(dbname):
+    """Обновляет карту видимости и статистику: без нее планировщик не выбирает Index Only Scan."""
+    params = database.connection_params()
+    params["dbname"] = dbname
+    conn = psycopg2.connect(**params)
+    try:
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE;")
+    finally:
+        conn.close()
+
+
+def run_check(min_rows):
+    global _plans
+    sizes = table_sizes()
+    calls = helper_calls(group_code(1), user_name(0), user_name(1))
+    failures = []
+
+    for name in database_helpers():
+        if name not in calls:
+            failures.append(f"{name}: нет проверки в benchmarks/explain_check.py")
+            continue
+
+        variants = calls[name] if isinstance(calls[name], tuple) else (calls[name],)
+        _plans = []
+        try:
+            for call in variants:
+                call()
+        finally:
+            plans, _plans = _plans, None
+
+        # Вместо EXECUTE показываем текст подготовленного запроса
+        names = {statement[0]: statement[1] for statement in queries.statements()}
+        for query, plan in plans:
+            if query.startswith("EXECUTE "):
+                query = names.get(query.split()[1].rstrip(";"), query)
+            big_tables = [t for t in seq_scans(plan) if sizes.get(t, 0) >= min_rows]
+            status = "SEQ SCAN " + ", ".join(big_tables) if big_tables else "ok"
+            print(f"{name:40} {status:30} {' '.join(query.split())[:80]}")
+            if big_tables:
+                failures.append(f"{name}: последовательное сканирование {', '.join(big_tables)}")
+
+        scans = [scan for _, plan in plans for scan in table_scans(plan)]
+        # Маленькую таблицу планировщик вправе прочитать целиком, как и при проверке выше
+        for table in INDEX_ONLY.get(name, ()):
+            if sizes.get(table, 0) < min_rows:
+                continue
+            kinds = {kind for scanned, kind in scans if scanned == table}
+            if kinds != {"Index Only Scan"}:
+                failures.append(f"{name}: {table} читается не только из индекса ({', '.join(sorted(kinds)) or 'нет чтения'})")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка планов запросов database.py")
+    parser.add_argument("--database", default="grouptasker_explain",
+                        help="база для проверки (будет пересоздана)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="large")
+    parser.add_argument("--skip-seed", action="store_true",
+                        help="не пересоздавать и не заполнять базу")
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="последовательное сканирование таблиц меньшего размера допускается")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        create_database(args.database)
+    database.configure_pool(dbname=args.database)
+    migrate_up()
+    if not args.skip_seed:
+        counts = seed(**SCALES[args.scale])
+        print("Заполнено:", ", ".join(f"{table}={rows}" for table, rows in counts.items()))
+
+    vacuum(args.database)
+
+    database.configure_pool(dbname=args.database, connection_factory=ExplainConnection)
+    failures = run_check(args.min_rows)
+    database.close_pool()
+
+    if failures:
+        print("\nОшибки:")
+        for failure in failures:
+            print(" -", failure)
+        sys.exit(1)
+    print("\nВсе запросы используют индексы, покрывающие индексы читаются без обращения к таблицам")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,610 @@
+"""Нагрузочный тест: N одновременных клиентов GroupTasker без окон.
+
+Каждый клиент повторяет запросы вкладок MainWindow: стартовый снимок (get_session_bootstrap),
+затем синхронизацию открытой вкладки — группового чата (проверка изменений и сверка
+целостности, как в group_chat.py) или личной переписки (как в personal_chat.py) — и
+отправку сообщений. Доски заметок и задач после старта сами базу не опрашивают.
+Синхронизация бывает двух видов (--sync):
+- poll — опрос с плавающим интервалом (poll_scheduler.py и его переменные окружения);
+- listen — уведомления базы (LISTEN/NOTIFY) на отдельном соединении каждого клиента,
+  изменения загружаются только по уведомлению.
+
+Функции берутся из backend.py, поэтому с GROUPTASKER_API_URL клиенты работают через сервер API
+(каждый клиент тогда входит в свою сессию).
+Запросы клиентов выполняются в --workers фоновых потоках (как db_worker); чтобы число
+соединений с сервером было как у N настольных клиентов, каждый клиент еще держит
+DB_POOL_MIN_SIZE простаивающих соединений — минимум своего пула.
+
+Для каждого N из --clients выводятся запросы в секунду, транзакции в секунду на сервере,
+соединения с базой (по pg_stat_activity) и перцентили времени вызова функций.
+
+Запуск: python -m benchmarks.load_test [--clients 10,50,100] [--duration 60] [--sync listen]
+                                       [--skip-seed] [--output load.json]
+"""
+import argparse
+import heapq
+import json
+import queue
+import random
+import select
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import psycopg2
+from psycopg2 import extensions, sql
+
+import api_client
+import backend
+import database
+import db_stats
+from benchmarks.seed import SCALES, create_database, group_code, seed, user_name, user_password
+from benchmarks.suite import current_commit, percentiles
+from change_listener import change_channel
+from group_chat import PAGE_SIZE, SYNC_INTERVAL, SYNC_MAX_INTERVAL
+from message_list import MessageListModel
+from migrations import migrate_up
+from poll_scheduler import POLL_BACKOFF, POLL_MAX_INTERVAL, POLL_MIN_INTERVAL
+
+SAMPLE_INTERVAL = 1.0  # сек, как часто считать соединения с базой
+CALLED = ("get_session_bootstrap", "get_conversation_state", "get_message_changes", "get_last_tombstone_id",
+          "get_messages", "save_message", "get_private_conversation_state", "get_private_messages",
+          "save_private_message")
+
+
+def open_connection(dbname):
+    return psycopg2.connect(**{**database.connection_params(), "dbname": dbname})
+
+
+class LoadRunner:
+    """Цикл событий клиентов: таймеры, результаты фоновых вызовов и уведомления базы."""
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(workers)
+        self.events = queue.Queue()
+        self.timers = []
+        self.sequence = 0
+        self.pending = set()
+        self.timings = {name: [] for name in CALLED}
+        self.coalesced = 0
+        self.errors = 0
+        self.api = self.timed_api(backend)
+
+    def timed_api(self, source):
+        """Функции CALLED из source (модуль backend или api_client.Session) с замером времени."""
+        return {name: self._timed(name, getattr(source, name)) for name in CALLED}
+
+    def _timed(self, name, func):
+        timings = self.timings
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            timings[name].append(time.perf_counter() - start)
+            return result
+
+        return call
+
+    def reset_measurements(self):
+        for timings in self.timings.values():
+            timings.clear()
+        self.coalesced = self.errors = 0
+
+    def at(self, delay, callback):
+        """Вызывает callback через delay секунд."""
+        self.sequence += 1
+        heapq.heappush(self.timers, (time.monotonic() + delay, self.sequence, callback))
+
+    def submit(self, client, key, func, *args, on_result=None, **kwargs):
+        """Выполняет func в фоновом потоке. Пока вызов с тем же ключом выполняется,
+        повторный пропускается (как submit(..., replace=False) в db_worker)."""
+        if key is not None:
+            if (client, key) in self.pending:
+                self.coalesced += 1
+                return
+            self.pending.add((client, key))
+
+        def job():
+            try:
+                result, error = func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            self.events.put(("result", client, key, on_result, result, error))
+
+        self.executor.submit(job)
+
+    def is_pending(self, client, key):
+        return (client, key) in self.pending
+
+    def run(self, duration, on_notify=None):
+        """Обрабатывает таймеры и события duration секунд."""
+        deadline = time.monotonic() + duration
+        while True:
+            now = time.monotonic()
+            while self.timers and self.timers[0][0] <= now:
+                heapq.heappop(self.timers)[2]()
+            if now >= deadline:
+                return
+            timeout = min(self.timers[0][0] if self.timers else deadline, deadline) - now
+            try:
+                event = self.events.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                continue
+
+            if event[0] == "notify":
+                on_notify(*event[1:])
+                continue
+            _, client, key, on_result, result, error = event
+            self.pending.discard((client, key))
+            if error is not None:
+                self.errors += 1
+            elif on_result is not None:
+                on_result(result)
+
+    def drain(self):
+        """Дожидается фоновых вызовов, не обрабатывая их результаты."""
+        self.timers.clear()
+        self.executor.shutdown(wait=True)
+        self.pending.clear()
+        while not self.events.empty():
+            self.events.get_nowait()
+
+
+class Poller:
+    """AdaptivePoller из poll_scheduler.py на таймерах LoadRunner."""
+
+    def __init__(self, runner, callback, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL,
+                 backoff=POLL_BACKOFF):
+        self.runner = runner
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.interval = min_interval
+        self.active = False
+        self.due = 0.0
+        self.generation = 0
+
+    def _schedule(self, interval):
+        self.generation += 1
+        generation = self.generation
+        self.due = time.monotonic() + interval / 1000
+        self.runner.at(interval / 1000, lambda: self._on_timeout(generation))
+
+    def start(self):
+        self.active = True
+        self.interval = self.min_interval
+        self._schedule(self.interval)
+
+    def stop(self):
+        self.active = False
+        self.generation += 1
+
+    def activity(self):
+        self.interval = self.min_interval
+        if self.active and (self.due - time.monotonic()) * 1000 > self.interval:
+            self._schedule(self.interval)
+
+    def _on_timeout(self, generation):
+        if not self.active or generation != self.generation:
+            return
+        self.interval = min(int(self.interval * self.backoff), self.max_interval)
+        self._schedule(self.interval)
+        self.callback()
+
+
+class SimulatedClient:
+    """Один настольный клиент: открыта вкладка группового чата или личной переписки."""
+
+    def __init__(self, runner, code, user, peer, personal, sync, message_rate, rng):
+        self.runner = runner
+        self.api = runner.api
+        self.code = code
+        self.user = user
+        self.peer = peer
+        self.personal = personal
+        self.sync = sync
+        self.message_rate = message_rate
+        self.rng = rng
+        self.connections = []
+        self.listener = None
+
+        # Групповой чат
+        self.messages = MessageListModel()
+        self.loaded = False
+        self.last_message_id = 0
+        self.oldest_message_id = None
+        self.last_tombstone_id = 0
+        self.poller = Poller(runner, self.check_updates)
+        self.sync_poller = Poller(runner, self.full_sync, SYNC_INTERVAL, SYNC_MAX_INTERVAL)
+
+        # Личная переписка
+        self.private = MessageListModel()
+        self.private_last_id = 0
+        self.private_oldest_id = None
+        self.private_poller = Poller(runner, self.check_private_updates)
+
+    def connect(self, dbname, idle_connections):
+        """Открывает соединения, которые держит настоящий клиент. Возвращает число неудачных."""
+        failed = 0
+        for _ in range(idle_connections):
+            try:
+                self.connections.append(open_connection(dbname))
+            except psycopg2.Error:
+                failed += 1
+        if self.sync == "listen":
+            try:
+                conn = open_connection(dbname)
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(sql.SQL("LISTEN {};").format(sql.Identifier(change_channel(self.code))))
+                self.listener = conn
+                self.connections.append(conn)
+            except psycopg2.Error:
+                failed += 1
+        return failed
+
+    def close(self):
+        self.poller.stop()
+        self.sync_poller.stop()
+        self.private_poller.stop()
+        for conn in self.connections:
+            conn.close()
+        self.connections.clear()
+
+    def start(self):
+        self.runner.submit(self, "bootstrap", self.api["get_session_bootstrap"], self.code, self.user, PAGE_SIZE,
+                           on_result=self.on_bootstrap)
+
+    def on_bootstrap(self, snapshot):
+        self.show_latest_messages((snapshot["last_tombstone_id"], snapshot["messages"]))
+        if self.personal:
+            self.load_private_messages()
+        # Без уведомлений базы открытая вкладка опрашивает базу
+        if self.listener is None:
+            if self.personal:
+                self.private_poller.start()
+            else:
+                self.poller.start()
+                self.sync_poller.start()
+        self.schedule_message()
+
+    def schedule_message(self):
+        if self.message_rate > 0:
+            self.runner.at(self.rng.expovariate(self.message_rate / 60), self.send_message)
+
+    def send_message(self):
+        text = f"нагрузка {self.rng.randrange(10 ** 6)}"
+        if self.personal:
+            self.runner.submit(self, None, self.save_and_fetch_private, text, self.private_last_id,
+                               on_result=self.append_private_messages)
+        else:
+            self.runner.submit(self, None, self.save_and_fetch, text, self.last_message_id, self.last_tombstone_id,
+                               on_result=lambda changes: self.apply_changes(*changes))
+        self.schedule_message()
+
+    # Групповой чат (group_chat.py)
+
+    def load_latest_messages(self):
+        self.runner.submit(self, "load", self.fetch_latest_messages, on_result=self.show_latest_messages)
+
+    def fetch_latest_messages(self):
+        last_tombstone_id = self.api["get_last_tombstone_id"](self.code)
+        return last_tombstone_id, self.api["get_messages"](self.code, limit=PAGE_SIZE)
+
+    def show_latest_messages(self, result):
+        last_tombstone_id, messages = result
+        self.messages.clear()
+        self.loaded = True
+        self.last_tombstone_id = last_tombstone_id
+        self.messages.append_messages(messages)
+        if messages:
+            self.last_message_id = messages[-1][0]
+            self.oldest_message_id = messages[0][0]
+
+    def check_updates(self):
+        if not self.loaded or self.runner.is_pending(self, "load"):
+            return
+        self.runner.submit(self, "updates", self.fetch_changes, self.last_message_id, self.last_tombstone_id,
+                           self.oldest_message_id or 0, self.messages.state(),
+                           on_result=lambda changes: self.apply_changes(*changes))
+
+    def fetch_changes(self, last_message_id, last_tombstone_id, first_message_id, local_state):
+        if self.api["get_conversation_state"](self.code, first_message_id) == local_state:
+            return [], []
+        return self.api["get_message_changes"](self.code, last_message_id, last_tombstone_id)
+
+    def save_and_fetch(self, text, last_message_id, last_tombstone_id):
+        self.api["save_message"](self.code, self.user, text)
+        return self.api["get_message_changes"](self.code, last_message_id, last_tombstone_id)
+
+    def apply_changes(self, messages, deleted):
+        deleted_ids = set()
+        for tombstone_id, msg_id in deleted:
+            deleted_ids.add(msg_id)
+            self.messages.remove_message(msg_id)
+            self.last_tombstone_id = max(self.last_tombstone_id, tombstone_id)
+        if messages or deleted:
+            self.poller.activity()
+            self.sync_poller.activity()
+        new_messages = [message for message in messages if message[0] not in deleted_ids]
+        self.messages.append_messages(new_messages)
+        if messages:
+            self.last_message_id = max(self.last_message_id, messages[-1][0])
+        if new_messages and self.oldest_message_id is None:
+            self.oldest_message_id = new_messages[0][0]
+
+    def full_sync(self):
+        if not self.loaded or self.runner.is_pending(self, "load"):
+            return
+        self.runner.submit(self, "sync", self.api["get_conversation_state"], self.code, self.oldest_message_id or 0,
+                           on_result=self.on_conversation_state)
+
+    def on_conversation_state(self, state):
+        local_state = self.messages.state()
+        if state != local_state and local_state[0] <= state[0] and not self.runner.is_pending(self, "updates"):
+            self.load_latest_messages()
+
+    # Личная переписка (personal_chat.py)
+
+    def load_private_messages(self):
+        self.runner.submit(self, "private_load", self.api["get_private_messages"], self.code, self.user, self.peer,
+                           limit=PAGE_SIZE, on_result=self.show_private_messages)
+
+    def show_private_messages(self, messages):
+        self.private.clear()
+        self.private_last_id = 0
+        self.private_oldest_id = None
+        self.append_private_messages(messages)
+
+    def append_private_messages(self, messages):
+        rows = [(msg_id, sender, text, timestamp) for msg_id, sender, receiver, text, timestamp in messages]
+        self.private.append_messages(rows)
+        if rows:
+            self.private_last_id = max(self.private_last_id, rows[-1][0])
+            if self.private_oldest_id is None:
+                self.private_oldest_id = rows[0][0]
+
+    def check_private_updates(self):
+        if self.runner.is_pending(self, "private_load"):
+            return
+        self.runner.submit(self, "private_updates", self.fetch_private_updates, self.private_last_id,
+                           self.private_oldest_id or 0, self.private.state(),
+                           on_result=lambda result: self.apply_private_updates(*result))
+
+    def fetch_private_updates(self, last_message_id, first_message_id, local_state):
+        state = self.api["get_private_conversation_state"](self.code, self.user, self.peer, first_message_id)
+        if state == local_state:
+            return [], state
+        return self.api["get_private_messages"](self.code, self.user, self.peer, last_message_id), state
+
+    def save_and_fetch_private(self, text, last_message_id):
+        self.api["save_private_message"](self.code, self.user, self.peer, text)
+        return self.api["get_private_messages"](self.code, self.user, self.peer, last_message_id)
+
+    def apply_private_updates(self, messages, state):
+        if messages or self.private.state() != state:
+            self.private_poller.activity()
+        self.append_private_messages(messages)
+        local_state = self.private.state()
+        if local_state != state and local_state[0] <= state[0]:
+            self.load_private_messages()
+
+    # Уведомления базы (on_database_change вкладок)
+
+    def on_database_change(self, table, operation, entity_id, payload):
+        if not self.personal and table == "group_messages":
+            if operation == "INSERT" and entity_id <= self.last_message_id:
+                return
+            if operation == "DELETE" and entity_id not in self.messages:
+                return
+            self.check_updates()
+        elif self.personal and table == "private_messages":
+            if {payload.get("sender"), payload.get("receiver")} != {self.user, self.peer}:
+                return
+            if operation == "DELETE":
+                self.private.remove_message(entity_id)
+            elif operation == "INSERT" and entity_id > self.private_last_id:
+                self.runner.submit(self, "private_new", self.api["get_private_messages"], self.code, self.user,
+                                   self.peer, self.private_last_id, on_result=self.append_private_messages)
+
+
+def listen(clients, events, stop):
+    """Поток, пересылающий уведомления базы клиентам через очередь событий."""
+    listeners = {client.listener: client for client in clients if client.listener is not None}
+    while listeners and not stop.is_set():
+        ready, _, _ = select.select(list(listeners), [], [], 0.2)
+        for conn in ready:
+            try:
+                conn.poll()
+            except psycopg2.Error:
+                del listeners[conn]
+                continue
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    payload = json.loads(notify.payload)
+                except ValueError:
+                    continue
+                events.put(("notify", listeners[conn], payload.get("table"), payload.get("op"),
+                            payload.get("id"), payload))
+
+
+class ServerStats:
+    """Соединения и транзакции базы по pg_stat_activity и pg_stat_database."""
+
+    def __init__(self, dbname):
+        self.dbname = dbname
+        self.conn = open_connection(dbname)
+        self.conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        self.samples = []
+
+    def transactions(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_clear_snapshot();")
+            cursor.execute("SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = %s;",
+                           (self.dbname,))
+            return cursor.fetchone()[0]
+
+    def sample(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT count(*), count(*) FILTER (WHERE state = 'active')
+                FROM pg_stat_activity WHERE datname = %s AND pid <> pg_backend_pid();
+            """, (self.dbname,))
+            self.samples.append(cursor.fetchone())
+
+    def connections(self):
+        totals = [total for total, active in self.samples] or [0]
+        actives = [active for total, active in self.samples] or [0]
+        return {"max": max(totals), "mean": statistics.mean(totals),
+                "active_max": max(actives), "active_mean": statistics.mean(actives)}
+
+    def close(self):
+        self.conn.close()
+
+
+def run_step(count, args, scale, server):
+    """Запускает count клиентов и возвращает замеры установившейся нагрузки."""
+    rng = random.Random(args.random_seed)
+    per_group = args.clients_per_group
+    runner = LoadRunner(args.workers)
+    clients = []
+    for index in range(count):
+        group, member = divmod(index, per_group)
+        client = SimulatedClient(
+            runner, group_code(group + 1), user_name(member), user_name((member + 1) % scale["users_per_group"]),
+            personal=rng.random() < args.personal_share, sync=args.sync, message_rate=args.message_rate,
+            rng=random.Random(rng.random()))
+        if backend.USE_API:
+            # Сервер API выполняет вызовы от имени пользователя сессии
+            client.api = runner.timed_api(api_client.open_session(client.user, user_password(member), client.code))
+        clients.append(client)
+
+    connect_failures = sum(client.connect(args.database, database.DB_POOL_MIN_SIZE) for client in clients)
+    stop = threading.Event()
+    listener = threading.Thread(target=listen, args=(clients, runner.events, stop), daemon=True)
+    listener.start()
+
+    def sample():
+        server.sample()
+        runner.at(SAMPLE_INTERVAL, sample)
+
+    # Клиенты запускаются равномерно в течение разгона, замеры начинаются после него
+    for index, client in enumerate(clients):
+        runner.at(args.ramp_up * index / count, client.start)
+    on_notify = lambda client, *change: client.on_database_change(*change)
+    runner.run(args.ramp_up, on_notify)
+
+    runner.reset_measurements()
+    db_stats.reset()
+    server.samples.clear()
+    transactions = server.transactions()
+    sample()
+    start = time.perf_counter()
+    runner.run(args.duration, on_notify)
+    elapsed = time.perf_counter() - start
+    transactions = server.transactions() - transactions
+    queries = sum(stats["queries"] for stats in db_stats.snapshot().values())
+
+    stop.set()
+    listener.join()
+    runner.drain()
+    for client in clients:
+        client.close()
+
+    helpers = {name: percentiles(timings) for name, timings in runner.timings.items() if len(timings) >= 2}
+    timings = [t for values in runner.timings.values() for t in values]
+    return {
+        "clients": count,
+        "seconds": elapsed,
+        "calls_per_second": len(timings) / elapsed,
+        # Через сервер API запросы к базе в этом процессе не выполняются
+        "queries_per_second": None if backend.USE_API else queries / elapsed,
+        "transactions_per_second": transactions / elapsed,
+        "connections": server.connections(),
+        "connect_failures": connect_failures,
+        "coalesced": runner.coalesced,
+        "errors": runner.errors,
+        "latency": percentiles(timings) if len(timings) >= 2 else None,
+        "helpers": helpers,
+    }
+
+
+def print_step(step):
+    latency = step["latency"] or {"p50_ms": 0, "p95_ms": 0, "p99_ms": 0}
+    queries = step["queries_per_second"]
+    print(f"{step['clients']:>8} {step['calls_per_second']:>10.1f} "
+          f"{'-' if queries is None else f'{queries:.1f}':>10} {step['transactions_per_second']:>10.1f} "
+          f"{step['connections']['max']:>8} {step['connections']['active_max']:>8} "
+          f"{latency['p50_ms']:>9.2f} {latency['p95_ms']:>9.2f} {latency['p99_ms']:>9.2f} "
+          f"{step['connect_failures']:>7} {step['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест: одновременные клиенты GroupTasker")
+    parser.add_argument("--database", default="grouptasker_load", help="база для теста (будет пересоздана)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--skip-seed", action="store_true", help="не пересоздавать и не заполнять базу")
+    parser.add_argument("--clients", default="10,50,100", help="числа клиентов через запятую, по шагу на каждое")
+    parser.add_argument("--clients-per-group", type=int, help="клиентов в одной группе (по умолчанию все ее участники)")
+    parser.add_argument("--sync", choices=("poll", "listen"), default="poll", help="как клиенты узнают об изменениях")
+    parser.add_argument("--personal-share", type=float, default=0.3,
+                        help="доля клиентов с открытой личной перепиской (остальные — в групповом чате)")
+    parser.add_argument("--message-rate", type=float, default=1.0, help="сообщений в минуту от каждого клиента")
+    parser.add_argument("--duration", type=float, default=60, help="секунд замеров на каждом шаге")
+    parser.add_argument("--ramp-up", type=float, default=10, help="секунд на запуск клиентов перед замерами")
+    parser.add_argument("--workers", type=int, default=32, help="фоновых потоков для запросов всех клиентов")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    args.clients_per_group = args.clients_per_group or scale["users_per_group"]
+    steps = [int(count) for count in args.clients.split(",")]
+    if not 2 <= args.clients_per_group <= scale["users_per_group"]:
+        parser.error(f"--clients-per-group должно быть от 2 до {scale['users_per_group']}")
+    if max(steps) > scale["groups"] * args.clients_per_group:
+        parser.error("клиентов больше, чем участников в заполненных группах")
+
+    if not args.skip_seed:
+        create_database(args.database)
+    database.configure_pool(dbname=args.database, max_size=args.workers)
+    migrate_up()
+    if not args.skip_seed:
+        counts = seed(random_seed=args.random_seed, **scale)
+        print("Заполнено:", ", ".join(f"{table}={rows}" for table, rows in counts.items()))
+
+    server = ServerStats(args.database)
+    print(f"\nСинхронизация: {args.sync}, опрос {POLL_MIN_INTERVAL}-{POLL_MAX_INTERVAL} мс, "
+          f"сверка {SYNC_INTERVAL}-{SYNC_MAX_INTERVAL} мс, {args.message_rate} сообщ./мин на клиента")
+    print(f"{'клиентов':>8} {'вызовов/с':>10} {'запросов/с':>10} {'транз./с':>10} {'соедин.':>8} {'активных':>8} "
+          f"{'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'отказов':>7} {'ошибок':>7}")
+    results = []
+    for count in steps:
+        step = run_step(count, args, scale, server)
+        print_step(step)
+        results.append(step)
+    server.close()
+    database.close_pool()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({
+                "commit": current_commit(),
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "database": args.database,
+                "scale": scale,
+                "sync": args.sync,
+                "poll_interval_ms": [POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_BACKOFF],
+                "sync_interval_ms": [SYNC_INTERVAL, SYNC_MAX_INTERVAL],
+                "options": {name: value for name, value in vars(args).items() if name != "output"},
+                "steps": results,
+            }, file, ensure_ascii=False, indent=2)
+        print("\nРезультаты сохранены в", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Сравнение обычных и подготовленных запросов database.py.
+
+Для get_messages, get_private_messages и get_tasks измеряет время вызова на клиенте
+с выключенными и включенными подготовленными запросами (USE_PREPARED_STATEMENTS),
+а также время планирования на сервере (Planning Time из EXPLAIN ANALYZE): для
+обычного запроса план строится при каждом вызове, для подготовленного после
+нескольких выполнений используется сохраненный общий план.
+
+Запуск: python -m benchmarks.prepared_statements [--database grouptasker_explain] [--seed]
+"""
+import argparse
+import statistics
+import time
+
+import psycopg2
+from psycopg2.extras import DictCursor
+
+import database
+import queries as sql
+from benchmarks.seed import SCALES, create_database, group_code, seed, user_name
+from migrations import migrate_up
+
+# Подготовленный запрос переходит на общий план после пяти выполнений
+GENERIC_PLAN_WARMUP = 6
+
+_recorded = None  # запросы текущей функции: (текст, параметры)
+
+
+class RecordingCursor(DictCursor):
+    """Курсор, который запоминает выполняемые запросы вместе с параметрами."""
+
+    def execute(self, query, vars=None):
+        if _recorded is not None:
+            _recorded.append((query, vars))
+        return super().execute(query, vars)
+
+
+class RecordingConnection(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        kwargs["cursor_factory"] = RecordingCursor
+        return super().cursor(*args, **kwargs)
+
+
+def helper_calls(code, user, other):
+    return {
+        "get_messages": lambda: database.get_messages(code, limit=50),
+        "get_private_messages": lambda: database.get_private_messages(code, user, other, limit=50),
+        "get_tasks": lambda: database.get_tasks(code, user),
+    }
+
+
+def time_calls(call, iterations, prepared):
+    """Время одного вызова в миллисекундах (медиана и среднее)."""
+    database.USE_PREPARED_STATEMENTS = prepared
+    call()  # соединение и подготовка запроса не входят в измерение
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), statistics.mean(timings)
+
+
+def record_queries(call):
+    """Возвращает запросы, которые выполняет функция, с их параметрами."""
+    global _recorded
+    database.USE_PREPARED_STATEMENTS = False
+    _recorded = []
+    try:
+        call()
+    finally:
+        queries, _recorded = _recorded, None
+    return queries
+
+
+def planning_time(cursor, query, params):
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query, params)
+    return cursor.fetchone()[0][0]["Planning Time"]
+
+
+def server_planning(queries, iterations):
+    """Среднее время планирования, мс: (обычные запросы, подготовленные запросы)."""
+    plain = prepared = 0.0
+    with database.get_connection() as conn:
+        with conn.cursor() as cursor:
+            for query, params in queries:
+                name, text, count = sql.statement(query)
+                cursor.execute(f"PREPARE bench_{name} AS {text};")
+                execute = f"EXECUTE bench_{name}" + (f" ({', '.join(['%s'] * count)})" if count else "")
+                for _ in range(GENERIC_PLAN_WARMUP):
+                    cursor.execute(execute, params)
+
+                plain += statistics.mean(planning_time(cursor, query, params) for _ in range(iterations))
+                prepared += statistics.mean(planning_time(cursor, execute, params) for _ in range(iterations))
+                cursor.execute(f"DEALLOCATE bench_{name};")
+    return plain, prepared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение обычных и подготовленных запросов")
+    parser.add_argument("--database", default="grouptasker_explain",
+                        help="заполненная база (см. benchmarks.explain_check)")
+    parser.add_argument("--seed", action="store_true",
+                        help="пересоздать и заполнить базу перед измерением")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="large")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.seed:
+        create_database(args.database)
+    database.configure_pool(dbname=args.database, connection_factory=RecordingConnection)
+    migrate_up()
+    if args.seed:
+        seed(**SCALES[args.scale])
+
+    calls = helper_calls(group_code(1), user_name(0), user_name(1))
+    print(f"{'функция':24} {'обычные, мс':>22} {'подготовленные, мс':>22} {'планирование, мс':>22}")
+    print(f"{'':24} {'медиана / среднее':>22} {'медиана / среднее':>22} {'обычные / подгот.':>22}")
+    for name, call in calls.items():
+        plain = time_calls(call, args.iterations, prepared=False)
+        prepared = time_calls(call, args.iterations, prepared=True)
+        planning = server_planning(record_queries(call), min(args.iterations, 50))
+        print(f"{name:24} {plain[0]:>10.3f} / {plain[1]:<9.3f} {prepared[0]:>10.3f} / {prepared[1]:<9.3f} "
+              f"{planning[0]:>10.3f} / {planning[1]:<9.3f}")
+
+    database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Детерминированный генератор тестовых данных по схеме из README.
+
+При одинаковых параметрах и зерне генерирует одни и те же строки с одними и теми же ID,
+поэтому результаты измерений на разных коммитах можно сравнивать между собой.
+"""
+import io
+import random
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2 import extensions, sql
+
+from database import connection_params, get_connection
+
+SCALES = {
+    "small": {
+        "groups": 100,
+        "users_per_group": 5,
+        "notes_per_group": 20,
+        "tasks_per_user": 5,
+        "messages_per_group": 100,
+        "private_messages_per_group": 50,
+    },
+    "large": {
+        "groups": 2000,
+        "users_per_group": 10,
+        "notes_per_group": 50,
+        "tasks_per_user": 10,
+        "messages_per_group": 250,
+        "private_messages_per_group": 100,
+    },
+    # 10 тыс. групп и 1 млн сообщений чата
+    "huge": {
+        "groups": 10000,
+        "users_per_group": 10,
+        "notes_per_group": 20,
+        "tasks_per_user": 5,
+        "messages_per_group": 100,
+        "private_messages_per_group": 20,
+    },
+}
+
+SEEDED_TABLES = ("groups", "users", "notes", "tasks", "group_messages", "private_messages",
+                 "message_tombstones")
+# Каждое DELETED_MESSAGE_EVERY-е сообщение чата считается удаленным: вместо него
+# в message_tombstones записывается отметка, как это делает триггер при удалении
+DELETED_MESSAGE_EVERY = 5
+START_TIME = datetime(2025, 1, 1)
+WORDS = ("задача", "сдать", "отчет", "лекция", "семинар", "проект", "встреча",
+         "вопрос", "срок", "готово", "завтра", "проверить", "код", "база")
+
+
+def group_code(index):
+    """Код группы с номером index (шестизначный, как в приложении)."""
+    return str(100000 + index)
+
+
+def user_name(index):
+    """Имя пользователя с номером index внутри группы."""
+    return f"user{index}"
+
+
+def user_password(index):
+    """Пароль пользователя с номером index внутри группы."""
+    return f"pass{index}"
+
+
+def create_database(name):
+    """Пересоздает пустую базу данных name на том же сервере."""
+    params = connection_params()
+    params["dbname"] = "postgres"
+    conn = psycopg2.connect(**params)
+    try:
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {};").format(sql.Identifier(name)))
+            cursor.execute(sql.SQL("CREATE DATABASE {};").format(sql.Identifier(name)))
+    finally:
+        conn.close()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _copy(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(str(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        sql.SQL("COPY {} ({}) FROM STDIN;").format(
+            sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, columns))
+        ),
+        buffer,
+    )
+
+
+def seed(groups, users_per_group, notes_per_group, tasks_per_user,
+         messages_per_group, private_messages_per_group, random_seed=42):
+    """Очищает таблицы и заполняет их данными. Возвращает количество строк по таблицам.
+
+    Схема уже должна существовать (см. migrations.py). ID групп идут подряд с 1,
+    группа с ID n имеет код group_code(n), ее пользователи — user_name(0..users_per_group-1).
+    Кроме messages_per_group сообщений в каждой группе есть отметки об удаленных сообщениях
+    (по одной на DELETED_MESSAGE_EVERY - 1 сообщений).
+    """
+    rng = random.Random(random_seed)
+    counts = {}
+
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE;").format(
+                sql.SQL(", ").join(map(sql.Identifier, SEEDED_TABLES))))
+            # Триггеры уведомлений на каждую вставленную строку здесь не нужны
+            for table in SEEDED_TABLES:
+                cursor.execute(sql.SQL("ALTER TABLE {} DISABLE TRIGGER USER;").format(
+                    sql.Identifier(table)))
+
+            group_ids = range(1, groups + 1)
+            _copy(cursor, "groups", ("name", "code"),
+                  ((f"Группа {g}", group_code(g)) for g in group_ids))
+            counts["groups"] = groups
+
+            _copy(cursor, "users", ("name", "password", "group_id"),
+                  ((user_name(u), user_password(u), g)
+                   for g in group_ids for u in range(users_per_group)))
+            counts["users"] = groups * users_per_group
+
+            _copy(cursor, "notes", ("group_id", "text", "user_name", "created_at"),
+                  ((g, _text(rng, 8), user_name(rng.randrange(users_per_group)),
+                    START_TIME + timedelta(minutes=n))
+                   for g in group_ids for n in range(notes_per_group)))
+            counts["notes"] = groups * notes_per_group
+
+            _copy(cursor, "tasks", ("group_id", "title", "description", "deadline", "user_name"),
+                  ((g, _text(rng, 3), _text(rng, 12),
+                    (START_TIME + timedelta(days=rng.randrange(365))).strftime("%d.%m.%Y"),
+                    user_name(u))
+                   for g in group_ids for u in range(users_per_group) for _ in range(tasks_per_user)))
+            counts["tasks"] = groups * users_per_group * tasks_per_user
+
+            # Сообщения получают ID явно, чтобы у удаленных остались пропуски в нумерации
+            deleted_per_group = messages_per_group // (DELETED_MESSAGE_EVERY - 1)
+            messages, tombstones = [], []
+            message_id = 0
+            for g in group_ids:
+                for m in range(messages_per_group + deleted_per_group):
+                    message_id += 1
+                    created_at = START_TIME + timedelta(seconds=m)
+                    if m % DELETED_MESSAGE_EVERY == DELETED_MESSAGE_EVERY - 1:
+                        tombstones.append((g, message_id, created_at))
+                    else:
+                        messages.append((message_id, g, user_name(rng.randrange(users_per_group)),
+                                         _text(rng, 10), created_at))
+            _copy(cursor, "group_messages", ("id", "group_id", "user_name", "message", "created_at"), messages)
+            _copy(cursor, "message_tombstones", ("group_id", "message_id", "deleted_at"), tombstones)
+            if message_id:
+                cursor.execute("SELECT setval(pg_get_serial_sequence('group_messages', 'id'), %s);",
+                               (message_id,))
+            counts["group_messages"] = len(messages)
+            counts["message_tombstones"] = len(tombstones)
+
+            def private_rows():
+                for g in group_ids:
+                    for m in range(private_messages_per_group):
+                        sender, receiver = rng.sample(range(users_per_group), 2)
+                        yield (g, user_name(sender), user_name(receiver), _text(rng, 10),
+                               START_TIME + timedelta(seconds=m))
+
+            if users_per_group >= 2:
+                _copy(cursor, "private_messages",
+                      ("group_id", "sender", "receiver", "message", "created_at"), private_rows())
+                counts["private_messages"] = groups * private_messages_per_group
+            else:
+                counts["private_messages"] = 0
+
+            for table in SEEDED_TABLES:
+                cursor.execute(sql.SQL("ALTER TABLE {} ENABLE TRIGGER USER;").format(
+                    sql.Identifier(table)))
+
+            # Свежая статистика, чтобы планировщик видел реальные объемы
+            cursor.execute("ANALYZE;")
+
+    return counts
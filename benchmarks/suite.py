@@ -0,0 +1,310 @@
+"""Замеры времени всех функций database.py на детерминированно заполненной базе.
+
+Заполняет базу генератором benchmarks.seed в выбранном масштабе, затем вызывает каждую
+функцию database.py заданное число раз и выводит перцентили p50/p95/p99 времени вызова,
+а для функций записи — еще и число записанных (или удаленных) строк в секунду. Группы и
+пользователи для вызовов выбираются генератором с фиксированным зерном, поэтому на
+разных коммитах выполняются одни и те же вызовы.
+
+Результаты сохраняются в JSON (по умолчанию benchmarks/results/<коммит>-<масштаб>.json);
+с --compare выводится сравнение с результатами другого коммита.
+
+Запуск: python -m benchmarks.suite [--scale huge] [--messages-per-group 500] [--skip-seed]
+                                   [--compare benchmarks/results/<файл>.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import database
+from benchmarks.explain_check import database_helpers, table_sizes
+from benchmarks.seed import SCALES, create_database, group_code, seed, user_name
+from migrations import migrate_up
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+PAGE_SIZE = 50  # сообщений на странице чата, как в group_chat.py
+
+# Параметры одного вызова: группа, два ее пользователя, заметка и позиция синхронизации чата
+Sample = namedtuple("Sample", "code group_id user other note_id last_id first_id last_tombstone_id")
+
+
+def make_samples(scale, count, random_seed):
+    """Параметры count вызовов; одни и те же при одинаковых масштабе и зерне."""
+    rng = random.Random(random_seed)
+    samples = []
+    for _ in range(count):
+        index = rng.randrange(1, scale["groups"] + 1)
+        code = group_code(index)
+        user, other = rng.sample(range(scale["users_per_group"]), 2)
+        last_id = database.get_last_message_id(code)
+        samples.append(Sample(
+            code=code,
+            group_id=database.resolve_group_id(code),
+            user=user_name(user),
+            other=user_name(other),
+            note_id=(index - 1) * scale["notes_per_group"] + rng.randrange(scale["notes_per_group"]) + 1,
+            last_id=last_id,
+            first_id=max(last_id - PAGE_SIZE + 1, 0),
+            last_tombstone_id=database.get_last_tombstone_id(code),
+        ))
+    return samples
+
+
+def reader_calls():
+    """Функции чтения: имя -> вызов с параметрами из Sample (как их вызывают виджеты)."""
+    return {
+        "check_group_exists": lambda s: database.check_group_exists(s.code),
+        "check_user_exists": lambda s: database.check_user_exists(s.user, "pass0", s.code),
+        "check_user_exists_in_group": lambda s: database.check_user_exists_in_group(s.user, s.code),
+        "verify_user_password": lambda s: database.verify_user_password(s.user, "pass0", s.code),
+        "is_group_creator": lambda s: database.is_group_creator(s.user, s.code),
+        "resolve_group_id": lambda s: (database.forget_group_id(s.code), database.resolve_group_id(s.code)),
+        "get_group_code": lambda s: database.get_group_code(s.group_id),
+        "get_group_overview": lambda s: database.get_group_overview(s.code),
+        "get_session_bootstrap": lambda s: database.get_session_bootstrap(s.code, s.user, PAGE_SIZE),
+        "get_notes": lambda s: database.get_notes(s.code),
+        "get_notes_by_group_id": lambda s: database.get_notes_by_group_id(s.group_id),
+        "get_note_author": lambda s: database.get_note_author(s.note_id),
+        "get_tasks": lambda s: database.get_tasks(s.code, s.user),
+        "get_tasks_by_group_id": lambda s: database.get_tasks_by_group_id(s.group_id, s.user),
+        "get_messages": lambda s: database.get_messages(s.code, limit=PAGE_SIZE),
+        "get_messages_by_group_id": lambda s: database.get_messages_by_group_id(s.group_id, limit=PAGE_SIZE),
+        "get_last_message_id": lambda s: database.get_last_message_id(s.code),
+        "get_last_message_id_by_group_id": lambda s: database.get_last_message_id_by_group_id(s.group_id),
+        "get_message_count": lambda s: database.get_message_count(s.code, s.first_id),
+        "get_message_count_by_group_id": lambda s: database.get_message_count_by_group_id(s.group_id, s.first_id),
+        "get_last_tombstone_id": lambda s: database.get_last_tombstone_id(s.code),
+        "get_last_tombstone_id_by_group_id": lambda s: database.get_last_tombstone_id_by_group_id(s.group_id),
+        "get_message_changes": lambda s: database.get_message_changes(
+            s.code, s.last_id - 5, s.last_tombstone_id),
+        "get_message_changes_by_group_id": lambda s: database.get_message_changes_by_group_id(
+            s.group_id, s.last_id - 5, s.last_tombstone_id),
+        "get_conversation_state": lambda s: database.get_conversation_state(s.code, s.first_id),
+        "get_conversation_state_by_group_id": lambda s: database.get_conversation_state_by_group_id(
+            s.group_id, s.first_id),
+        "get_group_users": lambda s: database.get_group_users(s.code, s.user),
+        "get_group_users_by_group_id": lambda s: database.get_group_users_by_group_id(s.group_id, s.user),
+        "get_private_messages": lambda s: database.get_private_messages(
+            s.code, s.user, s.other, limit=PAGE_SIZE),
+        "get_private_messages_by_group_id": lambda s: database.get_private_messages_by_group_id(
+            s.group_id, s.user, s.other, limit=PAGE_SIZE),
+        "get_private_message_count": lambda s: database.get_private_message_count(s.code, s.user, s.other),
+        "get_private_message_count_by_group_id": lambda s: database.get_private_message_count_by_group_id(
+            s.group_id, s.user, s.other),
+        "get_private_conversation_state": lambda s: database.get_private_conversation_state(
+            s.code, s.user, s.other),
+        "get_private_conversation_state_by_group_id": (
+            lambda s: database.get_private_conversation_state_by_group_id(s.group_id, s.user, s.other)),
+    }
+
+
+def writer_calls(batch_size, run_id):
+    """Функции записи в порядке выполнения: имя -> (строк за вызов, вызов(номер, Sample, результаты)
+    [, подготовка(номер, Sample) без замера]).
+
+    Удаления выполняются после записей и удаляют строки, созданные ими с тем же номером
+    вызова (результаты[имя функции записи][номер])."""
+    def new_code(i):
+        return f"b{run_id}_{i}"
+
+    return {
+        "create_group": (1, lambda i, s, r: database.create_group("bench", new_code(i), "creator", "pw")),
+        "add_user_to_group": (1, lambda i, s, r: database.add_user_to_group(f"bench{run_id}_{i}", "pw", s.code)),
+        "remove_group_member": (1, lambda i, s, r: database.remove_group_member(s.code, f"bench{run_id}_{i}")),
+        # Группу с участниками не дает удалить внешний ключ users, поэтому создателя
+        # исключаем до замера
+        "delete_group": (1, lambda i, s, r: database.delete_group(new_code(i)),
+                         lambda i, s: database.remove_group_member(new_code(i), "creator")),
+        "save_note": (1, lambda i, s, r: database.save_note(s.code, "bench", s.user)),
+        "save_note_by_group_id": (1, lambda i, s, r: database.save_note_by_group_id(s.group_id, "bench", s.user)),
+        "save_notes": (batch_size, lambda i, s, r: database.save_notes(s.code, [("bench", s.user)] * batch_size)),
+        "save_notes_by_group_id": (batch_size, lambda i, s, r: database.save_notes_by_group_id(
+            s.group_id, [("bench", s.user)] * batch_size)),
+        "delete_own_note": (1, lambda i, s, r: database.delete_own_note(s.code, r["save_note"][i], s.user)),
+        "delete_note": (1, lambda i, s, r: database.delete_note(r["save_note_by_group_id"][i])),
+        "save_task": (1, lambda i, s, r: database.save_task(s.code, "bench", "", "01.01.2030", s.user)),
+        "save_task_by_group_id": (1, lambda i, s, r: database.save_task_by_group_id(
+            s.group_id, "bench", "", "01.01.2030", s.user)),
+        "save_tasks": (batch_size, lambda i, s, r: database.save_tasks(
+            s.code, [("bench", "", "01.01.2030", s.user)] * batch_size)),
+        "save_tasks_by_group_id": (batch_size, lambda i, s, r: database.save_tasks_by_group_id(
+            s.group_id, [("bench", "", "01.01.2030", s.user)] * batch_size)),
+        "delete_own_task": (1, lambda i, s, r: database.delete_own_task(s.code, r["save_task"][i], s.user)),
+        "delete_task": (1, lambda i, s, r: database.delete_task(r["save_task_by_group_id"][i])),
+        "save_message": (1, lambda i, s, r: database.save_message(s.code, s.user, "bench")),
+        "save_message_by_group_id": (1, lambda i, s, r: database.save_message_by_group_id(
+            s.group_id, s.user, "bench")),
+        "save_messages": (batch_size, lambda i, s, r: database.save_messages(
+            s.code, [(s.user, "bench")] * batch_size)),
+        "save_messages_by_group_id": (batch_size, lambda i, s, r: database.save_messages_by_group_id(
+            s.group_id, [(s.user, "bench")] * batch_size)),
+        "delete_own_message": (1, lambda i, s, r: database.delete_own_message(s.code, r["save_message"][i], s.user)),
+        "delete_message": (1, lambda i, s, r: database.delete_message(r["save_message_by_group_id"][i])),
+        "save_private_message": (1, lambda i, s, r: database.save_private_message(
+            s.code, s.user, s.other, "bench")),
+        "save_private_message_by_group_id": (1, lambda i, s, r: database.save_private_message_by_group_id(
+            s.group_id, s.user, s.other, "bench")),
+        "delete_own_private_message": (1, lambda i, s, r: database.delete_own_private_message(
+            s.code, r["save_private_message"][i], s.user)),
+        "delete_private_message": (1, lambda i, s, r: database.delete_private_message(
+            r["save_private_message_by_group_id"][i])),
+    }
+
+
+def percentiles(timings):
+    """p50/p95/p99 и среднее время вызова в миллисекундах."""
+    cuts = statistics.quantiles([t * 1000 for t in timings], n=100, method="inclusive")
+    return {"p50_ms": cuts[49], "p95_ms": cuts[94], "p99_ms": cuts[98],
+            "mean_ms": statistics.mean(timings) * 1000, "calls": len(timings)}
+
+
+def measure_readers(samples):
+    results = {}
+    for name, call in reader_calls().items():
+        call(samples[0])  # подготовка запроса на соединении не входит в замер
+        timings = []
+        for sample in samples:
+            start = time.perf_counter()
+            call(sample)
+            timings.append(time.perf_counter() - start)
+        results[name] = percentiles(timings)
+        print_row(name, results[name])
+    return results
+
+
+def measure_writers(samples, batch_size, run_id):
+    results = {}
+    returned = {}
+    for name, (rows, call, *prepare) in writer_calls(batch_size, run_id).items():
+        timings = []
+        returned[name] = []
+        for i, sample in enumerate(samples):
+            if prepare:
+                prepare[0](i, sample)
+            start = time.perf_counter()
+            returned[name].append(call(i, sample, returned))
+            timings.append(time.perf_counter() - start)
+        results[name] = percentiles(timings)
+        results[name]["rows_per_s"] = rows * len(timings) / sum(timings)
+        print_row(name, results[name])
+    return results
+
+
+def print_row(name, result):
+    rows = f"{result['rows_per_s']:>12.0f}" if "rows_per_s" in result else ""
+    print(f"{name:44} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f}{rows}")
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current, max_regression):
+    """Выводит изменение p95 (и строк в секунду) относительно прежних результатов.
+    Возвращает функции, p95 которых вырос больше чем на max_regression процентов."""
+    print(f"\nСравнение с {previous.get('commit')} ({previous.get('created_at')}):")
+    print(f"{'функция':44} {'p95 было':>9} {'стало':>9} {'изм., %':>9} {'строк/с, %':>12}")
+    regressions = []
+    for section in ("readers", "writers"):
+        for name, result in current[section].items():
+            old = previous.get(section, {}).get(name)
+            if old is None:
+                continue
+            change = (result["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            rows = ""
+            if "rows_per_s" in result:
+                rows = f"{(result['rows_per_s'] - old['rows_per_s']) / old['rows_per_s'] * 100:>+12.1f}"
+            print(f"{name:44} {old['p95_ms']:>9.3f} {result['p95_ms']:>9.3f} {change:>+9.1f}{rows}")
+            if max_regression is not None and change > max_regression:
+                regressions.append(f"{name}: p95 {old['p95_ms']:.3f} -> {result['p95_ms']:.3f} мс")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры времени функций database.py")
+    parser.add_argument("--database", default="grouptasker_bench", help="база для замеров (будет пересоздана)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for option in SCALES["small"]:
+        parser.add_argument(f"--{option.replace('_', '-')}", type=int, help="изменить параметр масштаба")
+    parser.add_argument("--skip-seed", action="store_true", help="не пересоздавать и не заполнять базу")
+    parser.add_argument("--iterations", type=int, default=200, help="вызовов каждой функции")
+    parser.add_argument("--batch-size", type=int, default=100, help="строк в одном вызове save_notes и т.п.")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--output", help="файл результатов (по умолчанию benchmarks/results/<коммит>-<масштаб>.json)")
+    parser.add_argument("--compare", help="результаты другого коммита для сравнения")
+    parser.add_argument("--max-regression", type=float,
+                        help="завершиться с ошибкой, если p95 какой-либо функции вырос больше, чем на столько процентов")
+    args = parser.parse_args()
+    if args.iterations < 2:
+        parser.error("--iterations должно быть не меньше 2")
+
+    scale = dict(SCALES[args.scale])
+    for option in scale:
+        if getattr(args, option) is not None:
+            scale[option] = getattr(args, option)
+    if scale["users_per_group"] < 2:
+        parser.error("нужно хотя бы два пользователя в группе")
+
+    if not args.skip_seed:
+        create_database(args.database)
+    database.configure_pool(dbname=args.database)
+    migrate_up()
+    if not args.skip_seed:
+        start = time.perf_counter()
+        counts = seed(random_seed=args.random_seed, **scale)
+        print("Заполнено за", f"{time.perf_counter() - start:.1f} с:",
+              ", ".join(f"{table}={rows}" for table, rows in counts.items()))
+
+    samples = make_samples(scale, args.iterations, args.random_seed)
+    print(f"\n{'функция':44} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'строк/с':>12}")
+    readers = measure_readers(samples)
+    writers = measure_writers(samples, args.batch_size, int(time.time()))
+
+    missing = sorted(set(database_helpers()) - set(readers) - set(writers))
+    if missing:
+        print("\nНет замеров для:", ", ".join(missing))
+
+    commit = current_commit()
+    results = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "database": args.database,
+        "scale": scale,
+        "table_rows": table_sizes(),
+        "iterations": args.iterations,
+        "batch_size": args.batch_size,
+        "random_seed": args.random_seed,
+        "readers": readers,
+        "writers": writers,
+    }
+    database.close_pool()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'unknown'}-{args.scale}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+    print("\nРезультаты сохранены в", output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(json.load(file), results, args.max_regression)
+        if regressions:
+            print("\nЗамедления:")
+            for regression in regressions:
+                print(" -", regression)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Замер создания карточек заметок и задач: стили у каждого виджета или общая тема.
+
+Раньше каждая карточка и каждый ее виджет вызывали setStyleSheet со своей таблицей
+стилей (режим inline ниже повторяет этот код). Теперь оформление задано один раз
+в theme.py, а виджеты получают только objectName (режим theme — настоящие
+NoteBoard.add_note_to_board и TaskBoard.add_task_to_board). Для каждого режима
+выводится время создания --count карточек и их первого показа (применение стилей и
+компоновка).
+
+Запуск: QT_QPA_PLATFORM=offscreen python -m benchmarks.widget_styles [--count 5000] [--repeat 3]
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from PyQt6.QtCore import QCoreApplication, QDate, Qt
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (QApplication, QFrame, QHBoxLayout, QLabel, QPushButton, QScrollArea,
+                             QVBoxLayout, QWidget)
+
+import theme
+from note_board import NoteBoard
+from task_board import TaskBoard
+
+BOARD_STYLE = "border: 2px solid #5F7470; background-color: transparent; border-radius: 15px;"
+CARD_STYLE = "background-color: #E0E2DB; border-radius: 10px; padding: %s;"
+DELETE_BUTTON_STYLE = """
+    QPushButton { background-color: #FF6961; color: white; border-radius: 5px; padding: 5px; }
+    QPushButton:hover { background-color: #D9534F; }
+"""
+TIME_LEFT_COLORS = {"future": "#5F7470", "today": "#FFA500", "overdue": "#FF6961"}
+
+
+class _MainWindowStub:
+    """Главное окно для вкладок без базы данных: данные вкладкам передает сам замер."""
+
+    def hydrate(self, tab, load):
+        pass
+
+
+def inline_board():
+    """Доска в прежнем виде: стиль без селектора у рамки и у области прокрутки."""
+    board = QFrame()
+    board.setStyleSheet(BOARD_STYLE)
+    scroll_area = QScrollArea(board)
+    scroll_area.setWidgetResizable(True)
+    scroll_area.setStyleSheet("border: none;")
+    container = QWidget()
+    layout = QVBoxLayout(container)
+    layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+    scroll_area.setWidget(container)
+    board.resize(1000, 900)
+    scroll_area.resize(1000, 900)
+    return board, layout
+
+
+def inline_note(layout, text, user_name, own):
+    note_frame = QFrame()
+    note_frame.setStyleSheet(CARD_STYLE % "10px")
+    note_frame.setFixedWidth(950)
+    note_layout = QVBoxLayout(note_frame)
+
+    note_text = QLabel(text)
+    note_text.setFont(QFont("Inter", 20))
+    note_text.setStyleSheet("color: #003C30;")
+    note_text.setWordWrap(True)
+    user_label = QLabel(f"Автор: {user_name}")
+    user_label.setFont(QFont("Inter", 12))
+    user_label.setStyleSheet("color: #5F7470; font-style: italic;")
+    user_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+
+    text_button_layout = QHBoxLayout()
+    text_button_layout.addWidget(note_text)
+    if own:
+        btn_delete = QPushButton("❌")
+        btn_delete.setStyleSheet(DELETE_BUTTON_STYLE)
+        btn_delete.setFixedSize(40, 40)
+        text_button_layout.addWidget(btn_delete)
+    note_layout.addLayout(text_button_layout)
+    note_layout.addWidget(user_label)
+    layout.insertWidget(0, note_frame)
+
+
+def inline_task(layout, title, description, deadline):
+    task_frame = QFrame()
+    task_frame.setStyleSheet(CARD_STYLE % "15px")
+    task_frame.setFixedWidth(950)
+    task_layout = QVBoxLayout(task_frame)
+
+    title_label = QLabel(title)
+    title_label.setFont(QFont("Inter", 20, QFont.Weight.Bold))
+    title_label.setStyleSheet("color: #003C30;")
+    title_label.setWordWrap(True)
+    task_layout.addWidget(title_label)
+    description_label = QLabel(description)
+    description_label.setFont(QFont("Inter", 16))
+    description_label.setStyleSheet("color: #003C30;")
+    description_label.setWordWrap(True)
+    task_layout.addWidget(description_label)
+
+    footer_layout = QHBoxLayout()
+    deadline_str = deadline.strftime("%d.%m.%Y")
+    deadline_label = QLabel(f"Дедлайн: {deadline_str}")
+    deadline_label.setFont(QFont("Inter", 12))
+    deadline_label.setStyleSheet("color: #5F7470;")
+    footer_layout.addWidget(deadline_label)
+    footer_layout.addStretch()
+
+    days_left = QDate.currentDate().daysTo(QDate.fromString(deadline_str, "dd.MM.yyyy"))
+    state = "future" if days_left > 0 else "today" if days_left == 0 else "overdue"
+    time_left_label = QLabel(f"Осталось дней: {days_left}")
+    time_left_label.setFont(QFont("Inter", 12))
+    time_left_label.setStyleSheet(f"color: {TIME_LEFT_COLORS[state]}; font-style: italic;")
+    footer_layout.addWidget(time_left_label)
+
+    btn_delete = QPushButton("❌")
+    btn_delete.setStyleSheet(DELETE_BUTTON_STYLE)
+    btn_delete.setFixedSize(40, 40)
+    footer_layout.addWidget(btn_delete)
+    task_layout.addLayout(footer_layout)
+    layout.addWidget(task_frame)
+
+
+def note_rows(count):
+    return [(note_id, f"Заметка {note_id}", f"user{note_id % 5}") for note_id in range(count)]
+
+
+def task_rows(count):
+    today = date.today()
+    return [(task_id, f"Задача {task_id}", "Описание задачи", today + timedelta(days=task_id % 30 - 5), "user0")
+            for task_id in range(count)]
+
+
+def settle():
+    """Показ добавленных карточек: применение стилей и компоновка."""
+    for _ in range(3):
+        QCoreApplication.processEvents()
+
+
+def measure(build):
+    """build() создает карточки и возвращает корневой виджет. Время: (создание, показ), сек."""
+    start = time.perf_counter()
+    root = build()
+    created = time.perf_counter()
+    root.show()
+    settle()
+    shown = time.perf_counter()
+    root.close()
+    root.deleteLater()
+    settle()
+    return created - start, shown - created
+
+
+def run(app, mode, kind, count):
+    if mode == "theme":
+        theme.apply(app)
+    else:
+        app.setStyleSheet("")
+
+    def build():
+        if mode == "theme":
+            board_class = NoteBoard if kind == "notes" else TaskBoard
+            board = board_class("bench", "user0", _MainWindowStub())
+            if kind == "notes":
+                for note_id, text, user_name in note_rows(count):
+                    board.add_note_to_board(note_id, text, user_name)
+            else:
+                for row in task_rows(count):
+                    board.add_task_to_board(*row)
+            return board
+
+        board, layout = inline_board()
+        if kind == "notes":
+            for note_id, text, user_name in note_rows(count):
+                inline_note(layout, text, user_name, user_name == "user0")
+        else:
+            for task_id, title, description, deadline, user_name in task_rows(count):
+                inline_task(layout, title, description, deadline)
+        return board
+
+    return measure(build)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Создание карточек со стилями у виджетов и с общей темой")
+    parser.add_argument("--count", type=int, default=5000, help="карточек за один замер")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов, берется лучший")
+    args = parser.parse_args()
+
+    app = QApplication([])
+    print(f"{'карточки':10} {'режим':8} {'создание, мс':>13} {'показ, мс':>10} {'всего, мс':>10}")
+    for kind in ("notes", "tasks"):
+        totals = {}
+        for mode in ("inline", "theme"):
+            created, shown = min((run(app, mode, kind, args.count) for _ in range(args.repeat)), key=sum)
+            totals[mode] = created + shown
+            print(f"{kind:10} {mode:8} {created * 1000:>13.1f} {shown * 1000:>10.1f} {totals[mode] * 1000:>10.1f}")
+        print(f"{kind:10} {'':8} быстрее в {totals['inline'] / totals['theme']:.1f} раза")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import json
+
+import psycopg2
+from psycopg2 import extensions, sql
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+
+from database import connection_params
+from db_worker import get_executor
+
+RECONNECT_DELAY = 5000  # мс
+
+
+def change_channel(group_code):
+    """Канал уведомлений об изменениях группы (см. триггеры notify_change в README)."""
+    return f"grouptasker_{group_code}"
+
+
+class ChangeListener(QObject):
+    """Слушает уведомления PostgreSQL (LISTEN/NOTIFY) об изменениях группы.
+
+    Использует отдельное соединение вне пула: его сокет отслеживается через
+    QSocketNotifier, поэтому уведомления обрабатываются в цикле событий Qt без
+    опроса базы. Подключение и LISTEN выполняются в фоновом потоке (db_worker):
+    пока база недоступна, попытки подключиться не останавливают интерфейс.
+    """
+
+    changed = pyqtSignal(str, str, int, object)  # таблица, операция, ID строки, данные
+    active_changed = pyqtSignal(bool)
+
+    def __init__(self, group_code, parent=None):
+        super().__init__(parent)
+        self.group_code = group_code
+        self.conn = None
+        self.notifier = None
+        self._stopped = False
+        self._connecting = False
+
+    @property
+    def is_active(self):
+        return self.conn is not None and not self.conn.closed
+
+    def start(self):
+        """Подключается к базе и подписывается на канал группы (в фоновом потоке)."""
+        self._stopped = False
+        if self._connecting or self.is_active:
+            return
+        self._connecting = True
+        get_executor().submit(self._connect, key=(self, "connect"), owner=self,
+                              on_result=self._on_connected, on_error=self._on_connect_failed)
+
+    def _connect(self):
+        # Выполняется в фоновом потоке
+        conn = psycopg2.connect(**connection_params())
+        try:
+            conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(sql.SQL("LISTEN {};").format(
+                    sql.Identifier(change_channel(self.group_code))))
+        except psycopg2.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _on_connected(self, conn):
+        self._connecting = False
+        # Пока шло подключение, слушатель могли остановить
+        if self._stopped:
+            conn.close()
+            return
+
+        self.conn = conn
+        self.notifier = QSocketNotifier(self.conn.fileno(), QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self._on_activated)
+        self.active_changed.emit(True)
+
+    def _on_connect_failed(self, error):
+        self._connecting = False
+        print(f"Ошибка при подписке на изменения: {error}")
+        self._schedule_reconnect()
+
+    def stop(self):
+        """Отписывается от уведомлений и закрывает соединение."""
+        self._stopped = True
+        was_active = self.is_active
+        self._close_connection()
+        if was_active:
+            self.active_changed.emit(False)
+
+    def _on_activated(self, *args):
+        try:
+            self.conn.poll()
+        except psycopg2.Error as e:
+            print(f"Соединение для уведомлений потеряно: {e}")
+            self._close_connection()
+            self.active_changed.emit(False)
+            self._schedule_reconnect()
+            return
+
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            try:
+                payload = json.loads(notify.payload)
+            except ValueError:
+                continue
+            if payload.get("group_code") != self.group_code:
+                continue
+            self.changed.emit(payload.get("table", ""), payload.get("op", ""),
+                              int(payload.get("id") or 0), payload)
+
+    def _schedule_reconnect(self):
+        if not self._stopped:
+            QTimer.singleShot(RECONNECT_DELAY, self._reconnect)
+
+    def _reconnect(self):
+        if not self._stopped and not self.is_active:
+            self.start()
+
+    def _close_connection(self):
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier.deleteLater()
+            self.notifier = None
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except psycopg2.Error:
+                pass
+            self.conn = None
@@ -1,33 +1,214 @@
+import inspect
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+
 import psycopg2
 from psycopg2.extras import DictCursor
 
+import db_stats
+import queries
+from db_pool import ConnectionPool
+
 # Подключение к базе данных
-DB_NAME = "grouptasker"
-DB_USER = "postgres"
-DB_PASSWORD = "123456"
-DB_HOST = "localhost"
+DB_NAME = os.environ.get("GROUPTASKER_DB_NAME", "grouptasker")
+DB_USER = os.environ.get("GROUPTASKER_DB_USER", "postgres")
+DB_PASSWORD = os.environ.get("GROUPTASKER_DB_PASSWORD", "123456")
+DB_HOST = os.environ.get("GROUPTASKER_DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("GROUPTASKER_DB_PORT", "5432"))
+
+# Настройки пула соединений
+DB_POOL_MIN_SIZE = int(os.environ.get("GROUPTASKER_DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.environ.get("GROUPTASKER_DB_POOL_MAX_SIZE", "5"))
+DB_POOL_MAX_IDLE = float(os.environ.get("GROUPTASKER_DB_POOL_MAX_IDLE", "300"))  # сек
+DB_POOL_HEALTH_CHECK = float(os.environ.get("GROUPTASKER_DB_POOL_HEALTH_CHECK", "30"))  # сек
+DB_POOL_TIMEOUT = float(os.environ.get("GROUPTASKER_DB_POOL_TIMEOUT", "10"))  # сек
+
+# Выполнять запросы как именованные подготовленные (отключается, например, для pgbouncer
+# в режиме транзакций, где соединение сервера меняется между транзакциями)
+USE_PREPARED_STATEMENTS = os.environ.get("GROUPTASKER_DB_PREPARED_STATEMENTS", "1") != "0"
+
+# Верхняя граница ID (SERIAL) для запросов без ограничения сверху
+MAX_ID = 2147483647
+
+# Результаты удаления с проверкой автора (delete_own_*)
+DELETED, NOT_OWNER, NOT_FOUND = queries.DELETED, queries.NOT_OWNER, queries.NOT_FOUND
+
+_pool = None
+_pool_lock = threading.RLock()
+
+# Соединение -> имена запросов, уже подготовленных на нем
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+# Кэш ID групп по коду: код группы не меняется, поэтому ID достаточно узнать один раз
+_group_ids = {}
+_group_ids_lock = threading.Lock()
+
+
+def connection_params():
+    """Возвращает параметры подключения к базе данных."""
+    return {
+        "dbname": DB_NAME,
+        "user": DB_USER,
+        "password": DB_PASSWORD,
+        "host": DB_HOST,
+        "port": DB_PORT,
+    }
+
+
+def configure_pool(**options):
+    """Пересоздает пул соединений с указанными настройками (min_size, max_size,
+    max_idle, health_check_interval, acquire_timeout и параметры подключения)."""
+    global _pool
+    settings = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "max_idle": DB_POOL_MAX_IDLE,
+        "health_check_interval": DB_POOL_HEALTH_CHECK,
+        "acquire_timeout": DB_POOL_TIMEOUT,
+        **connection_params(),
+    }
+    settings.update(options)
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(**settings)
+        # В другой базе у групп другие ID
+        forget_group_id()
+        return _pool
+
+
+def get_pool():
+    """Возвращает общий пул соединений, создавая его при первом обращении."""
+    with _pool_lock:
+        if _pool is None:
+            configure_pool()
+        return _pool
+
+
+def close_pool():
+    """Закрывает все соединения пула (например, при выходе из приложения)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def get_connection():
+    """Берет соединение из пула.
+
+    Используется как контекстный менеджер: при выходе транзакция фиксируется
+    (или откатывается при ошибке), а соединение возвращается в пул.
+    """
+    start = time.perf_counter()
+    with get_pool().connection() as conn:
+        db_stats.record_acquire(time.perf_counter() - start)
+        yield conn
+
+
+def _execute(cursor, query, params=()):
+    """Выполняет запрос как именованный подготовленный: на каждом соединении он
+    разбирается и планируется один раз, а дальше выполняется по имени."""
+    start = time.perf_counter()
+    try:
+        _execute_statement(cursor, query, params)
+    finally:
+        db_stats.record_query(query, params, time.perf_counter() - start, cursor.rowcount)
+
+
+def _execute_statement(cursor, query, params):
+    if not USE_PREPARED_STATEMENTS:
+        cursor.execute(query, params)
+        return
+
+    name, text, count = queries.statement(query)
+    with _prepared_lock:
+        prepared = _prepared.setdefault(cursor.connection, set())
+    # Соединение в каждый момент используется одним потоком
+    if name not in prepared:
+        # PREPARE не отменяется откатом транзакции, поэтому запоминаем его сразу
+        cursor.execute(f"PREPARE {name} AS {text};")
+        prepared.add(name)
+    if count:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * count)});", params)
+    else:
+        cursor.execute(f"EXECUTE {name};")
+
+
+def resolve_group_id(group_code):
+    """Возвращает ID группы по коду (None, если группы нет). Найденный ID кэшируется."""
+    with _group_ids_lock:
+        group_id = _group_ids.get(group_code)
+    if group_id is not None:
+        return group_id
 
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            _execute(cursor, queries.GROUP_ID_BY_CODE, (group_code,))
+            group = cursor.fetchone()
+    if not group:
+        return None
 
-def get_connection():
-    """Создает и возвращает соединение с базой данных."""
-    return psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST
-    )
+    with _group_ids_lock:
+        _group_ids[group_code] = group[0]
+    return group[0]
+
+
+def forget_group_id(group_code=None):
+    """Удаляет ID группы из кэша (без аргумента — очищает весь кэш)."""
+    with _group_ids_lock:
+        if group_code is None:
+            _group_ids.clear()
+        else:
+            _group_ids.pop(group_code, None)
+
+
+def _write_for_group(group_code, func, *args):
+    """Вызывает запись func(group_id, *args). Если группа была пересоздана с тем же кодом
+    и кэш устарел, запись нарушит внешний ключ — тогда ID запрашивается заново."""
+    try:
+        return func(_require_group_id(group_code), *args)
+    except psycopg2.errors.ForeignKeyViolation:
+        forget_group_id(group_code)
+        return func(_require_group_id(group_code), *args)
+
+
+def _require_group_id(group_code):
+    group_id = resolve_group_id(group_code)
+    if group_id is None:
+        raise ValueError(f"Группа с кодом {group_code} не найдена")
+    return group_id
+
+
+def _delete_own(table, owner_column, group_code, row_id, user_name):
+    """Удаляет строку группы group_code, только если ее автор — user_name. Проверка и удаление
+    выполняются одним запросом, поэтому между ними строку не может изменить другой клиент."""
+    group_id = resolve_group_id(group_code)
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            _execute(cursor, queries.delete_own(table, owner_column),
+                     (row_id, group_id, user_name, row_id, group_id))
+            result = queries.delete_result(cursor.fetchone())
+            conn.commit()
+            return result
 
 
 def create_group(name, code, creator_name, creator_password):
     """Создает новую группу в базе данных и добавляет создателя в таблицу пользователей."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("INSERT INTO groups (name, code) VALUES (%s, %s) RETURNING id;", (name, code))
+            _execute(cursor, queries.INSERT_GROUP, (name, code))
             group_id = cursor.fetchone()[0]
 
             # Добавляем создателя группы в users
-            cursor.execute("INSERT INTO users (name, password, group_id) VALUES (%s, %s, %s);",
-                           (creator_name, creator_password, group_id))
+            _execute(cursor, queries.INSERT_USER, (creator_name, creator_password, group_id))
 
             conn.commit()
             return group_id
@@ -37,7 +218,7 @@ def check_group_exists(group_code):
     """Проверяет, существует ли группа с данным кодом."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("SELECT id FROM groups WHERE code = %s;", (group_code,))
+            _execute(cursor, queries.GROUP_ID_BY_CODE, (group_code,))
             group = cursor.fetchone()
             return group is not None
 
@@ -46,58 +227,70 @@ def check_user_exists(name, password, group_code):
     """Проверяет, существует ли пользователь в группе."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT u.id FROM users u
-                JOIN groups g ON u.group_id = g.id
-                WHERE u.name = %s AND u.password = %s AND g.code = %s;
-            """, (name, password, group_code))
+            _execute(cursor, queries.USER_BY_PASSWORD, (name, password, group_code))
             user = cursor.fetchone()
             return user is not None
 
 
 def add_user_to_group(name, password, group_code):
     """Добавляет пользователя в группу, если код группы существует."""
-    with get_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cursor:
-            # Получаем ID группы
-            cursor.execute("SELECT id FROM groups WHERE code = %s;", (group_code,))
-            group = cursor.fetchone()
+    if resolve_group_id(group_code) is None:
+        return None
+    return _write_for_group(group_code, _add_user, name, password)
 
-            if not group:
-                return None
 
-            group_id = group["id"]
-            cursor.execute("INSERT INTO users (name, password, group_id) VALUES (%s, %s, %s);",
-                           (name, password, group_id))
+def _add_user(group_id, name, password):
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            _execute(cursor, queries.INSERT_USER, (name, password, group_id))
             conn.commit()
             return True
 
 
 def save_note(group_code, text, user_name):
     """Сохраняет заметку в базу данных и возвращает её ID."""
+    return _write_for_group(group_code, save_note_by_group_id, text, user_name)
+
+
+def save_note_by_group_id(group_id, text, user_name):
+    """Сохраняет заметку группы с известным ID и возвращает её ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            # Получаем ID группы по коду
-            cursor.execute("SELECT id FROM groups WHERE code = %s;", (group_code,))
-            group_id = cursor.fetchone()[0]
-
-            cursor.execute("INSERT INTO notes (group_id, text, user_name) VALUES (%s, %s, %s) RETURNING id;",
-                           (group_id, text, user_name))
+            _execute(cursor, queries.INSERT_NOTE, (group_id, text, user_name))
             note_id = cursor.fetchone()[0]
             conn.commit()
             return note_id
 
 
+def save_notes(group_code, notes):
+    """Сохраняет несколько заметок [(текст, автор), ...] одним запросом в одной
+    транзакции и возвращает их ID в том же порядке."""
+    return _write_for_group(group_code, save_notes_by_group_id, notes)
+
+
+def save_notes_by_group_id(group_id, notes):
+    """То же, что save_notes, для группы с известным ID."""
+    if not notes:
+        return []
+    texts, user_names = zip(*notes)
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            _execute(cursor, queries.INSERT_NOTES, (group_id, list(texts), list(user_names)))
+            note_ids = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            return note_ids
+
+
 def get_notes(group_code):
     """Получает все заметки для группы."""
+    return get_notes_by_group_id(resolve_group_id(group_code))
+
+
+def get_notes_by_group_id(group_id):
+    """Получает все заметки группы с известным ID."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT n.id, n.text, n.user_name FROM notes n
-                JOIN groups g ON n.group_id = g.id
-                WHERE g.code = %s
-                ORDER BY n.created_at DESC;
-            """, (group_code,))
+            _execute(cursor, queries.NOTES, (group_id,))
             return [(note['id'], note['text'], note['user_name']) for note in cursor.fetchall()]
 
 
@@ -105,54 +298,124 @@ def delete_note(note_id):
     """Удаляет заметку по ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM notes WHERE id = %s;", (note_id,))
+            _execute(cursor, queries.DELETE_NOTE, (note_id,))
             conn.commit()
 
 
+def delete_own_note(group_code, note_id, user_name):
+    """Удаляет заметку группы, если ее автор — user_name. Возвращает DELETED, NOT_OWNER или NOT_FOUND."""
+    return _delete_own("notes", "user_name", group_code, note_id, user_name)
+
+
 def get_group_code(group_id):
     """Получает код группы по ID."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("SELECT code FROM groups WHERE id = %s;", (group_id,))
+            _execute(cursor, queries.GROUP_CODE_BY_ID, (group_id,))
             group = cursor.fetchone()
             return group['code'] if group else None
 
 
 def delete_group(group_code):
     """Удаляет группу по коду."""
+    forget_group_id(group_code)
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            _execute(cursor, queries.DELETE_GROUP, (group_code,))
+            conn.commit()
+
+
+def get_group_overview(group_code):
+    """Возвращает (название группы, создатель, участники по алфавиту) одним запросом
+    или None, если группы нет. Создатель — первый добавленный пользователь группы."""
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            _execute(cursor, queries.GROUP_OVERVIEW, (group_code,))
+            group = cursor.fetchone()
+            return (group['name'], group['creator'], group['members']) if group else None
+
+
+def get_session_bootstrap(group_code, user_name, message_limit=50):
+    """Возвращает стартовые данные вкладок одним запросом или None, если группы нет.
+
+    Словарь: group — (название, создатель, участники) как в get_group_overview,
+    notes — как в get_notes, tasks — задачи пользователя как в get_tasks,
+    messages — message_limit последних сообщений как в get_messages(limit=...),
+    last_tombstone_id — как в get_last_tombstone_id.
+    """
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            _execute(cursor, queries.SESSION_BOOTSTRAP, (user_name, message_limit, group_code))
+            return session_bootstrap_from_row(cursor.fetchone())
+
+
+def session_bootstrap_from_row(row):
+    """Переводит строку queries.SESSION_BOOTSTRAP в результат get_session_bootstrap."""
+    if row is None:
+        return None
+    return {
+        "group": (row['name'], row['creator'], row['members']),
+        "notes": [tuple(note) for note in row['notes']],
+        "tasks": [tuple(task) for task in row['tasks']],
+        "messages": [(msg_id, name, message, datetime.fromisoformat(created_at))
+                     for msg_id, name, message, created_at in row['messages']],
+        "last_tombstone_id": row['last_tombstone_id'],
+    }
+
+
+def remove_group_member(group_code, user_name):
+    """Исключает пользователя из группы. Возвращает False, если его не было в группе."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM groups WHERE code = %s;", (group_code,))
+            _execute(cursor, queries.REMOVE_GROUP_MEMBER, (user_name, group_code))
             conn.commit()
+            return cursor.rowcount > 0
 
 
 def save_task(group_code, title, description, deadline, user_name):
     """Сохраняет задачу в базу данных и возвращает её ID."""
+    return _write_for_group(group_code, save_task_by_group_id, title, description, deadline, user_name)
+
+
+def save_task_by_group_id(group_id, title, description, deadline, user_name):
+    """Сохраняет задачу группы с известным ID и возвращает её ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            # Получаем ID группы по коду
-            cursor.execute("SELECT id FROM groups WHERE code = %s;", (group_code,))
-            group_id = cursor.fetchone()[0]
-
-            cursor.execute("""
-                INSERT INTO tasks (group_id, title, description, deadline, user_name) 
-                VALUES (%s, %s, %s, %s, %s) RETURNING id;
-            """, (group_id, title, description, deadline, user_name))
+            _execute(cursor, queries.INSERT_TASK, (group_id, title, description, deadline, user_name))
             task_id = cursor.fetchone()[0]
             conn.commit()
             return task_id
 
 
+def save_tasks(group_code, tasks):
+    """Сохраняет несколько задач [(название, описание, дедлайн, пользователь), ...] одним
+    запросом в одной транзакции и возвращает их ID в том же порядке."""
+    return _write_for_group(group_code, save_tasks_by_group_id, tasks)
+
+
+def save_tasks_by_group_id(group_id, tasks):
+    """То же, что save_tasks, для группы с известным ID."""
+    if not tasks:
+        return []
+    titles, descriptions, deadlines, user_names = zip(*tasks)
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            _execute(cursor, queries.INSERT_TASKS, (group_id, list(titles), list(descriptions), list(deadlines), list(user_names)))
+            task_ids = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            return task_ids
+
+
 def get_tasks(group_code, user_name):
     """Получает все задачи для группы и пользователя."""
+    return get_tasks_by_group_id(resolve_group_id(group_code), user_name)
+
+
+def get_tasks_by_group_id(group_id, user_name):
+    """Получает все задачи пользователя в группе с известным ID."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT t.id, t.title, t.description, t.deadline, t.user_name FROM tasks t
-                JOIN groups g ON t.group_id = g.id
-                WHERE g.code = %s AND t.user_name = %s
-                ORDER BY t.deadline ASC;
-            """, (group_code, user_name))
+            _execute(cursor, queries.TASKS, (group_id, user_name))
             return [(task['id'], task['title'], task['description'],
                     task['deadline'], task['user_name']) for task in cursor.fetchall()]
 
@@ -161,160 +424,285 @@ def delete_task(task_id):
     """Удаляет задачу по ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM tasks WHERE id = %s;", (task_id,))
+            _execute(cursor, queries.DELETE_TASK, (task_id,))
             conn.commit()
 
 
+def delete_own_task(group_code, task_id, user_name):
+    """Удаляет задачу группы, если она принадлежит user_name. Возвращает DELETED, NOT_OWNER или NOT_FOUND."""
+    return _delete_own("tasks", "user_name", group_code, task_id, user_name)
+
+
 def save_message(group_code, user_name, message):
     """Сохраняет сообщение в чате."""
+    return _write_for_group(group_code, save_message_by_group_id, user_name, message)
+
+
+def save_message_by_group_id(group_id, user_name, message):
+    """Сохраняет сообщение в чате группы с известным ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            # Получаем ID группы по коду
-            cursor.execute("SELECT id FROM groups WHERE code = %s;", (group_code,))
-            group_id = cursor.fetchone()[0]
-
-            cursor.execute("""
-                INSERT INTO group_messages (group_id, user_name, message) 
-                VALUES (%s, %s, %s) RETURNING id;
-            """, (group_id, user_name, message))
+            _execute(cursor, queries.INSERT_MESSAGE, (group_id, user_name, message))
             message_id = cursor.fetchone()[0]
             conn.commit()
             return message_id
 
 
-def get_messages(group_code, last_message_id=0):
-    """Получает все сообщения для группы, начиная с указанного ID."""
+def save_messages(group_code, messages):
+    """Сохраняет несколько сообщений чата [(автор, текст), ...] (например, очередь,
+    накопленную без связи) одним запросом и возвращает их ID в том же порядке."""
+    return _write_for_group(group_code, save_messages_by_group_id, messages)
+
+
+def save_messages_by_group_id(group_id, messages):
+    """То же, что save_messages, для группы с известным ID."""
+    if not messages:
+        return []
+    user_names, texts = zip(*messages)
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            _execute(cursor, queries.INSERT_MESSAGES, (group_id, list(user_names), list(texts)))
+            message_ids = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            return message_ids
+
+
+def get_messages(group_code, last_message_id=0, before_id=None, limit=None):
+    """Получает все сообщения для группы, начиная с указанного ID.
+
+    Постраничная загрузка истории: before_id оставляет только сообщения с меньшим ID,
+    а limit — не больше limit самых новых из них. Сообщения всегда идут от старых к новым.
+    """
+    return get_messages_by_group_id(resolve_group_id(group_code), last_message_id, before_id, limit)
+
+
+def get_messages_by_group_id(group_id, last_message_id=0, before_id=None, limit=None):
+    """То же, что get_messages, для группы с известным ID."""
+    query = queries.messages(before_id is not None, limit is not None)
+    params = [group_id, last_message_id]
+    if before_id is not None:
+        params.append(before_id)
+    if limit is not None:
+        params.append(limit)
+
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT m.id, m.user_name, m.message, m.created_at FROM group_messages m
-                JOIN groups g ON m.group_id = g.id
-                WHERE g.code = %s AND m.id > %s
-                ORDER BY m.created_at ASC;
-            """, (group_code, last_message_id))
-            return [(msg['id'], msg['user_name'], msg['message'],
-                    msg['created_at']) for msg in cursor.fetchall()]
+            _execute(cursor, query, params)
+            messages = [(msg['id'], msg['user_name'], msg['message'],
+                        msg['created_at']) for msg in cursor.fetchall()]
+            if limit is not None:
+                messages.reverse()
+            return messages
 
 
 def delete_message(message_id):
     """Удаляет сообщение по ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM group_messages WHERE id = %s;", (message_id,))
+            _execute(cursor, queries.DELETE_MESSAGE, (message_id,))
             conn.commit()
 
 
+def delete_own_message(group_code, message_id, user_name):
+    """Удаляет сообщение чата группы, если его автор — user_name. Возвращает DELETED, NOT_OWNER или NOT_FOUND."""
+    return _delete_own("group_messages", "user_name", group_code, message_id, user_name)
+
+
 def get_last_message_id(group_code):
     """Возвращает ID последнего сообщения в группе."""
+    return get_last_message_id_by_group_id(resolve_group_id(group_code))
+
+
+def get_last_message_id_by_group_id(group_id):
+    """Возвращает ID последнего сообщения в группе с известным ID."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT MAX(m.id) as last_id FROM group_messages m
-                JOIN groups g ON m.group_id = g.id
-                WHERE g.code = %s;
-            """, (group_code,))
+            _execute(cursor, queries.LAST_MESSAGE_ID, (group_id,))
             result = cursor.fetchone()
             return result['last_id'] if result['last_id'] else 0
 
 
-def get_message_count(group_code):
-    """Возвращает количество сообщений в группе"""
+def get_message_count(group_code, first_message_id=0):
+    """Возвращает количество сообщений в группе (с ID не меньше first_message_id)"""
+    return get_message_count_by_group_id(resolve_group_id(group_code), first_message_id)
+
+
+def get_message_count_by_group_id(group_id, first_message_id=0):
+    """Возвращает количество сообщений в группе с известным ID (с ID не меньше first_message_id)"""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM group_messages m
-                JOIN groups g ON m.group_id = g.id
-                WHERE g.code = %s;
-            """, (group_code,))
+            _execute(cursor, queries.MESSAGE_COUNT, (group_id, first_message_id))
             result = cursor.fetchone()
             return result['count'] if result else 0
 
 
+def get_last_tombstone_id(group_code):
+    """Возвращает ID последней записи журнала удаленных сообщений группы."""
+    return get_last_tombstone_id_by_group_id(resolve_group_id(group_code))
+
+
+def get_last_tombstone_id_by_group_id(group_id):
+    """Возвращает ID последней записи журнала удаленных сообщений группы с известным ID."""
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            _execute(cursor, queries.LAST_TOMBSTONE_ID, (group_id,))
+            result = cursor.fetchone()
+            return result['last_id'] if result['last_id'] else 0
+
+
+def get_message_changes(group_code, last_message_id, last_tombstone_id):
+    """Возвращает изменения чата группы с момента последней синхронизации:
+    новые сообщения (ID больше last_message_id) и удаленные сообщения
+    (записи журнала с ID больше last_tombstone_id) в виде пар (tombstone_id, message_id)."""
+    return get_message_changes_by_group_id(resolve_group_id(group_code), last_message_id, last_tombstone_id)
+
+
+def get_message_changes_by_group_id(group_id, last_message_id, last_tombstone_id):
+    """То же, что get_message_changes, для группы с известным ID."""
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            _execute(cursor, queries.NEW_MESSAGES, (group_id, last_message_id))
+            messages = [(msg['id'], msg['user_name'], msg['message'],
+                         msg['created_at']) for msg in cursor.fetchall()]
+
+            _execute(cursor, queries.NEW_TOMBSTONES, (group_id, last_tombstone_id))
+            deleted = [(row['id'], row['message_id']) for row in cursor.fetchall()]
+
+            return messages, deleted
+
+
+def message_checksum(msg_id):
+    """Вклад сообщения в контрольную сумму состояния переписки."""
+    return (msg_id * queries.CHECKSUM_MULTIPLIER) % queries.CHECKSUM_MODULUS
+
+
+def get_conversation_state(group_code, first_message_id=0):
+    """Возвращает состояние чата группы одним запросом: (ID последнего сообщения,
+    количество сообщений, контрольная сумма их ID) — для сообщений с ID не меньше
+    first_message_id. Если состояние совпадает с локальным, сами сообщения загружать не нужно."""
+    return get_conversation_state_by_group_id(resolve_group_id(group_code), first_message_id)
+
+
+def get_conversation_state_by_group_id(group_id, first_message_id=0):
+    """То же, что get_conversation_state, для группы с известным ID."""
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            _execute(cursor, queries.CONVERSATION_STATE, (group_id, first_message_id))
+            result = cursor.fetchone()
+            return result['last_id'], result['count'], int(result['checksum'])
+
+
 def get_group_users(group_code, exclude_user=None):
     """Получает список пользователей группы, исключая указанного пользователя"""
+    return get_group_users_by_group_id(resolve_group_id(group_code), exclude_user)
+
+
+def get_group_users_by_group_id(group_id, exclude_user=None):
+    """Получает список пользователей группы с известным ID, исключая указанного пользователя"""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            query = """
-                SELECT u.name FROM users u
-                JOIN groups g ON u.group_id = g.id
-                WHERE g.code = %s
-            """
-            params = [group_code]
-
+            params = [group_id]
             if exclude_user:
-                query += " AND u.name != %s"
                 params.append(exclude_user)
-
-            query += " ORDER BY u.name;"
-
-            cursor.execute(query, params)
+            _execute(cursor, queries.group_users(exclude_user), params)
             return [user['name'] for user in cursor.fetchall()]
 
 
 def save_private_message(group_code, sender, receiver, message):
     """Сохраняет личное сообщение в базе данных."""
+    return _write_for_group(group_code, save_private_message_by_group_id, sender, receiver, message)
+
+
+def save_private_message_by_group_id(group_id, sender, receiver, message):
+    """Сохраняет личное сообщение в группе с известным ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            # Получаем ID группы по коду
-            cursor.execute("SELECT id FROM groups WHERE code = %s;", (group_code,))
-            group_id = cursor.fetchone()[0]
-
-            cursor.execute("""
-                INSERT INTO private_messages (group_id, sender, receiver, message) 
-                VALUES (%s, %s, %s, %s) RETURNING id;
-            """, (group_id, sender, receiver, message))
+            _execute(cursor, queries.INSERT_PRIVATE_MESSAGE, (group_id, sender, receiver, message))
             message_id = cursor.fetchone()[0]
             conn.commit()
             return message_id
 
 
-def get_private_messages(group_code, user1, user2):
-    """Получает личные сообщения между двумя пользователями."""
+def get_private_messages(group_code, user1, user2, last_message_id=0, before_id=None, limit=None):
+    """Получает личные сообщения между двумя пользователями, начиная с указанного ID.
+
+    Постраничная загрузка истории: before_id оставляет только сообщения с меньшим ID,
+    а limit — не больше limit самых новых из них. Сообщения всегда идут от старых к новым.
+    """
+    return get_private_messages_by_group_id(resolve_group_id(group_code), user1, user2,
+                                            last_message_id, before_id, limit)
+
+
+def get_private_messages_by_group_id(group_id, user1, user2, last_message_id=0, before_id=None, limit=None):
+    """То же, что get_private_messages, для группы с известным ID."""
+    before_id = before_id or MAX_ID
+    if limit is None:
+        query = queries.PRIVATE_MESSAGES
+        params = (group_id, last_message_id, before_id, user1, user2, user2, user1)
+    else:
+        # Каждое направление переписки читается по индексу с конца, без сортировки всей истории
+        query = queries.PRIVATE_MESSAGES_PAGE
+        params = (group_id, user1, user2, last_message_id, before_id, limit,
+                  group_id, user2, user1, last_message_id, before_id, limit, limit)
+
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT m.id, m.sender, m.receiver, m.message, m.created_at 
-                FROM private_messages m
-                JOIN groups g ON m.group_id = g.id
-                WHERE g.code = %s AND 
-                ((m.sender = %s AND m.receiver = %s) OR (m.sender = %s AND m.receiver = %s))
-                ORDER BY m.created_at ASC;
-            """, (group_code, user1, user2, user2, user1))
-            return [(msg['id'], msg['sender'], msg['receiver'],
-                     msg['message'], msg['created_at']) for msg in cursor.fetchall()]
+            _execute(cursor, query, params)
+            messages = [(msg['id'], msg['sender'], msg['receiver'],
+                         msg['message'], msg['created_at']) for msg in cursor.fetchall()]
+            if limit is not None:
+                messages.reverse()
+            return messages
 
 
 def delete_private_message(message_id):
     """Удаляет личное сообщение по ID."""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM private_messages WHERE id = %s;", (message_id,))
+            _execute(cursor, queries.DELETE_PRIVATE_MESSAGE, (message_id,))
             conn.commit()
 
 
-def get_private_message_count(group_code, user1, user2):
-    """Возвращает количество личных сообщений между пользователями."""
+def delete_own_private_message(group_code, message_id, user_name):
+    """Удаляет личное сообщение в группе, если его отправитель — user_name.
+    Возвращает DELETED, NOT_OWNER или NOT_FOUND."""
+    return _delete_own("private_messages", "sender", group_code, message_id, user_name)
+
+
+def get_private_message_count(group_code, user1, user2, first_message_id=0):
+    """Возвращает количество личных сообщений между пользователями (с ID не меньше first_message_id)."""
+    return get_private_message_count_by_group_id(resolve_group_id(group_code), user1, user2, first_message_id)
+
+
+def get_private_message_count_by_group_id(group_id, user1, user2, first_message_id=0):
+    """Возвращает количество личных сообщений между пользователями в группе с известным ID."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM private_messages m
-                JOIN groups g ON m.group_id = g.id
-                WHERE g.code = %s AND 
-                ((m.sender = %s AND m.receiver = %s) OR (m.sender = %s AND m.receiver = %s));
-            """, (group_code, user1, user2, user2, user1))
+            _execute(cursor, queries.PRIVATE_MESSAGE_COUNT, (group_id, first_message_id, user1, user2, user2, user1))
             result = cursor.fetchone()
             return result['count'] if result else 0
 
 
+def get_private_conversation_state(group_code, user1, user2, first_message_id=0):
+    """Возвращает состояние личной переписки одним запросом (см. get_conversation_state)."""
+    return get_private_conversation_state_by_group_id(resolve_group_id(group_code), user1, user2,
+                                                      first_message_id)
+
+
+def get_private_conversation_state_by_group_id(group_id, user1, user2, first_message_id=0):
+    """То же, что get_private_conversation_state, для группы с известным ID."""
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            _execute(cursor, queries.PRIVATE_CONVERSATION_STATE, (group_id, first_message_id, user1, user2, user2, user1))
+            result = cursor.fetchone()
+            return result['last_id'], result['count'], int(result['checksum'])
+
+
 def check_user_exists_in_group(name, group_code):
     """Проверяет, существует ли пользователь с таким именем в группе, без проверки пароля."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT u.id FROM users u
-                JOIN groups g ON u.group_id = g.id
-                WHERE u.name = %s AND g.code = %s;
-            """, (name, group_code))
+            _execute(cursor, queries.USER_IN_GROUP, (name, group_code))
             user = cursor.fetchone()
             return user is not None
 
@@ -323,11 +711,7 @@ def verify_user_password(name, password, group_code):
     """Проверяет, соответствует ли пароль пользователю в группе."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT u.id FROM users u
-                JOIN groups g ON u.group_id = g.id
-                WHERE u.name = %s AND u.password = %s AND g.code = %s;
-            """, (name, password, group_code))
+            _execute(cursor, queries.USER_BY_PASSWORD, (name, password, group_code))
             user = cursor.fetchone()
             return user is not None
 
@@ -336,21 +720,11 @@ def is_group_creator(user_name, group_code):
     """Проверяет, является ли пользователь создателем группы."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("""
-                SELECT u.id FROM users u
-                JOIN groups g ON u.group_id = g.id
-                WHERE g.code = %s
-                ORDER BY u.id LIMIT 1;
-            """, (group_code,))
+            _execute(cursor, queries.FIRST_GROUP_USER, (group_code,))
             first_user = cursor.fetchone()
 
             if first_user:
-                cursor.execute("""
-                    SELECT id FROM users 
-                    WHERE name = %s AND group_id = (
-                        SELECT id FROM groups WHERE code = %s
-                    );
-                """, (user_name, group_code))
+                _execute(cursor, queries.GROUP_USER_ID, (user_name, group_code))
                 current_user = cursor.fetchone()
 
                 return current_user and current_user['id'] == first_user['id']
@@ -361,6 +735,18 @@ def get_note_author(note_id):
     """Получает имя автора заметки по её ID."""
     with get_connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            cursor.execute("SELECT user_name FROM notes WHERE id = %s;", (note_id,))
+            _execute(cursor, queries.NOTE_AUTHOR, (note_id,))
             note = cursor.fetchone()
-            return note['user_name'] if note else None
\ No newline at end of file
+            return note['user_name'] if note else None
+
+
+# Функции, которые не выполняют запросов, статистику не собирают
+NOT_INSTRUMENTED = {"connection_params", "configure_pool", "get_pool", "close_pool", "get_connection",
+                    "forget_group_id", "message_checksum", "session_bootstrap_from_row"}
+
+# Статистика вызовов всех остальных функций (см. db_stats.py). Функции вызывают друг
+# друга через глобальные имена, поэтому вложенные вызовы тоже учитываются.
+for _name, _func in list(globals().items()):
+    if (inspect.isfunction(_func) and _func.__module__ == __name__
+            and not _name.startswith("_") and _name not in NOT_INSTRUMENTED):
+        globals()[_name] = db_stats.instrument(_func)
@@ -0,0 +1,769 @@
+"""Асинхронный двойник database.py для серверных процессов на asyncio.
+
+Функции повторяют функции database.py (те же имена, параметры и результаты), но
+являются корутинами. Соединения psycopg2 открываются в асинхронном режиме, а ожидание
+ответа сервера встроено в цикл событий через add_reader/add_writer, поэтому один
+процесс обслуживает множество одновременных сессий без потоков.
+
+Асинхронные соединения работают в режиме автофиксации; функции из нескольких
+изменяющих запросов выполняют их в явной транзакции.
+"""
+import asyncio
+import os
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import DictCursor
+
+import database
+import queries
+from database import (DB_POOL_HEALTH_CHECK, DB_POOL_MAX_IDLE, DB_POOL_MIN_SIZE, DB_POOL_TIMEOUT, MAX_ID,
+                      connection_params)
+from db_pool import PoolTimeout
+
+# Одновременных запросов у сервера намного больше, чем у настольного клиента
+DB_ASYNC_POOL_MAX_SIZE = int(os.environ.get("GROUPTASKER_DB_ASYNC_POOL_MAX_SIZE", "20"))
+
+_pool = None
+
+# Соединение -> имена запросов, уже подготовленных на нем (сами запросы общие с database.py)
+_prepared = weakref.WeakKeyDictionary()
+
+# Кэш ID групп по коду (см. database.resolve_group_id)
+_group_ids = {}
+
+
+async def wait_ready(conn):
+    """Ждет, пока асинхронное соединение закончит текущую операцию (подключение или запрос)."""
+    loop = asyncio.get_running_loop()
+    fd = conn.fileno()
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == extensions.POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f"Неожиданное состояние соединения: {state}")
+
+        ready = loop.create_future()
+        add(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            remove(fd)
+
+
+class AsyncConnectionPool:
+    """Ограниченный пул асинхронных соединений с PostgreSQL (аналог db_pool.ConnectionPool).
+
+    Соединения создаются лениво (не больше max_size), возвращаются в пул после
+    использования и закрываются, если простаивают дольше max_idle секунд (в пуле
+    остается не меньше min_size соединений). Перед выдачей соединение, простоявшее
+    дольше health_check_interval, проверяется запросом SELECT 1: сервер мог закрыть его,
+    пока оно простаивало. Соединение, запрос на котором был прерван (отмена корутины) или
+    завершился ошибкой соединения, закрывается: его состояние на сервере неизвестно.
+    """
+
+    def __init__(self, min_size=1, max_size=20, max_idle=300.0,
+                 health_check_interval=30.0, acquire_timeout=10.0, **connect_kwargs):
+        if max_size < 1:
+            raise ValueError("max_size должен быть не меньше 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size должен быть в диапазоне от 0 до max_size")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.connect_kwargs = connect_kwargs
+
+        self._idle = deque()  # (соединение, время возврата в пул)
+        self._size = 0
+        self._closed = False
+        self._condition = asyncio.Condition()
+
+    @property
+    def size(self):
+        """Общее количество открытых соединений (выданных и свободных)."""
+        return self._size
+
+    @property
+    def idle_count(self):
+        """Количество свободных соединений в пуле."""
+        return len(self._idle)
+
+    async def acquire(self, timeout=None):
+        """Выдает исправное соединение из пула, при необходимости создавая новое."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn, idle_since = await self._checkout(deadline)
+            if conn is None:
+                # Слот зарезервирован, создаем соединение вне блокировки
+                try:
+                    conn = psycopg2.connect(**self.connect_kwargs, async_=True)
+                    await wait_ready(conn)
+                    return conn
+                except BaseException:
+                    await self._forget()
+                    raise
+
+            try:
+                healthy = await self._is_healthy(conn, idle_since)
+            except BaseException:
+                # Проверку прервали: ответ на SELECT 1 мог остаться непрочитанным
+                await self._discard(conn)
+                raise
+            if healthy:
+                return conn
+            await self._discard(conn)
+
+    async def release(self, conn, discard=False):
+        """Возвращает соединение в пул или закрывает его, если оно неисправно."""
+        if not discard and not conn.closed:
+            try:
+                # Не оставляем в пуле соединения с незавершенной транзакцией
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    with conn.cursor() as cursor:
+                        cursor.execute("ROLLBACK;")
+                        await wait_ready(conn)
+            except psycopg2.Error:
+                discard = True
+
+        async with self._condition:
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                conn.close()
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._evict_expired()
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def connection(self, timeout=None):
+        """Асинхронный контекстный менеджер: выдает соединение и возвращает его в пул."""
+        conn = await self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError, asyncio.CancelledError):
+            discard = True
+            raise
+        finally:
+            await self.release(conn, discard=discard)
+
+    async def close(self):
+        """Закрывает все свободные соединения и запрещает выдачу новых."""
+        async with self._condition:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                conn.close()
+            self._condition.notify_all()
+
+    async def _checkout(self, deadline):
+        """Забирает свободное соединение или резервирует слот под новое (возвращает None)."""
+        async with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Пул соединений закрыт")
+
+                self._evict_expired()
+                if self._idle:
+                    # Берем последнее возвращенное соединение, старые пусть истекают
+                    return self._idle.pop()
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"Нет свободных соединений в пуле (max_size={self.max_size})"
+                    )
+                try:
+                    await asyncio.wait_for(self._condition.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _evict_expired(self):
+        """Закрывает соединения, простаивающие дольше max_idle. Вызывается под блокировкой."""
+        if self.max_idle is None:
+            return
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            conn, idle_since = self._idle[0]
+            if now - idle_since < self.max_idle:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            conn.close()
+
+    async def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            # Соединения в режиме автофиксации, откатывать после проверки нечего
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+                await wait_ready(conn)
+            return True
+        except psycopg2.Error:
+            return False
+
+    async def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        await self._forget()
+
+    async def _forget(self):
+        async with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+
+def configure_pool(**options):
+    """Создает пул асинхронных соединений с указанными настройками (min_size, max_size,
+    max_idle, health_check_interval, acquire_timeout и параметры подключения).
+    Прежний пул нужно закрыть через close_pool."""
+    global _pool
+    settings = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_ASYNC_POOL_MAX_SIZE,
+        "max_idle": DB_POOL_MAX_IDLE,
+        "health_check_interval": DB_POOL_HEALTH_CHECK,
+        "acquire_timeout": DB_POOL_TIMEOUT,
+        **connection_params(),
+    }
+    settings.update(options)
+    _pool = AsyncConnectionPool(**settings)
+    # В другой базе у групп другие ID
+    forget_group_id()
+    return _pool
+
+
+def get_pool():
+    """Возвращает общий пул асинхронных соединений, создавая его при первом обращении."""
+    if _pool is None:
+        configure_pool()
+    return _pool
+
+
+async def close_pool():
+    """Закрывает все соединения пула (например, при остановке сервера)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def _execute(cursor, query, params=()):
+    """Выполняет запрос (как подготовленный, если они включены в database.py) и ждет ответа."""
+    conn = cursor.connection
+    if not database.USE_PREPARED_STATEMENTS:
+        cursor.execute(query, params)
+        await wait_ready(conn)
+        return
+
+    name, text, count = queries.statement(query)
+    prepared = _prepared.setdefault(conn, set())
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {text};")
+        await wait_ready(conn)
+        prepared.add(name)
+    if count:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * count)});", params)
+    else:
+        cursor.execute(f"EXECUTE {name};")
+    await wait_ready(conn)
+
+
+async def _fetchall(query, params=()):
+    async with get_pool().connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            await _execute(cursor, query, params)
+            return cursor.fetchall()
+
+
+async def _fetchone(query, params=()):
+    async with get_pool().connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            await _execute(cursor, query, params)
+            return cursor.fetchone()
+
+
+async def _run(query, params=()):
+    async with get_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            await _execute(cursor, query, params)
+
+
+@asynccontextmanager
+async def _transaction():
+    """Курсор в явной транзакции: фиксируется при успехе, иначе откатывается пулом."""
+    async with get_pool().connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            cursor.execute("BEGIN;")
+            await wait_ready(conn)
+            yield cursor
+            cursor.execute("COMMIT;")
+            await wait_ready(conn)
+
+
+async def resolve_group_id(group_code):
+    """Возвращает ID группы по коду (None, если группы нет). Найденный ID кэшируется."""
+    group_id = _group_ids.get(group_code)
+    if group_id is not None:
+        return group_id
+
+    group = await _fetchone(queries.GROUP_ID_BY_CODE, (group_code,))
+    if not group:
+        return None
+    _group_ids[group_code] = group['id']
+    return group['id']
+
+
+def forget_group_id(group_code=None):
+    """Удаляет ID группы из кэша (без аргумента — очищает весь кэш)."""
+    if group_code is None:
+        _group_ids.clear()
+    else:
+        _group_ids.pop(group_code, None)
+
+
+async def _write_for_group(group_code, func, *args):
+    """Асинхронная версия database._write_for_group."""
+    try:
+        return await func(await _require_group_id(group_code), *args)
+    except psycopg2.errors.ForeignKeyViolation:
+        forget_group_id(group_code)
+        return await func(await _require_group_id(group_code), *args)
+
+
+async def _require_group_id(group_code):
+    group_id = await resolve_group_id(group_code)
+    if group_id is None:
+        raise ValueError(f"Группа с кодом {group_code} не найдена")
+    return group_id
+
+
+async def _delete_own(table, owner_column, group_code, row_id, user_name):
+    """Асинхронная версия database._delete_own."""
+    group_id = await resolve_group_id(group_code)
+    row = await _fetchone(queries.delete_own(table, owner_column),
+                          (row_id, group_id, user_name, row_id, group_id))
+    return queries.delete_result(row)
+
+
+async def create_group(name, code, creator_name, creator_password):
+    """Создает новую группу в базе данных и добавляет создателя в таблицу пользователей."""
+    async with _transaction() as cursor:
+        await _execute(cursor, queries.INSERT_GROUP, (name, code))
+        group_id = cursor.fetchone()[0]
+
+        # Добавляем создателя группы в users
+        await _execute(cursor, queries.INSERT_USER, (creator_name, creator_password, group_id))
+    return group_id
+
+
+async def check_group_exists(group_code):
+    """Проверяет, существует ли группа с данным кодом."""
+    return await _fetchone(queries.GROUP_ID_BY_CODE, (group_code,)) is not None
+
+
+async def check_user_exists(name, password, group_code):
+    """Проверяет, существует ли пользователь в группе."""
+    user = await _fetchone(queries.USER_BY_PASSWORD, (name, password, group_code))
+    return user is not None
+
+
+async def add_user_to_group(name, password, group_code):
+    """Добавляет пользователя в группу, если код группы существует."""
+    if await resolve_group_id(group_code) is None:
+        return None
+    return await _write_for_group(group_code, _add_user, name, password)
+
+
+async def _add_user(group_id, name, password):
+    await _run(queries.INSERT_USER, (name, password, group_id))
+    return True
+
+
+async def save_note(group_code, text, user_name):
+    """Сохраняет заметку в базу данных и возвращает её ID."""
+    return await _write_for_group(group_code, save_note_by_group_id, text, user_name)
+
+
+async def save_note_by_group_id(group_id, text, user_name):
+    """Сохраняет заметку группы с известным ID и возвращает её ID."""
+    note = await _fetchone(queries.INSERT_NOTE, (group_id, text, user_name))
+    return note['id']
+
+
+async def save_notes(group_code, notes):
+    """Сохраняет несколько заметок [(текст, автор), ...] одним запросом (см. database.save_notes)."""
+    return await _write_for_group(group_code, save_notes_by_group_id, notes)
+
+
+async def save_notes_by_group_id(group_id, notes):
+    """То же, что save_notes, для группы с известным ID."""
+    if not notes:
+        return []
+    texts, user_names = zip(*notes)
+    rows = await _fetchall(queries.INSERT_NOTES, (group_id, list(texts), list(user_names)))
+    return [row['id'] for row in rows]
+
+
+async def get_notes(group_code):
+    """Получает все заметки для группы."""
+    return await get_notes_by_group_id(await resolve_group_id(group_code))
+
+
+async def get_notes_by_group_id(group_id):
+    """Получает все заметки группы с известным ID."""
+    notes = await _fetchall(queries.NOTES, (group_id,))
+    return [(note['id'], note['text'], note['user_name']) for note in notes]
+
+
+async def delete_note(note_id):
+    """Удаляет заметку по ID."""
+    await _run(queries.DELETE_NOTE, (note_id,))
+
+
+async def delete_own_note(group_code, note_id, user_name):
+    """Удаляет заметку, если ее автор — user_name (см. database.delete_own_note)."""
+    return await _delete_own("notes", "user_name", group_code, note_id, user_name)
+
+
+async def get_group_code(group_id):
+    """Получает код группы по ID."""
+    group = await _fetchone(queries.GROUP_CODE_BY_ID, (group_id,))
+    return group['code'] if group else None
+
+
+async def delete_group(group_code):
+    """Удаляет группу по коду."""
+    forget_group_id(group_code)
+    await _run(queries.DELETE_GROUP, (group_code,))
+
+
+async def get_group_overview(group_code):
+    """Возвращает (название группы, создатель, участники по алфавиту) одним запросом
+    или None, если группы нет."""
+    group = await _fetchone(queries.GROUP_OVERVIEW, (group_code,))
+    return (group['name'], group['creator'], group['members']) if group else None
+
+
+async def get_session_bootstrap(group_code, user_name, message_limit=50):
+    """Стартовые данные вкладок одним запросом (см. database.get_session_bootstrap)."""
+    row = await _fetchone(queries.SESSION_BOOTSTRAP, (user_name, message_limit, group_code))
+    return database.session_bootstrap_from_row(row)
+
+
+async def remove_group_member(group_code, user_name):
+    """Исключает пользователя из группы. Возвращает False, если его не было в группе."""
+    async with get_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            await _execute(cursor, queries.REMOVE_GROUP_MEMBER, (user_name, group_code))
+            return cursor.rowcount > 0
+
+
+async def save_task(group_code, title, description, deadline, user_name):
+    """Сохраняет задачу в базу данных и возвращает её ID."""
+    return await _write_for_group(group_code, save_task_by_group_id, title, description, deadline, user_name)
+
+
+async def save_task_by_group_id(group_id, title, description, deadline, user_name):
+    """Сохраняет задачу группы с известным ID и возвращает её ID."""
+    task = await _fetchone(queries.INSERT_TASK, (group_id, title, description, deadline, user_name))
+    return task['id']
+
+
+async def save_tasks(group_code, tasks):
+    """Сохраняет несколько задач [(название, описание, дедлайн, пользователь), ...]
+    одним запросом (см. database.save_tasks)."""
+    return await _write_for_group(group_code, save_tasks_by_group_id, tasks)
+
+
+async def save_tasks_by_group_id(group_id, tasks):
+    """То же, что save_tasks, для группы с известным ID."""
+    if not tasks:
+        return []
+    titles, descriptions, deadlines, user_names = zip(*tasks)
+    rows = await _fetchall(queries.INSERT_TASKS, (group_id, list(titles), list(descriptions), list(deadlines), list(user_names)))
+    return [row['id'] for row in rows]
+
+
+async def get_tasks(group_code, user_name):
+    """Получает все задачи для группы и пользователя."""
+    return await get_tasks_by_group_id(await resolve_group_id(group_code), user_name)
+
+
+async def get_tasks_by_group_id(group_id, user_name):
+    """Получает все задачи пользователя в группе с известным ID."""
+    tasks = await _fetchall(queries.TASKS, (group_id, user_name))
+    return [(task['id'], task['title'], task['description'],
+             task['deadline'], task['user_name']) for task in tasks]
+
+
+async def delete_task(task_id):
+    """Удаляет задачу по ID."""
+    await _run(queries.DELETE_TASK, (task_id,))
+
+
+async def delete_own_task(group_code, task_id, user_name):
+    """Удаляет задачу, если она принадлежит user_name (см. database.delete_own_task)."""
+    return await _delete_own("tasks", "user_name", group_code, task_id, user_name)
+
+
+async def save_message(group_code, user_name, message):
+    """Сохраняет сообщение в чате."""
+    return await _write_for_group(group_code, save_message_by_group_id, user_name, message)
+
+
+async def save_message_by_group_id(group_id, user_name, message):
+    """Сохраняет сообщение в чате группы с известным ID."""
+    result = await _fetchone(queries.INSERT_MESSAGE, (group_id, user_name, message))
+    return result['id']
+
+
+async def save_messages(group_code, messages):
+    """Сохраняет несколько сообщений чата [(автор, текст), ...] одним запросом
+    (см. database.save_messages)."""
+    return await _write_for_group(group_code, save_messages_by_group_id, messages)
+
+
+async def save_messages_by_group_id(group_id, messages):
+    """То же, что save_messages, для группы с известным ID."""
+    if not messages:
+        return []
+    user_names, texts = zip(*messages)
+    rows = await _fetchall(queries.INSERT_MESSAGES, (group_id, list(user_names), list(texts)))
+    return [row['id'] for row in rows]
+
+
+async def get_messages(group_code, last_message_id=0, before_id=None, limit=None):
+    """Получает сообщения группы (см. database.get_messages)."""
+    return await get_messages_by_group_id(await resolve_group_id(group_code), last_message_id, before_id, limit)
+
+
+async def get_messages_by_group_id(group_id, last_message_id=0, before_id=None, limit=None):
+    """То же, что get_messages, для группы с известным ID."""
+    query = queries.messages(before_id is not None, limit is not None)
+    params = [group_id, last_message_id]
+    if before_id is not None:
+        params.append(before_id)
+    if limit is not None:
+        params.append(limit)
+
+    messages = [(msg['id'], msg['user_name'], msg['message'], msg['created_at'])
+                for msg in await _fetchall(query, params)]
+    if limit is not None:
+        messages.reverse()
+    return messages
+
+
+async def delete_message(message_id):
+    """Удаляет сообщение по ID."""
+    await _run(queries.DELETE_MESSAGE, (message_id,))
+
+
+async def delete_own_message(group_code, message_id, user_name):
+    """Удаляет сообщение чата, если его автор — user_name (см. database.delete_own_message)."""
+    return await _delete_own("group_messages", "user_name", group_code, message_id, user_name)
+
+
+async def get_last_message_id(group_code):
+    """Возвращает ID последнего сообщения в группе."""
+    return await get_last_message_id_by_group_id(await resolve_group_id(group_code))
+
+
+async def get_last_message_id_by_group_id(group_id):
+    """Возвращает ID последнего сообщения в группе с известным ID."""
+    result = await _fetchone(queries.LAST_MESSAGE_ID, (group_id,))
+    return result['last_id'] if result['last_id'] else 0
+
+
+async def get_message_count(group_code, first_message_id=0):
+    """Возвращает количество сообщений в группе (с ID не меньше first_message_id)"""
+    return await get_message_count_by_group_id(await resolve_group_id(group_code), first_message_id)
+
+
+async def get_message_count_by_group_id(group_id, first_message_id=0):
+    """Возвращает количество сообщений в группе с известным ID (с ID не меньше first_message_id)"""
+    result = await _fetchone(queries.MESSAGE_COUNT, (group_id, first_message_id))
+    return result['count'] if result else 0
+
+
+async def get_last_tombstone_id(group_code):
+    """Возвращает ID последней записи журнала удаленных сообщений группы."""
+    return await get_last_tombstone_id_by_group_id(await resolve_group_id(group_code))
+
+
+async def get_last_tombstone_id_by_group_id(group_id):
+    """Возвращает ID последней записи журнала удаленных сообщений группы с известным ID."""
+    result = await _fetchone(queries.LAST_TOMBSTONE_ID, (group_id,))
+    return result['last_id'] if result['last_id'] else 0
+
+
+async def get_message_changes(group_code, last_message_id, last_tombstone_id):
+    """Возвращает новые и удаленные сообщения группы (см. database.get_message_changes)."""
+    return await get_message_changes_by_group_id(await resolve_group_id(group_code),
+                                                 last_message_id, last_tombstone_id)
+
+
+async def get_message_changes_by_group_id(group_id, last_message_id, last_tombstone_id):
+    """То же, что get_message_changes, для группы с известным ID."""
+    async with get_pool().connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            await _execute(cursor, queries.NEW_MESSAGES, (group_id, last_message_id))
+            messages = [(msg['id'], msg['user_name'], msg['message'],
+                         msg['created_at']) for msg in cursor.fetchall()]
+
+            await _execute(cursor, queries.NEW_TOMBSTONES, (group_id, last_tombstone_id))
+            deleted = [(row['id'], row['message_id']) for row in cursor.fetchall()]
+
+            return messages, deleted
+
+
+async def get_conversation_state(group_code, first_message_id=0):
+    """Возвращает состояние чата группы (см. database.get_conversation_state)."""
+    return await get_conversation_state_by_group_id(await resolve_group_id(group_code), first_message_id)
+
+
+async def get_conversation_state_by_group_id(group_id, first_message_id=0):
+    """То же, что get_conversation_state, для группы с известным ID."""
+    result = await _fetchone(queries.CONVERSATION_STATE, (group_id, first_message_id))
+    return result['last_id'], result['count'], int(result['checksum'])
+
+
+async def get_group_users(group_code, exclude_user=None):
+    """Получает список пользователей группы, исключая указанного пользователя"""
+    return await get_group_users_by_group_id(await resolve_group_id(group_code), exclude_user)
+
+
+async def get_group_users_by_group_id(group_id, exclude_user=None):
+    """Получает список пользователей группы с известным ID, исключая указанного пользователя"""
+    params = [group_id]
+    if exclude_user:
+        params.append(exclude_user)
+    return [user['name'] for user in await _fetchall(queries.group_users(exclude_user), params)]
+
+
+async def save_private_message(group_code, sender, receiver, message):
+    """Сохраняет личное сообщение в базе данных."""
+    return await _write_for_group(group_code, save_private_message_by_group_id, sender, receiver, message)
+
+
+async def save_private_message_by_group_id(group_id, sender, receiver, message):
+    """Сохраняет личное сообщение в группе с известным ID."""
+    result = await _fetchone(queries.INSERT_PRIVATE_MESSAGE, (group_id, sender, receiver, message))
+    return result['id']
+
+
+async def get_private_messages(group_code, user1, user2, last_message_id=0, before_id=None, limit=None):
+    """Получает личные сообщения между двумя пользователями (см. database.get_private_messages)."""
+    return await get_private_messages_by_group_id(await resolve_group_id(group_code), user1, user2,
+                                                  last_message_id, before_id, limit)
+
+
+async def get_private_messages_by_group_id(group_id, user1, user2, last_message_id=0, before_id=None, limit=None):
+    """То же, что get_private_messages, для группы с известным ID."""
+    before_id = before_id or MAX_ID
+    if limit is None:
+        query = queries.PRIVATE_MESSAGES
+        params = (group_id, last_message_id, before_id, user1, user2, user2, user1)
+    else:
+        # Каждое направление переписки читается по индексу с конца, без сортировки всей истории
+        query = queries.PRIVATE_MESSAGES_PAGE
+        params = (group_id, user1, user2, last_message_id, before_id, limit,
+                  group_id, user2, user1, last_message_id, before_id, limit, limit)
+
+    messages = [(msg['id'], msg['sender'], msg['receiver'], msg['message'], msg['created_at'])
+                for msg in await _fetchall(query, params)]
+    if limit is not None:
+        messages.reverse()
+    return messages
+
+
+async def delete_private_message(message_id):
+    """Удаляет личное сообщение по ID."""
+    await _run(queries.DELETE_PRIVATE_MESSAGE, (message_id,))
+
+
+async def delete_own_private_message(group_code, message_id, user_name):
+    """Удаляет личное сообщение, если его отправитель — user_name
+    (см. database.delete_own_private_message)."""
+    return await _delete_own("private_messages", "sender", group_code, message_id, user_name)
+
+
+async def get_private_message_count(group_code, user1, user2, first_message_id=0):
+    """Возвращает количество личных сообщений между пользователями (с ID не меньше first_message_id)."""
+    return await get_private_message_count_by_group_id(await resolve_group_id(group_code), user1, user2,
+                                                       first_message_id)
+
+
+async def get_private_message_count_by_group_id(group_id, user1, user2, first_message_id=0):
+    """Возвращает количество личных сообщений между пользователями в группе с известным ID."""
+    result = await _fetchone(queries.PRIVATE_MESSAGE_COUNT, (group_id, first_message_id, user1, user2, user2, user1))
+    return result['count'] if result else 0
+
+
+async def get_private_conversation_state(group_code, user1, user2, first_message_id=0):
+    """Возвращает состояние личной переписки (см. database.get_conversation_state)."""
+    return await get_private_conversation_state_by_group_id(await resolve_group_id(group_code), user1, user2,
+                                                            first_message_id)
+
+
+async def get_private_conversation_state_by_group_id(group_id, user1, user2, first_message_id=0):
+    """То же, что get_private_conversation_state, для группы с известным ID."""
+    result = await _fetchone(queries.PRIVATE_CONVERSATION_STATE, (group_id, first_message_id, user1, user2, user2, user1))
+    return result['last_id'], result['count'], int(result['checksum'])
+
+
+async def check_user_exists_in_group(name, group_code):
+    """Проверяет, существует ли пользователь с таким именем в группе, без проверки пароля."""
+    user = await _fetchone(queries.USER_IN_GROUP, (name, group_code))
+    return user is not None
+
+
+async def verify_user_password(name, password, group_code):
+    """Проверяет, соответствует ли пароль пользователю в группе."""
+    user = await _fetchone(queries.USER_BY_PASSWORD, (name, password, group_code))
+    return user is not None
+
+
+async def is_group_creator(user_name, group_code):
+    """Проверяет, является ли пользователь создателем группы."""
+    async with get_pool().connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cursor:
+            await _execute(cursor, queries.FIRST_GROUP_USER, (group_code,))
+            first_user = cursor.fetchone()
+
+            if first_user:
+                await _execute(cursor, queries.GROUP_USER_ID, (user_name, group_code))
+                current_user = cursor.fetchone()
+
+                return current_user and current_user['id'] == first_user['id']
+            return False
+
+
+async def get_note_author(note_id):
+    """Получает имя автора заметки по её ID."""
+    note = await _fetchone(queries.NOTE_AUTHOR, (note_id,))
+    return note['user_name'] if note else None
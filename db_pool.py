@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    """Не удалось получить соединение из пула за отведенное время."""
+
+
+class ConnectionPool:
+    """Ограниченный потокобезопасный пул постоянных соединений с PostgreSQL.
+
+    Соединения создаются лениво (не больше max_size), возвращаются в пул после
+    использования и закрываются, если простаивают дольше max_idle секунд
+    (при этом в пуле остается не меньше min_size соединений). Перед выдачей
+    соединение, простоявшее дольше health_check_interval, проверяется запросом
+    SELECT 1, а сломанные соединения заменяются новыми.
+    """
+
+    def __init__(self, min_size=1, max_size=5, max_idle=300.0,
+                 health_check_interval=30.0, acquire_timeout=10.0, **connect_kwargs):
+        if max_size < 1:
+            raise ValueError("max_size должен быть не меньше 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size должен быть в диапазоне от 0 до max_size")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.connect_kwargs = connect_kwargs
+
+        self._idle = deque()  # (соединение, время возврата в пул)
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        """Общее количество открытых соединений (выданных и свободных)."""
+        with self._condition:
+            return self._size
+
+    @property
+    def idle_count(self):
+        """Количество свободных соединений в пуле."""
+        with self._condition:
+            return len(self._idle)
+
+    def acquire(self, timeout=None):
+        """Выдает исправное соединение из пула, при необходимости создавая новое."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn, idle_since = self._checkout(deadline)
+            if conn is None:
+                # Слот зарезервирован, создаем соединение вне блокировки
+                try:
+                    return self._connect()
+                except Exception:
+                    self._forget()
+                    raise
+
+            if self._is_healthy(conn, idle_since):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn, discard=False):
+        """Возвращает соединение в пул или закрывает его, если оно неисправно."""
+        if not discard and not conn.closed:
+            try:
+                # Не оставляем в пуле соединения с незавершенной транзакцией
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed:
+            self._discard(conn)
+            return
+
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+                conn.close()
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._evict_expired()
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Контекстный менеджер: выдает соединение, фиксирует транзакцию при успехе,
+        откатывает при ошибке и возвращает соединение в пул."""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+            if not conn.closed:
+                conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """Закрывает все свободные соединения и запрещает выдачу новых."""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                conn.close()
+            self._condition.notify_all()
+
+    def _checkout(self, deadline):
+        """Забирает свободное соединение или резервирует слот под новое (возвращает None)."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Пул соединений закрыт")
+
+                self._evict_expired()
+                if self._idle:
+                    # Берем последнее возвращенное соединение, старые пусть истекают
+                    return self._idle.pop()
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"Нет свободных соединений в пуле (max_size={self.max_size})"
+                    )
+                self._condition.wait(remaining)
+
+    def _evict_expired(self):
+        """Закрывает соединения, простаивающие дольше max_idle. Вызывается под блокировкой."""
+        if self.max_idle is None:
+            return
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            conn, idle_since = self._idle[0]
+            if now - idle_since < self.max_idle:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            conn.close()
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _connect(self):
+        return psycopg2.connect(**self.connect_kwargs)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        self._forget()
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
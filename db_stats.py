@@ -0,0 +1,183 @@
+"""Статистика работы с базой данных для функций database.py.
+
+Для каждой функции считаются вызовы, ошибки, гистограмма времени вызова, количество
+запросов и полученных строк, а также время ожидания соединения из пула. Запросы дольше
+SLOW_QUERY_MS выводятся в журнал медленных запросов (форма запроса и параметры) и
+сохраняются в памяти. Данные читаются через snapshot() и slow_queries(), например
+отладочной панелью или экспортером метрик.
+
+Вложенные вызовы (get_notes вызывает resolve_group_id и get_notes_by_group_id) учитываются
+у каждой функции, а запросы и ожидание соединения — у самой внутренней.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+
+STATS_ENABLED = os.environ.get("GROUPTASKER_DB_STATS", "1") != "0"
+# Запросы дольше этого времени попадают в журнал медленных запросов (отрицательное значение отключает журнал)
+SLOW_QUERY_MS = float(os.environ.get("GROUPTASKER_DB_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_HISTORY = 100  # сколько последних медленных запросов хранить
+
+# Верхние границы интервалов гистограммы времени вызова, мс (последний интервал — все, что дольше)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+OUTSIDE_HELPERS = "<вне функций>"
+
+# Журнал медленных запросов; приложение может настроить или отключить его через logging
+logger = logging.getLogger(__name__)
+
+
+class HelperStats:
+    """Накопленная статистика одной функции."""
+
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "buckets", "queries", "rows",
+                 "acquires", "acquire_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.queries = 0
+        self.rows = 0
+        self.acquires = 0
+        self.acquire_ms = 0.0
+
+    def add_call(self, elapsed_ms, failed):
+        self.calls += 1
+        self.errors += failed
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Оценка перцентиля по гистограмме: верхняя граница интервала, в который он попал."""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "histogram": {"bounds_ms": list(LATENCY_BUCKETS_MS), "counts": list(self.buckets)},
+            "queries": self.queries,
+            "rows": self.rows,
+            "acquire_mean_ms": self.acquire_ms / self.acquires if self.acquires else 0.0,
+        }
+
+
+_stats = {}
+_slow = deque(maxlen=SLOW_QUERY_HISTORY)
+_lock = threading.Lock()
+_local = threading.local()  # стек выполняемых функций текущего потока
+
+
+def _helper_stats(name):
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = HelperStats()
+    return stats
+
+
+def _current_helper():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else OUTSIDE_HELPERS
+
+
+def instrument(func):
+    """Оборачивает функцию database.py сбором статистики ее вызовов."""
+    if not STATS_ENABLED:
+        return func
+
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(name)
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stack.pop()
+            with _lock:
+                _helper_stats(name).add_call(elapsed_ms, failed)
+
+    return wrapper
+
+
+def record_acquire(elapsed):
+    """Учитывает ожидание соединения из пула (секунды) у выполняемой функции."""
+    if not STATS_ENABLED:
+        return
+    with _lock:
+        stats = _helper_stats(_current_helper())
+        stats.acquires += 1
+        stats.acquire_ms += elapsed * 1000
+
+
+def record_query(query, params, elapsed, rows):
+    """Учитывает выполненный запрос (время в секундах) и выводит его, если он медленный."""
+    if not STATS_ENABLED:
+        return
+    helper = _current_helper()
+    elapsed_ms = elapsed * 1000
+    with _lock:
+        stats = _helper_stats(helper)
+        stats.queries += 1
+        stats.rows += max(rows, 0)
+
+    if 0 <= SLOW_QUERY_MS <= elapsed_ms:
+        shape = query_shape(query)
+        # Пароли в журнал не попадают
+        shown_params = "***" if "password" in shape.lower() else list(params or ())
+        entry = {"time": time.time(), "helper": helper, "elapsed_ms": elapsed_ms,
+                 "query": shape, "params": shown_params, "rows": rows}
+        with _lock:
+            _slow.append(entry)
+        logger.warning("Медленный запрос (%.1f мс) в %s: %s параметры=%s", elapsed_ms, helper, shape, shown_params)
+
+
+def query_shape(query):
+    """Текст запроса в одну строку (параметры остаются заполнителями %s)."""
+    return " ".join(query.split())
+
+
+def snapshot():
+    """Статистика всех функций: имя -> словарь (см. HelperStats.as_dict)."""
+    with _lock:
+        return {name: stats.as_dict() for name, stats in _stats.items()}
+
+
+def slow_queries():
+    """Последние медленные запросы, от старых к новым."""
+    with _lock:
+        return list(_slow)
+
+
+def reset():
+    """Очищает накопленную статистику и журнал медленных запросов."""
+    with _lock:
+        _stats.clear()
+        _slow.clear()
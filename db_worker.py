@@ -0,0 +1,206 @@
+import threading
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import qt_profiler
+from database import DB_POOL_MAX_SIZE
+
+
+class DatabaseRequest(QObject):
+    """Запрос к базе данных, выполняемый в фоновом потоке.
+
+    Результат приходит сигналом finished, исключение — сигналом failed; оба
+    доставляются в поток GUI. Отмененный запрос не выполняется (если еще не начат)
+    и ничего не сообщает. Если задан owner, запрос удаляется вместе с ним.
+    """
+
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+    def __init__(self, func, args, kwargs, key=None, owner=None):
+        super().__init__(owner)
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self._cancelled = threading.Event()
+        self._started = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def started(self):
+        return self._started.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+class _Task(QRunnable):
+    def __init__(self, executor, request):
+        super().__init__()
+        self.executor = executor
+        self.request = request
+
+    def run(self):
+        request = self.request
+        if request.cancelled:
+            self.executor._done.emit(request, None, None)
+            return
+        request._started.set()
+        try:
+            result = request.func(*request.args, **request.kwargs)
+        except Exception as e:
+            self.executor._done.emit(request, None, e)
+        else:
+            self.executor._done.emit(request, result, None)
+
+
+class DatabaseExecutor(QObject):
+    """Выполняет функции database.py в пуле потоков, не блокируя интерфейс.
+
+    Запросы с одинаковым ключом (key) объединяются. С replace=True предыдущий запрос
+    с тем же ключом отменяется, и его результат не доставляется (загрузка страницы).
+    С replace=False по ключу выполняется не больше одного запроса и еще один ждет
+    своей очереди; повторные вызовы, пока ожидающий запрос не начался, возвращают
+    его же (опрос изменений). Потоков не больше, чем соединений в пуле database.py.
+    """
+
+    _done = pyqtSignal(object, object, object)  # запрос, результат, ошибка
+
+    def __init__(self, max_threads=DB_POOL_MAX_SIZE, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._running = {}  # ключ -> запрос с этим ключом, переданный пулу потоков
+        self._deferred = {}  # ключ -> запрос, ждущий завершения выполняющегося
+        self._tasks = {}  # запрос -> задача пула
+        self._done.connect(self._deliver)
+
+    def submit(self, func, *args, key=None, replace=True, owner=None,
+               on_result=None, on_error=None, **kwargs):
+        """Ставит вызов func(*args, **kwargs) в очередь. Возвращает DatabaseRequest."""
+        defer = False
+        if key is not None and self.is_pending(key):
+            if replace:
+                self.cancel(key)
+            else:
+                latest = self._deferred.get(key) or self._running[key]
+                if not latest.started:
+                    return latest
+                defer = True
+
+        request = DatabaseRequest(func, args, kwargs, key, owner)
+        if on_result is not None:
+            request.finished.connect(qt_profiler.wrap(on_result))
+        if on_error is not None:
+            request.failed.connect(qt_profiler.wrap(on_error))
+        else:
+            request.failed.connect(lambda e: print(f"Ошибка при запросе к базе данных: {e}"))
+
+        task = _Task(self, request)
+        task.setAutoDelete(False)
+        self._tasks[request] = task
+        if defer:
+            self._deferred[key] = request
+        else:
+            self._start(request)
+        return request
+
+    def is_pending(self, key):
+        """Есть ли незавершенный запрос с ключом key"""
+        return any(request is not None and not request.cancelled and not sip.isdeleted(request)
+                   for request in (self._deferred.get(key), self._running.get(key)))
+
+    def cancel(self, request_or_key):
+        """Отменяет запрос или все запросы с данным ключом (и ожидающий, и выполняющийся)"""
+        if isinstance(request_or_key, DatabaseRequest):
+            requests = [request_or_key]
+        else:
+            requests = [self._deferred.get(request_or_key), self._running.get(request_or_key)]
+
+        for request in requests:
+            if request is None or request.cancelled:
+                continue
+            request.cancel()
+            key = request.key
+            task = self._tasks.get(request)
+            if key is not None and self._deferred.get(key) is request:
+                del self._deferred[key]
+                self._finish(request)
+                request.deleteLater()
+            elif task is not None and self.thread_pool.tryTake(task):
+                self._finish(request)
+                request.deleteLater()
+            elif key is not None and self._running.get(key) is request:
+                # Уже выполняется: результат отбросит _deliver, а ожидающий запрос
+                # с тем же ключом больше не ждет отмененный
+                del self._running[key]
+                self._start_deferred(key)
+
+    def cancel_owner(self, owner):
+        """Отменяет все запросы, созданные для виджета owner"""
+        for request in list(self._tasks):
+            if not sip.isdeleted(request) and request.parent() is owner:
+                self.cancel(request)
+
+    def cancel_all(self):
+        for request in list(self._tasks):
+            self.cancel(request)
+
+    def shutdown(self, timeout=5000):
+        """Отменяет ожидающие запросы и ждет завершения выполняющихся"""
+        self.cancel_all()
+        self.thread_pool.clear()
+        self.thread_pool.waitForDone(timeout)
+
+    def _start(self, request):
+        if request.key is not None:
+            self._running[request.key] = request
+        self.thread_pool.start(self._tasks[request])
+
+    def _start_deferred(self, key):
+        deferred = self._deferred.pop(key, None)
+        if deferred is not None:
+            self._start(deferred)
+
+    def _deliver(self, request, result, error):
+        self._finish(request)
+        if sip.isdeleted(request):
+            return
+        if not request.cancelled:
+            if error is not None:
+                request.failed.emit(error)
+            else:
+                request.finished.emit(result)
+        request.deleteLater()
+
+    def _finish(self, request):
+        self._tasks.pop(request, None)
+        key = request.key
+        # Следующий запрос с ключом запускается, когда завершился выполнявшийся
+        if key is not None and self._running.get(key) is request:
+            del self._running[key]
+            self._start_deferred(key)
+
+
+_executor = None
+
+
+def get_executor():
+    """Общий исполнитель запросов приложения (создается при первом обращении)"""
+    global _executor
+    if _executor is None:
+        _executor = DatabaseExecutor()
+    return _executor
+
+
+def shutdown_executor():
+    """Дожидается фоновых запросов; вызывается перед закрытием пула соединений."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -1,9 +1,18 @@
 from PyQt6.QtWidgets import (QFrame, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QScrollArea, QTextEdit, QWidget,
-                             QMessageBox)
+                             QPushButton, QTextEdit, QMessageBox)
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt, QTimer, QDateTime
-from database import save_message, get_messages, delete_message, get_last_message_id, get_message_count
+from PyQt6.QtCore import Qt, QDateTime
+from backend import (save_message, get_messages, delete_own_message, get_conversation_state,
+                      get_last_tombstone_id, get_message_changes, DELETED, NOT_OWNER)
+from db_worker import get_executor
+from message_list import MessageListView
+from poll_scheduler import AdaptivePoller
+from realtime_client import event_id
+from realtime_rooms import group_room
+
+SYNC_INTERVAL = 5000  # мс, проверка целостности сразу после изменений
+SYNC_MAX_INTERVAL = 300000  # мс, проверка целостности в простое
+PAGE_SIZE = 50  # сообщений на странице истории
 
 
 class GroupChat(QFrame):
@@ -14,11 +23,7 @@ class GroupChat(QFrame):
         self.main_window = main_window
         self.last_update_time = QDateTime.currentDateTime()
         self.setFixedSize(1000, 900)
-        self.setStyleSheet("""
-            border: 2px solid #5F7470; 
-            background-color: transparent;
-            border-radius: 15px;
-        """)
+        self.setObjectName("groupChat")
 
         # Основной layout
         main_layout = QVBoxLayout(self)
@@ -32,12 +37,7 @@ class GroupChat(QFrame):
 
         chat_label = QLabel("Общий чат")
         chat_label.setFixedSize(200, 70)
-        chat_label.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 15px;
-            padding: 10px;
-            color: #003C30;
-        """)
+        chat_label.setObjectName("tabTitle")
         chat_label.setFont(QFont("Inter", 24))
         chat_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         top_row.addWidget(chat_label)
@@ -46,37 +46,19 @@ class GroupChat(QFrame):
 
         btn_home = QPushButton("Home")
         btn_home.setFixedSize(150, 70)
-        btn_home.setStyleSheet("""
-            QPushButton {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 24px;
-                color: #003C30;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-        """)
+        btn_home.setObjectName("tabButton")
         btn_home.setFont(QFont("Inter", 24))
         btn_home.clicked.connect(self.show_note_board)
         top_row.addWidget(btn_home)
 
         main_layout.addLayout(top_row)
 
-        # Область с сообщениями
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("border: none;")
-
-        self.messages_container = QWidget()
-        self.messages_layout = QVBoxLayout(self.messages_container)
-        self.messages_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.messages_layout.setSpacing(10)
-
-        self.scroll_area.setWidget(self.messages_container)
-        main_layout.addWidget(self.scroll_area)
+        # Область с сообщениями; более старые сообщения подгружаются при прокрутке к началу
+        self.message_list = MessageListView(self.user_name)
+        self.message_list.delete_requested.connect(self.delete_message)
+        self.message_list.top_reached.connect(self.load_older_messages)
+        self.messages = self.message_list.message_model
+        main_layout.addWidget(self.message_list)
 
         # Панель ввода сообщения
         input_layout = QHBoxLayout()
@@ -84,197 +66,303 @@ class GroupChat(QFrame):
         self.message_input = QTextEdit()
         self.message_input.setFixedHeight(80)
         self.message_input.setPlaceholderText("Введите сообщение...")
-        self.message_input.setStyleSheet("""
-            QTextEdit {
-                background-color: white;
-                border: 1px solid #5F7470;
-                border-radius: 10px;
-                padding: 10px;
-                font-size: 16px;
-            }
-        """)
+        self.message_input.setObjectName("messageInput")
         input_layout.addWidget(self.message_input)
 
         btn_send = QPushButton("Отправить")
         btn_send.setFixedSize(150, 80)
-        btn_send.setStyleSheet("""
-            QPushButton {
-                background-color: #5F7470;
-                color: white;
-                border-radius: 10px;
-                padding: 10px;
-                font-size: 18px;
-            }
-            QPushButton:hover {
-                background-color: #4D615E;
-            }
-        """)
+        btn_send.setObjectName("sendButton")
         btn_send.clicked.connect(self.send_message)
         input_layout.addWidget(btn_send)
 
         main_layout.addLayout(input_layout)
 
-        # Инициализация чата
-        self.message_ids = set()
-        self.load_all_messages()
-
-        # Таймеры для обновления
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.check_updates)
-        self.update_timer.start(800)  # Проверка каждые 800 мс
-
-        self.sync_timer = QTimer()
-        self.sync_timer.timeout.connect(self.full_sync)
-        self.sync_timer.start(5000)  # Полная синхронизация каждые 5 сек
+        # Инициализация чата; запросы к базе выполняются в фоновых потоках
+        self.executor = get_executor()
+        self.suspended = False
+        self.loaded = False
+        self.last_message_id = 0
+        self.last_tombstone_id = 0
+        self.oldest_message_id = None
+        self.has_older_messages = False
+        # Первые данные берем из стартового снимка главного окна, если он еще свежий
+        hydrate = getattr(main_window, "hydrate", None)
+        if hydrate is not None:
+            hydrate(self, self.load_latest_messages)
+        else:
+            self.load_latest_messages()
+
+        # Опрос изменений: чаще после активности, реже в простое
+        self.poller = AdaptivePoller(self.check_updates, parent=self)
+        self.sync_poller = AdaptivePoller(self.full_sync, SYNC_INTERVAL, SYNC_MAX_INTERVAL, parent=self)
+        self.poller.start()
+        self.sync_poller.start()
+
+        # Пока изменения приходят от сервера событий или из уведомлений базы, опрос остановлен
+        self.room = group_room(self.group_code)
+        self.realtime = getattr(main_window, "realtime", None)
+        if self.realtime is not None:
+            self.realtime.connected.connect(self.on_push_source_changed)
+            self.realtime.disconnected.connect(self.on_push_source_changed)
+            self.realtime.event_received.connect(self.on_realtime_event)
+            self.realtime.subscribe(self.room)
+
+        self.change_listener = getattr(main_window, "change_listener", None)
+        if self.change_listener is not None:
+            self.change_listener.active_changed.connect(self.on_push_source_changed)
+            self.change_listener.changed.connect(self.on_database_change)
+
+        self.update_polling()
 
     def show_note_board(self):
         self.main_window.content_stack.setCurrentIndex(1)
 
-    def load_all_messages(self):
-        """Загружает все сообщения и запоминает их ID"""
+    def load_latest_messages(self):
+        """Загружает последнюю страницу сообщений и запоминает позицию синхронизации"""
+        # Изменения, запрошенные до перезагрузки, больше не нужны
+        self.executor.cancel((self, "updates"))
+        self.executor.submit(self.fetch_latest_messages, key=(self, "load"), owner=self,
+                             on_result=self.show_latest_messages)
+
+    def fetch_latest_messages(self):
+        # Выполняется в фоновом потоке.
+        # Сначала фиксируем журнал удалений, чтобы не пропустить удаления во время загрузки
+        last_tombstone_id = get_last_tombstone_id(self.group_code)
+        return last_tombstone_id, get_messages(self.group_code, limit=PAGE_SIZE)
+
+    def hydrate(self, snapshot):
+        """Показывает последние сообщения из стартового снимка (см. MainWindow.hydrate)."""
+        self.show_latest_messages((snapshot["last_tombstone_id"], snapshot["messages"]))
+
+    def show_latest_messages(self, result):
+        last_tombstone_id, messages = result
         self.clear_messages()
-        messages = get_messages(self.group_code)
-        self.message_ids = {msg[0] for msg in messages}
+        self.loaded = True
+        self.last_tombstone_id = last_tombstone_id
+        self.has_older_messages = len(messages) == PAGE_SIZE
 
-        for msg_id, user, text, timestamp in messages:
-            self.add_message_widget(msg_id, user, text, timestamp)
+        self.messages.append_messages(messages)
+        if messages:
+            self.last_message_id = messages[-1][0]
+            self.oldest_message_id = messages[0][0]
 
         self.scroll_to_bottom()
 
+    def load_older_messages(self):
+        """Подгружает предыдущую страницу истории над уже показанными сообщениями"""
+        if not self.has_older_messages or self.oldest_message_id is None:
+            return
+
+        self.executor.submit(get_messages, self.group_code, before_id=self.oldest_message_id,
+                             limit=PAGE_SIZE, key=(self, "older"), replace=False, owner=self,
+                             on_result=self.show_older_messages)
+
+    def show_older_messages(self, messages):
+        # Пока страница загружалась, чат мог быть перезагружен
+        if messages and self.oldest_message_id is not None and messages[-1][0] >= self.oldest_message_id:
+            return
+
+        self.has_older_messages = len(messages) == PAGE_SIZE
+        if not messages:
+            return
+
+        self.message_list.prepend_messages(messages)
+        self.oldest_message_id = messages[0][0]
+
     def clear_messages(self):
-        for i in reversed(range(self.messages_layout.count())):
-            widget = self.messages_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-    def add_message_widget(self, msg_id, user, text, timestamp):
-        """Создает виджет сообщения"""
-        message_frame = QFrame()
-        message_frame.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 10px;
-            padding: 15px;
-        """)
-        message_frame.setFixedWidth(950)
-
-        layout = QVBoxLayout(message_frame)
-
-        # Header
-        header = QHBoxLayout()
-        user_label = QLabel(user)
-        user_label.setFont(QFont("Inter", 14, QFont.Weight.Bold))
-        user_label.setStyleSheet("color: #003C30;")
-        header.addWidget(user_label)
-
-        time_str = timestamp.strftime("%H:%M %d.%m.%Y") if not isinstance(timestamp, str) else timestamp
-        time_label = QLabel(time_str)
-        time_label.setFont(QFont("Inter", 10))
-        time_label.setStyleSheet("color: #5F7470; font-style: italic;")
-        header.addWidget(time_label, alignment=Qt.AlignmentFlag.AlignRight)
-        layout.addLayout(header)
-
-        # Text
-        text_label = QLabel(text)
-        text_label.setFont(QFont("Inter", 16))
-        text_label.setStyleSheet("color: #003C30;")
-        text_label.setWordWrap(True)
-        text_label.setContentsMargins(10, 5, 0, 0)
-        layout.addWidget(text_label)
-
-        # Delete button (only for user's own messages)
-        if user == self.user_name:
-            footer = QHBoxLayout()
-            footer.addStretch()
-
-            btn_delete = QPushButton("Удалить")
-            btn_delete.setFixedSize(100, 30)
-            btn_delete.setStyleSheet("""
-                QPushButton {
-                    background-color: #FF6961;
-                    color: white;
-                    border-radius: 5px;
-                    padding: 5px;
-                    font-size: 12px;
-                }
-                QPushButton:hover {
-                    background-color: #D9534F;
-                }
-            """)
-            btn_delete.clicked.connect(lambda: self.delete_message(msg_id))
-            footer.addWidget(btn_delete)
-            layout.addLayout(footer)
-
-        self.messages_layout.addWidget(message_frame)
+        self.messages.clear()
+        self.last_message_id = 0
+        self.oldest_message_id = None
 
     def send_message(self):
         text = self.message_input.toPlainText().strip()
         if text:
-            save_message(self.group_code, self.user_name, text)
             self.message_input.clear()
             self.last_update_time = QDateTime.currentDateTime()
-            self.check_updates(force=True)
+            self.poller.activity()
+            self.executor.submit(self.save_and_fetch, text, self.last_message_id, self.last_tombstone_id,
+                                 owner=self, on_result=self.on_message_sent,
+                                 on_error=lambda e: self.on_send_failed(text, e))
+
+    def save_and_fetch(self, text, last_message_id, last_tombstone_id):
+        # Выполняется в фоновом потоке: сохраняем сообщение и сразу забираем изменения
+        msg_id = save_message(self.group_code, self.user_name, text)
+        return msg_id, get_message_changes(self.group_code, last_message_id, last_tombstone_id)
+
+    def on_message_sent(self, result):
+        msg_id, (messages, deleted) = result
+        self.apply_changes(messages, deleted)
+        for message in messages:
+            if message[0] == msg_id:
+                self.publish_message(message)
+        self.scroll_to_bottom()
+
+    def on_send_failed(self, text, error):
+        print(f"Ошибка при отправке сообщения: {error}")
+        # Возвращаем текст, чтобы его не пришлось набирать заново
+        if not self.message_input.toPlainText().strip():
+            self.message_input.setPlainText(text)
 
     def delete_message(self, msg_id):
         msg_box = QMessageBox()
+        msg_box.setObjectName("confirmDialog")
         msg_box.setWindowTitle('Подтверждение')
         msg_box.setText('Вы уверены, что хотите удалить это сообщение?')
         msg_box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         msg_box.setDefaultButton(QMessageBox.StandardButton.No)
 
-        # Устанавливаем светлый стиль
-        msg_box.setStyleSheet("""
-            QMessageBox {
-                background-color: #F0F0F0;
-            }
-            QLabel {
-                color: #003C30;
-            }
-            QPushButton {
-                background-color: #E0E2DB;
-                color: #003C30;
-                border-radius: 5px;
-                padding: 5px 10px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-        """)
-
         reply = msg_box.exec()
 
         if reply == QMessageBox.StandardButton.Yes:
-            delete_message(msg_id)
-            self.message_ids.discard(msg_id)
-            self.last_update_time = QDateTime.currentDateTime()
-            self.check_updates(force=True)
+            # Убираем сообщение из чата только после удаления в базе: сверка с базой
+            # не вернула бы сообщение, которое убрали раньше времени
+            self.executor.submit(delete_own_message, self.group_code, msg_id, self.user_name, owner=self,
+                                 on_result=lambda result: self.on_message_deleted(msg_id, result),
+                                 on_error=lambda e: print(f"Ошибка при удалении сообщения: {e}"))
+
+    def on_message_deleted(self, msg_id, result):
+        if result == NOT_OWNER:
+            QMessageBox.warning(
+                self,
+                "Ошибка",
+                "Вы можете удалять только свои сообщения!",
+                QMessageBox.StandardButton.Ok
+            )
+            return
+        # NOT_FOUND: сообщение уже удалили в другой сессии, убираем его без уведомления
+        if result == DELETED:
+            self.publish_change("message_deleted", {"id": msg_id})
+        self.messages.remove_message(msg_id)
+        self.last_update_time = QDateTime.currentDateTime()
+        self.check_updates()
 
     def check_updates(self, force=False):
-        """Проверяет новые и удаленные сообщения"""
-        try:
-            current_count = get_message_count(self.group_code)
-            current_ids = {msg[0] for msg in get_messages(self.group_code)}
-
-            # Если количество изменилось или принудительное обновление
-            if force or len(self.message_ids) != current_count:
-                self.load_all_messages()
-                return
-
-            # Проверяем отдельные изменения
-            new_ids = current_ids - self.message_ids
-            removed_ids = self.message_ids - current_ids
-
-            if new_ids or removed_ids:
-                self.load_all_messages()
-
-        except Exception as e:
-            print(f"Ошибка при проверке обновлений: {e}")
+        """Догружает новые сообщения и убирает удаленные (только изменения)"""
+        if force:
+            self.load_latest_messages()
+            return
+        # До загрузки первой страницы изменения не нужны
+        if not self.loaded or self.executor.is_pending((self, "load")):
+            return
+
+        # Пока предыдущий запрос изменений выполняется, повторные объединяются в один
+        self.executor.submit(self.fetch_changes, self.last_message_id, self.last_tombstone_id,
+                             self.oldest_message_id or 0, self.messages.state(),
+                             key=(self, "updates"), replace=False, owner=self,
+                             on_result=lambda changes: self.apply_changes(*changes),
+                             on_error=lambda e: print(f"Ошибка при проверке обновлений: {e}"))
+
+    def fetch_changes(self, last_message_id, last_tombstone_id, first_message_id, local_state):
+        # Выполняется в фоновом потоке. Сами изменения запрашиваем, только если
+        # состояние чата в базе отличается от показанного
+        if get_conversation_state(self.group_code, first_message_id) == local_state:
+            return [], []
+        return get_message_changes(self.group_code, last_message_id, last_tombstone_id)
+
+    def apply_changes(self, messages, deleted):
+        """Добавляет новые сообщения и убирает удаленные.
+        Если чат прокручен до конца, он останется внизу."""
+        deleted_ids = set()
+        for tombstone_id, msg_id in deleted:
+            deleted_ids.add(msg_id)
+            self.messages.remove_message(msg_id)
+            self.last_tombstone_id = max(self.last_tombstone_id, tombstone_id)
+
+        if messages or deleted:
+            self.poller.activity()
+            self.sync_poller.activity()
+
+        # Сообщение могло быть удалено сразу после отправки
+        new_messages = [message for message in messages if message[0] not in deleted_ids]
+        self.messages.append_messages(new_messages)
+        if messages:
+            self.last_message_id = max(self.last_message_id, messages[-1][0])
+        if new_messages and self.oldest_message_id is None:
+            self.oldest_message_id = new_messages[0][0]
 
     def full_sync(self):
-        """Полная синхронизация для надежности"""
-        self.check_updates(force=True)
+        """Проверка целостности: полная перезагрузка только при расхождении"""
+        if not self.loaded or self.executor.is_pending((self, "load")):
+            return
+        self.executor.submit(get_conversation_state, self.group_code, self.oldest_message_id or 0,
+                             key=(self, "sync"), replace=False, owner=self,
+                             on_result=self.on_conversation_state,
+                             on_error=lambda e: print(f"Ошибка при синхронизации: {e}"))
+
+    def on_conversation_state(self, state):
+        # Сообщения, пришедшие после запроса, догрузятся следующей проверкой
+        last_id = self.messages.state()[0]
+        if (state != self.messages.state() and last_id <= state[0]
+                and not self.executor.is_pending((self, "updates"))):
+            self.load_latest_messages()
+
+    def publish_change(self, event, data):
+        """Сообщает остальным клиентам группы об изменении"""
+        if self.realtime is not None:
+            self.realtime.publish(self.room, event, data)
+
+    def publish_message(self, message):
+        self.publish_change("message_created", {"id": message[0]})
+
+    def update_polling(self):
+        """Опрашивает базу, только если вкладка открыта и изменения не приходят сами"""
+        pushed = ((self.realtime is not None and self.realtime.is_connected) or
+                  (self.change_listener is not None and self.change_listener.is_active))
+        if pushed or self.suspended:
+            self.poller.stop()
+            self.sync_poller.stop()
+        elif not self.poller.is_active:
+            self.poller.start()
+            self.sync_poller.start()
+
+    def suspend(self):
+        """Вкладка скрыта: останавливаем опрос и отписываемся от событий"""
+        if self.suspended:
+            return
+        self.suspended = True
+        self.update_polling()
+        if self.realtime is not None:
+            self.realtime.unsubscribe(self.room)
+
+    def resume(self):
+        """Вкладка снова открыта"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        if self.realtime is not None:
+            self.realtime.subscribe(self.room)
+        self.update_polling()
+        # Догружаем изменения, пропущенные за время простоя
+        self.check_updates()
+
+    def on_push_source_changed(self, *args):
+        """Сервер событий или уведомления базы подключились либо отключились"""
+        self.update_polling()
+        if not self.poller.is_active and not self.suspended:
+            # Догружаем изменения, пропущенные до подписки
+            self.check_updates()
+
+    def on_database_change(self, table, operation, entity_id, payload):
+        """Уведомление базы: загружаем изменения, только если их еще нет в чате"""
+        if self.suspended or table != "group_messages":
+            return
+        if operation == "INSERT" and entity_id <= self.last_message_id:
+            return
+        if operation == "DELETE" and entity_id not in self.messages:
+            return
+        self.check_updates()
+
+    def on_realtime_event(self, room, event, data):
+        """Событие сервера только подсказывает, что чат изменился: сами изменения
+        загружаем из базы, как при опросе, чтобы не показывать чужие данные без проверки"""
+        if self.suspended or room != self.room or event not in ("message_created", "message_deleted"):
+            return
+        msg_id = event_id(data)
+        if event == "message_created" and msg_id is not None and msg_id <= self.last_message_id:
+            return
+        if event == "message_deleted" and msg_id is not None and msg_id not in self.messages:
+            return
+        self.check_updates()
 
     def scroll_to_bottom(self):
-        self.scroll_area.verticalScrollBar().setValue(
-            self.scroll_area.verticalScrollBar().maximum()
-        )
\ No newline at end of file
+        self.message_list.scroll_to_bottom()
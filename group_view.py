@@ -1,10 +1,9 @@
-from PyQt6.QtWidgets import (QWidget, QLabel, QVBoxLayout, QHBoxLayout, QFrame,
-                             QScrollArea, QListWidget, QListWidgetItem, QPushButton,
-                             QMessageBox)
+from PyQt6.QtWidgets import (QLabel, QVBoxLayout, QHBoxLayout, QFrame, QListWidget,
+                             QListWidgetItem, QPushButton, QMessageBox)
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
-import psycopg2
-from psycopg2.extras import DictCursor
+from backend import get_group_overview, remove_group_member, delete_group
+from db_worker import get_executor
 
 
 class GroupView(QFrame):
@@ -13,11 +12,7 @@ class GroupView(QFrame):
         self.group_code = group_code
         self.main_window = main_window
         self.setFixedSize(1000, 900)
-        self.setStyleSheet("""
-            border: 2px solid #5F7470; 
-            background-color: transparent;
-            border-radius: 15px;
-        """)
+        self.setObjectName("groupView")
 
         # Основной layout
         main_layout = QVBoxLayout(self)
@@ -32,12 +27,7 @@ class GroupView(QFrame):
         # Надпись "Участники" слева
         members_label = QLabel("Участники")
         members_label.setFixedSize(200, 70)
-        members_label.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 15px;
-            padding: 10px;
-            color: #003C30;
-        """)
+        members_label.setObjectName("tabTitle")
         members_label.setFont(QFont("Inter", 24))
         members_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         top_row.addWidget(members_label)
@@ -48,12 +38,7 @@ class GroupView(QFrame):
         # Название группы (по центру)
         self.group_name_label = QLabel()
         self.group_name_label.setFixedSize(300, 70)
-        self.group_name_label.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 15px;
-            padding: 10px;
-            color: #003C30;
-        """)
+        self.group_name_label.setObjectName("tabTitle")
         self.group_name_label.setFont(QFont("Inter", 24))
         self.group_name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         top_row.addWidget(self.group_name_label)
@@ -64,19 +49,7 @@ class GroupView(QFrame):
         # Кнопка Home справа
         btn_home = QPushButton("Home")
         btn_home.setFixedSize(150, 70)
-        btn_home.setStyleSheet("""
-            QPushButton {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 24px;
-                color: #003C30;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-        """)
+        btn_home.setObjectName("tabButton")
         btn_home.setFont(QFont("Inter", 24))
         btn_home.clicked.connect(self.show_note_board)
         top_row.addWidget(btn_home)
@@ -85,44 +58,14 @@ class GroupView(QFrame):
 
         # Список участников
         self.members_list = QListWidget()
-        self.members_list.setStyleSheet("""
-            QListWidget {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                border: none;
-                color: #003C30;
-            }
-            QListWidget::item {
-                padding: 10px;
-                border-bottom: 1px solid #5F7470;
-            }
-            QListWidget::item:selected {
-                background-color: #D2D4C8;
-            }
-        """)
+        self.members_list.setObjectName("usersList")
         self.members_list.setFont(QFont("Inter", 18))
         main_layout.addWidget(self.members_list)
 
         # Кнопка удаления участника
         self.btn_remove_member = QPushButton("Исключить участника")
         self.btn_remove_member.setFixedHeight(60)
-        self.btn_remove_member.setStyleSheet("""
-            QPushButton {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 20px;
-                color: #003C30;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-            QPushButton:disabled {
-                color: #5F7470;
-            }
-        """)
+        self.btn_remove_member.setObjectName("groupButton")
         self.btn_remove_member.setFont(QFont("Inter", 20))
         self.btn_remove_member.clicked.connect(self.remove_member)
         main_layout.addWidget(self.btn_remove_member)
@@ -130,22 +73,7 @@ class GroupView(QFrame):
         # Кнопка выхода из группы
         self.btn_leave_group = QPushButton("Покинуть группу")
         self.btn_leave_group.setFixedHeight(60)
-        self.btn_leave_group.setStyleSheet("""
-            QPushButton {
-                background-color: #FF6961;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 20px;
-                color: white;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D9534F;
-            }
-            QPushButton:disabled {
-                background-color: #5F7470;
-            }
-        """)
+        self.btn_leave_group.setObjectName("groupDangerButton")
         self.btn_leave_group.setFont(QFont("Inter", 20))
         self.btn_leave_group.clicked.connect(self.leave_group)
         main_layout.addWidget(self.btn_leave_group)
@@ -153,92 +81,79 @@ class GroupView(QFrame):
         # Кнопка удаления группы
         self.btn_delete_group = QPushButton("Удалить группу")
         self.btn_delete_group.setFixedHeight(60)
-        self.btn_delete_group.setStyleSheet("""
-            QPushButton {
-                background-color: #FF6961;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 20px;
-                color: white;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D9534F;
-            }
-            QPushButton:disabled {
-                background-color: #5F7470;
-            }
-        """)
+        self.btn_delete_group.setObjectName("groupDangerButton")
         self.btn_delete_group.setFont(QFont("Inter", 20))
         self.btn_delete_group.clicked.connect(self.delete_group)
         main_layout.addWidget(self.btn_delete_group)
 
         # Загружаем данные группы
-        self.load_group_data()
+        self.suspended = False
+        self.stale = False  # за время простоя вкладки состав группы менялся
+        # Первые данные берем из стартового снимка главного окна, если он еще свежий
+        hydrate = getattr(main_window, "hydrate", None)
+        if hydrate is not None:
+            hydrate(self, self.load_group_data)
+        else:
+            self.load_group_data()
+
+        # Состав группы обновляется по уведомлениям базы
+        self.change_listener = getattr(main_window, "change_listener", None)
+        if self.change_listener is not None:
+            self.change_listener.changed.connect(self.on_database_change)
 
     def show_note_board(self):
         """Переключает на доску заметок"""
         self.main_window.content_stack.setCurrentIndex(1)
 
+    def suspend(self):
+        """Вкладка скрыта: изменения состава группы только отмечаем"""
+        self.suspended = True
+
+    def resume(self):
+        """Вкладка снова открыта: перезагружаем данные, если они могли измениться"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        if self.stale or self.change_listener is None or not self.change_listener.is_active:
+            self.stale = False
+            self.load_group_data()
+
+    def on_database_change(self, table, operation, entity_id, payload):
+        if table != "users":
+            return
+        if self.suspended:
+            self.stale = True
+        else:
+            self.load_group_data()
+
     def load_group_data(self):
-        """Загружает название группы и список участников из базы данных."""
-        try:
-            conn = psycopg2.connect(
-                dbname="grouptasker",
-                user="postgres",
-                password="123456",
-                host="localhost"
-            )
-            with conn.cursor(cursor_factory=DictCursor) as cursor:
-                # Получаем название группы и создателя
-                cursor.execute("""
-                    SELECT g.name, u.name as creator 
-                    FROM groups g
-                    JOIN users u ON g.id = u.group_id
-                    WHERE g.code = %s
-                    ORDER BY u.id LIMIT 1;
-                """, (self.group_code,))
-                group_info = cursor.fetchone()
-
-                if group_info:
-                    self.group_name_label.setText(group_info['name'])
-                    self.is_creator = (group_info['creator'] == self.main_window.user_name)
-
-                    # Активируем кнопки в зависимости от роли пользователя
-                    self.btn_remove_member.setEnabled(self.is_creator)
-                    self.btn_delete_group.setEnabled(self.is_creator)
-                    self.btn_leave_group.setEnabled(not self.is_creator)
-
-                # Получаем список участников
-                cursor.execute("""
-                    SELECT u.name FROM users u
-                    JOIN groups g ON u.group_id = g.id
-                    WHERE g.code = %s
-                    ORDER BY u.name;
-                """, (self.group_code,))
-
-                self.members_list.clear()
-                for user in cursor.fetchall():
-                    item = QListWidgetItem(user['name'])
-                    self.members_list.addItem(item)
-
-        except Exception as e:
-            msg = QMessageBox()
-            msg.setIcon(QMessageBox.Icon.Critical)
-            msg.setWindowTitle("Ошибка")
-            msg.setText(f"Ошибка при загрузке данных группы: {e}")
-            msg.setStyleSheet("""
-                QMessageBox {
-                    background-color: #F0F0F0;
-                }
-                QLabel {
-                    color: #003C30;
-                }
-            """)
-            msg.exec()
-        finally:
-            if conn:
-                conn.close()
+        """Загружает название группы и список участников из базы данных в фоновом потоке."""
+        get_executor().submit(get_group_overview, self.group_code, key=(self, "load"), owner=self,
+                              on_result=self.show_group_data, on_error=self.show_load_error)
+
+    def hydrate(self, snapshot):
+        """Показывает название и участников группы из стартового снимка (см. MainWindow.hydrate)."""
+        self.show_group_data(snapshot["group"])
+
+    def show_group_data(self, group):
+        if group is None:
+            return
+        name, creator, members = group
+        self.group_name_label.setText(name)
+        self.is_creator = (creator == self.main_window.user_name)
+
+        # Активируем кнопки в зависимости от роли пользователя
+        self.btn_remove_member.setEnabled(self.is_creator)
+        self.btn_delete_group.setEnabled(self.is_creator)
+        self.btn_leave_group.setEnabled(not self.is_creator)
+
+        self.members_list.clear()
+        for member in members:
+            item = QListWidgetItem(member)
+            self.members_list.addItem(item)
+
+    def show_load_error(self, e):
+        self.show_error(f"Ошибка при загрузке данных группы: {e}")
 
     def remove_member(self):
         """Удаляет выбранного участника из группы."""
@@ -248,14 +163,7 @@ class GroupView(QFrame):
             msg.setIcon(QMessageBox.Icon.Warning)
             msg.setWindowTitle("Ошибка")
             msg.setText("Выберите участника для исключения")
-            msg.setStyleSheet("""
-                QMessageBox {
-                    background-color: #F0F0F0;
-                }
-                QLabel {
-                    color: #003C30;
-                }
-            """)
+            msg.setObjectName("messageDialog")
             msg.exec()
             return
 
@@ -265,14 +173,7 @@ class GroupView(QFrame):
             msg.setIcon(QMessageBox.Icon.Warning)
             msg.setWindowTitle("Ошибка")
             msg.setText("Вы не можете исключить себя")
-            msg.setStyleSheet("""
-                QMessageBox {
-                    background-color: #F0F0F0;
-                }
-                QLabel {
-                    color: #003C30;
-                }
-            """)
+            msg.setObjectName("messageDialog")
             msg.exec()
             return
 
@@ -282,65 +183,20 @@ class GroupView(QFrame):
         msg.setText(f'Вы уверены, что хотите исключить участника {member_name}?')
         msg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         msg.setDefaultButton(QMessageBox.StandardButton.No)
-        msg.setStyleSheet("""
-            QMessageBox {
-                background-color: #F0F0F0;
-            }
-            QLabel {
-                color: #003C30;
-            }
-        """)
+        msg.setObjectName("messageDialog")
 
         if msg.exec() == QMessageBox.StandardButton.Yes:
-            try:
-                conn = psycopg2.connect(
-                    dbname="grouptasker",
-                    user="postgres",
-                    password="123456",
-                    host="localhost"
-                )
-                with conn.cursor() as cursor:
-                    cursor.execute("""
-                        DELETE FROM users 
-                        WHERE name = %s AND group_id = (
-                            SELECT id FROM groups WHERE code = %s
-                        );
-                    """, (member_name, self.group_code))
-                    conn.commit()
-
-                    self.load_group_data()
-
-                    msg = QMessageBox()
-                    msg.setIcon(QMessageBox.Icon.Information)
-                    msg.setWindowTitle("Успех")
-                    msg.setText(f"Участник {member_name} исключен")
-                    msg.setStyleSheet("""
-                        QMessageBox {
-                            background-color: #F0F0F0;
-                        }
-                        QLabel {
-                            color: #003C30;
-                        }
-                    """)
-                    msg.exec()
-
-            except Exception as e:
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Icon.Critical)
-                msg.setWindowTitle("Ошибка")
-                msg.setText(f"Не удалось исключить участника: {str(e)}")
-                msg.setStyleSheet("""
-                    QMessageBox {
-                        background-color: #F0F0F0;
-                    }
-                    QLabel {
-                        color: #003C30;
-                    }
-                """)
-                msg.exec()
-            finally:
-                if conn:
-                    conn.close()
+            get_executor().submit(remove_group_member, self.group_code, member_name, owner=self,
+                                  on_result=lambda result: self.on_member_removed(member_name, result),
+                                  on_error=lambda e: self.show_error(f"Не удалось исключить участника: {e}"))
+
+    def on_member_removed(self, member_name, removed):
+        # Список участников перезагружаем в любом случае: его могли изменить в другой сессии
+        self.load_group_data()
+        if not removed:
+            self.show_error(f"Участник {member_name} не найден в группе")
+            return
+        self.show_info(f"Участник {member_name} исключен")
 
     def leave_group(self):
         """Позволяет пользователю покинуть группу."""
@@ -350,65 +206,12 @@ class GroupView(QFrame):
         msg.setText('Вы уверены, что хотите покинуть группу?')
         msg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         msg.setDefaultButton(QMessageBox.StandardButton.No)
-        msg.setStyleSheet("""
-            QMessageBox {
-                background-color: #F0F0F0;
-            }
-            QLabel {
-                color: #003C30;
-            }
-        """)
+        msg.setObjectName("messageDialog")
 
         if msg.exec() == QMessageBox.StandardButton.Yes:
-            try:
-                conn = psycopg2.connect(
-                    dbname="grouptasker",
-                    user="postgres",
-                    password="123456",
-                    host="localhost"
-                )
-                with conn.cursor() as cursor:
-                    cursor.execute("""
-                        DELETE FROM users 
-                        WHERE name = %s AND group_id = (
-                            SELECT id FROM groups WHERE code = %s
-                        );
-                    """, (self.main_window.user_name, self.group_code))
-                    conn.commit()
-
-                    msg = QMessageBox()
-                    msg.setIcon(QMessageBox.Icon.Information)
-                    msg.setWindowTitle("Успех")
-                    msg.setText("Вы покинули группу")
-                    msg.setStyleSheet("""
-                        QMessageBox {
-                            background-color: #F0F0F0;
-                        }
-                        QLabel {
-                            color: #003C30;
-                        }
-                    """)
-                    msg.exec()
-
-                    self.main_window.on_back_click(None)
-
-            except Exception as e:
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Icon.Critical)
-                msg.setWindowTitle("Ошибка")
-                msg.setText(f"Не удалось покинуть группу: {str(e)}")
-                msg.setStyleSheet("""
-                    QMessageBox {
-                        background-color: #F0F0F0;
-                    }
-                    QLabel {
-                        color: #003C30;
-                    }
-                """)
-                msg.exec()
-            finally:
-                if conn:
-                    conn.close()
+            get_executor().submit(remove_group_member, self.group_code, self.main_window.user_name,
+                                  owner=self, on_result=lambda result: self.on_group_left("Вы покинули группу"),
+                                  on_error=lambda e: self.show_error(f"Не удалось покинуть группу: {e}"))
 
     def delete_group(self):
         """Удаляет группу полностью."""
@@ -418,57 +221,29 @@ class GroupView(QFrame):
         msg.setText('Вы уверены, что хотите удалить группу? Это действие нельзя отменить!')
         msg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         msg.setDefaultButton(QMessageBox.StandardButton.No)
-        msg.setStyleSheet("""
-            QMessageBox {
-                background-color: #F0F0F0;
-            }
-            QLabel {
-                color: #003C30;
-            }
-        """)
+        msg.setObjectName("messageDialog")
 
         if msg.exec() == QMessageBox.StandardButton.Yes:
-            try:
-                conn = psycopg2.connect(
-                    dbname="grouptasker",
-                    user="postgres",
-                    password="123456",
-                    host="localhost"
-                )
-                with conn.cursor() as cursor:
-                    cursor.execute("DELETE FROM groups WHERE code = %s;", (self.group_code,))
-                    conn.commit()
-
-                    msg = QMessageBox()
-                    msg.setIcon(QMessageBox.Icon.Information)
-                    msg.setWindowTitle("Успех")
-                    msg.setText("Группа удалена")
-                    msg.setStyleSheet("""
-                        QMessageBox {
-                            background-color: #F0F0F0;
-                        }
-                        QLabel {
-                            color: #003C30;
-                        }
-                    """)
-                    msg.exec()
-
-                    self.main_window.on_back_click(None)
-
-            except Exception as e:
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Icon.Critical)
-                msg.setWindowTitle("Ошибка")
-                msg.setText(f"Не удалось удалить группу: {str(e)}")
-                msg.setStyleSheet("""
-                    QMessageBox {
-                        background-color: #F0F0F0;
-                    }
-                    QLabel {
-                        color: #003C30;
-                    }
-                """)
-                msg.exec()
-            finally:
-                if conn:
-                    conn.close()
\ No newline at end of file
+            get_executor().submit(delete_group, self.group_code, owner=self,
+                                  on_result=lambda result: self.on_group_left("Группа удалена"),
+                                  on_error=lambda e: self.show_error(f"Не удалось удалить группу: {e}"))
+
+    def on_group_left(self, text):
+        self.show_info(text)
+        self.main_window.on_back_click(None)
+
+    def show_info(self, text):
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Icon.Information)
+        msg.setWindowTitle("Успех")
+        msg.setText(text)
+        msg.setObjectName("messageDialog")
+        msg.exec()
+
+    def show_error(self, text):
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Icon.Critical)
+        msg.setWindowTitle("Ошибка")
+        msg.setText(text)
+        msg.setObjectName("messageDialog")
+        msg.exec()
@@ -3,7 +3,7 @@ from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
 import random
 import pyperclip
-from database import create_group
+from backend import create_group
 from main_window import MainWindow
 
 
@@ -100,7 +100,7 @@ class GroupCreateWindow(QWidget):
                 QMessageBox.information(self, "Группа создана", f"Код группы: {group_code} (скопирован)")
 
                 # Открываем главное окно с передачей кода группы
-                main_window = MainWindow(self.stacked_widget, user_name, group_code)
+                main_window = MainWindow(self.stacked_widget, user_name, group_code, password)
                 self.stacked_widget.addWidget(main_window)
                 self.stacked_widget.setCurrentWidget(main_window)
 
@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QMessageBox
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
-from database import check_group_exists, check_user_exists, add_user_to_group, check_user_exists_in_group, verify_user_password
+from backend import check_group_exists, add_user_to_group, check_user_exists_in_group, verify_user_password
 from main_window import MainWindow
 
 
@@ -107,7 +107,7 @@ class GroupJoinWindow(QWidget):
         QMessageBox.information(self, "Успех", "Вы успешно вошли в группу")
 
         # Открываем главное окно с передачей кода группы
-        main_window = MainWindow(self.stacked_widget, user_name, group_code)
+        main_window = MainWindow(self.stacked_widget, user_name, group_code, password)
         self.stacked_widget.addWidget(main_window)
         self.stacked_widget.setCurrentWidget(main_window)
         self.close()
\ No newline at end of file
@@ -1,8 +1,12 @@
-from PyQt6.QtWidgets import QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QStackedWidget, QSpacerItem, QSizePolicy
+from PyQt6.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QStackedWidget, QSpacerItem, QSizePolicy
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
 from groupcreate import GroupCreateWindow
 from groupjoin import GroupJoinWindow
+from backend import close_pool
+from db_worker import shutdown_executor
+import qt_profiler
+import theme
 
 
 class GroupTaskerApp(QWidget):
@@ -13,7 +17,7 @@ class GroupTaskerApp(QWidget):
     def init_ui(self):
         self.setWindowTitle("GroupTasker")
         self.setGeometry(100, 100, 800, 600)
-        self.setStyleSheet("background-color: #F0F0F0;")
+        self.setObjectName("appRoot")
 
         self.stacked_widget = QStackedWidget(self)
 
@@ -24,34 +28,22 @@ class GroupTaskerApp(QWidget):
 
         title = QLabel("GroupTasker")
         title.setFont(QFont("Inter", 64))
-        title.setStyleSheet("color: #5F7470;")
+        title.setObjectName("appTitle")
         title.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Добавляем небольшое пространство сверху
         self.main_layout.addItem(QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
         self.main_layout.addWidget(title)
 
-        button_style = (
-            "QPushButton {"
-            "background-color: #D2D4C8;"
-            "border-radius: 15px;"
-            "font-size: 32px; font-weight: normal;"
-            "color: #003C30;"
-            "width: 500px;"
-            "height: 175px;"
-            "}"
-            "QPushButton:hover { background-color: #C2C4B8; }"
-        )
-
         btn_create = QPushButton("Создать группу")
         btn_create.setFont(QFont("Inter", 32))
-        btn_create.setStyleSheet(button_style)
+        btn_create.setObjectName("startButton")
         btn_create.setFixedSize(500, 175)
         btn_create.clicked.connect(self.create_group_window)
 
         btn_join = QPushButton("Войти в группу (код группы)")
         btn_join.setFont(QFont("Inter", 32))
-        btn_join.setStyleSheet(button_style)
+        btn_join.setObjectName("startButton")
         btn_join.setFixedSize(500, 175)
         btn_join.clicked.connect(self.join_group_window)
 
@@ -86,7 +78,12 @@ class GroupTaskerApp(QWidget):
 
 
 if __name__ == "__main__":
-    app = QApplication([])
+    # С GROUPTASKER_PROFILE_UI=1 приложение замеряет задержки цикла событий (см. qt_profiler.py)
+    app = qt_profiler.create_application([])
+    theme.apply(app)
+    # Сначала дожидаемся фоновых запросов, затем закрываем соединения
+    app.aboutToQuit.connect(shutdown_executor)
+    app.aboutToQuit.connect(close_pool)
     window = GroupTaskerApp()
     window.show()
     app.exec()
@@ -1,26 +1,59 @@
-from PyQt6.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QListWidget, QFrame, QStackedWidget
+from PyQt6.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QFrame, QStackedWidget
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QEvent, QElapsedTimer
 from note_board import NoteBoard
 from group_view import GroupView
 from task_board import TaskBoard  # Импорт новой вкладки задач
-from group_chat import GroupChat
+from group_chat import GroupChat, PAGE_SIZE
 from personal_chat import PersonalChat
+from realtime_client import RealtimeClient
+from change_listener import ChangeListener
+from db_worker import get_executor
+from backend import USE_API, get_session_bootstrap
+
+# Сколько миллисекунд после загрузки вкладки могут брать данные из стартового снимка
+BOOTSTRAP_MAX_AGE = 5000
 
 
 class MainWindow(QWidget):
-    def __init__(self, stacked_widget, user_name, group_code):
+    def __init__(self, stacked_widget, user_name, group_code, password=None):
         super().__init__()
         self.stacked_widget = stacked_widget
         self.user_name = user_name
         self.group_code = group_code
 
+        # Подключение к серверу событий реального времени (сервер проверяет пароль)
+        auth = {"group_code": group_code, "user_name": user_name, "password": password}
+        self.realtime = RealtimeClient(auth=auth, parent=self)
+        self.realtime.start()
+
+        # Уведомления базы данных об изменениях группы (при работе через API
+        # у клиента нет соединения с базой, изменения приходят от сервера событий)
+        self.change_listener = None
+        if not USE_API:
+            self.change_listener = ChangeListener(self.group_code, self)
+            self.change_listener.start()
+
+        # Стартовый снимок данных группы: вкладки, открытые вскоре после входа,
+        # показывают его вместо отдельных запросов. Любое изменение группы делает
+        # снимок устаревшим — тогда вкладки загружают данные сами.
+        self.bootstrap = None
+        self.bootstrap_pending = True
+        self.bootstrap_stale = False
+        self.bootstrap_waiting = []  # (вкладка, собственная загрузка вкладки)
+        self.bootstrap_timer = QElapsedTimer()
+        self.realtime.event_received.connect(self.drop_bootstrap)
+        if self.change_listener is not None:
+            self.change_listener.changed.connect(self.drop_bootstrap)
+        get_executor().submit(get_session_bootstrap, self.group_code, self.user_name, PAGE_SIZE,
+                              owner=self, on_result=self.on_bootstrap, on_error=self.on_bootstrap_error)
+
         self.init_ui()
 
     def init_ui(self):
         self.setWindowTitle("GroupTasker - Главное окно")
         self.setGeometry(100, 100, 1440, 1080)
-        self.setStyleSheet("background-color: #F0F0F0;")
+        self.setObjectName("mainWindow")
 
         main_layout = QVBoxLayout(self)
 
@@ -29,17 +62,17 @@ class MainWindow(QWidget):
 
         btn_back = QLabel("Back")
         btn_back.setFont(QFont("Inter", 48))
-        btn_back.setStyleSheet("color: #5F7470;")
+        btn_back.setObjectName("headerLabel")
         btn_back.mousePressEvent = self.on_back_click
 
         lbl_username = QLabel(self.user_name)
         lbl_username.setFont(QFont("Inter", 48))
-        lbl_username.setStyleSheet("color: #5F7470;")
+        lbl_username.setObjectName("headerLabel")
         lbl_username.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         lbl_appname = QLabel("GroupTasker")
         lbl_appname.setFont(QFont("Inter", 48))
-        lbl_appname.setStyleSheet("color: #5F7470;")
+        lbl_appname.setObjectName("headerLabel")
         lbl_appname.setAlignment(Qt.AlignmentFlag.AlignRight)
 
         header_layout.addWidget(btn_back)
@@ -56,10 +89,7 @@ class MainWindow(QWidget):
         # Боковое меню
         menu_frame = QFrame()
         menu_frame.setFixedSize(250, 900)
-        menu_frame.setStyleSheet("""
-            background-color: #E0E2DB; 
-            border-radius: 15px;
-        """)
+        menu_frame.setObjectName("menuFrame")
 
         menu_layout = QVBoxLayout(menu_frame)
         menu_layout.setContentsMargins(20, 20, 20, 20)
@@ -67,20 +97,7 @@ class MainWindow(QWidget):
         def create_menu_button(text):
             btn = QPushButton(text)
             btn.setFont(QFont("Inter", 24))
-            btn.setStyleSheet("""
-                QPushButton { 
-                    color: #003C30; 
-                    background-color: transparent; 
-                    border: none; 
-                    text-align: left;
-                    padding: 10px;
-                }
-                QPushButton:hover { 
-                    font-weight: bold; 
-                    background-color: #D2D4C8;
-                    border-radius: 10px;
-                }
-            """)
+            btn.setObjectName("menuButton")
             return btn
 
         btn_group = create_menu_button("Группа")
@@ -91,19 +108,24 @@ class MainWindow(QWidget):
         # Создаем stacked widget для переключения между вкладками
         self.content_stack = QStackedWidget()
 
-        # Создаем все виджеты
-        self.group_view = GroupView(self.group_code, self)
-        self.note_board = NoteBoard(self.group_code, self.user_name)
-        self.task_board = TaskBoard(self.group_code, self.user_name, self) # Новая вкладка задач
-        self.group_chat = GroupChat(self.group_code, self.user_name, self)
-        self.personal_chat = PersonalChat(self.group_code, self.user_name, self)
-
-        # Добавляем их в stacked widget
-        self.content_stack.addWidget(self.group_view)    # Индекс 0 - Группа
-        self.content_stack.addWidget(self.note_board)   # Индекс 1 - Доска заметок
-        self.content_stack.addWidget(self.task_board)   # Индекс 2 - Мои задачи
-        self.content_stack.addWidget(self.group_chat)  # Индекс 3 - Общий чат
-        self.content_stack.addWidget(self.personal_chat)  # Индекс 4 - Личные сообщения
+        # Вкладки создаются при первом открытии, скрытые вкладки приостанавливаются
+        self.tab_factories = [
+            ("group_view", lambda: GroupView(self.group_code, self)),  # Индекс 0 - Группа
+            ("note_board", lambda: NoteBoard(self.group_code, self.user_name, self)),  # Индекс 1 - Доска заметок
+            ("task_board", lambda: TaskBoard(self.group_code, self.user_name, self)),  # Индекс 2 - Мои задачи
+            ("group_chat", lambda: GroupChat(self.group_code, self.user_name, self)),  # Индекс 3 - Общий чат
+            ("personal_chat", lambda: PersonalChat(self.group_code, self.user_name, self)),  # Индекс 4 - Личные сообщения
+        ]
+        self.tabs = {}  # индекс -> созданная вкладка
+        self.current_tab = None
+        self.watched_window = None  # окно верхнего уровня, сворачивание которого отслеживается
+        for attr, factory in self.tab_factories:
+            setattr(self, attr, None)
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.content_stack.addWidget(page)
+        self.content_stack.currentChanged.connect(self.on_tab_changed)
 
         # По умолчанию показываем доску заметок (как было раньше)
         self.content_stack.setCurrentIndex(1)
@@ -125,7 +147,81 @@ class MainWindow(QWidget):
 
         main_layout.addLayout(content_layout)
 
+    def on_tab_changed(self, index):
+        """Приостанавливает прежнюю вкладку и показывает новую, создавая ее при первом открытии."""
+        if self.current_tab is not None:
+            self.current_tab.suspend()
+
+        tab = self.tabs.get(index)
+        if tab is None:
+            attr, factory = self.tab_factories[index]
+            tab = factory()
+            setattr(self, attr, tab)
+            self.tabs[index] = tab
+            self.content_stack.widget(index).layout().addWidget(tab)
+        else:
+            tab.resume()
+        self.current_tab = tab
+
+    def hydrate(self, tab, load):
+        """Показывает во вкладке данные стартового снимка (tab.hydrate),
+        а если снимка нет или он устарел — вызывает собственную загрузку вкладки."""
+        if self.bootstrap_pending:
+            self.bootstrap_waiting.append((tab, load))
+        elif self.bootstrap is not None and self.bootstrap_timer.elapsed() < BOOTSTRAP_MAX_AGE:
+            tab.hydrate(self.bootstrap)
+        else:
+            load()
+
+    def on_bootstrap(self, snapshot):
+        self.bootstrap_pending = False
+        if not self.bootstrap_stale:
+            self.bootstrap = snapshot
+            self.bootstrap_timer.start()
+        waiting, self.bootstrap_waiting = self.bootstrap_waiting, []
+        for tab, load in waiting:
+            self.hydrate(tab, load)
+
+    def on_bootstrap_error(self, error):
+        print(f"Ошибка при загрузке данных группы: {error}")
+        self.on_bootstrap(None)
+
+    def drop_bootstrap(self, *args):
+        """Группа изменилась: снимок (и еще не полученный) больше не используется"""
+        self.bootstrap = None
+        self.bootstrap_stale = True
+
+    def showEvent(self, event):
+        # MainWindow — страница QStackedWidget, и WindowStateChange получает только
+        # окно верхнего уровня, поэтому сворачивание отслеживаем фильтром событий на нем
+        window = self.window()
+        if window is not self.watched_window:
+            if self.watched_window is not None:
+                self.watched_window.removeEventFilter(self)
+            window.installEventFilter(self)
+            self.watched_window = window
+        super().showEvent(event)
+
+    def eventFilter(self, obj, event):
+        # Пока окно свернуто, открытая вкладка тоже приостановлена
+        if (obj is self.watched_window and event.type() == QEvent.Type.WindowStateChange
+                and self.current_tab is not None):
+            if obj.isMinimized():
+                self.current_tab.suspend()
+            else:
+                self.current_tab.resume()
+        return super().eventFilter(obj, event)
+
     def on_back_click(self, event):
         """Возвращает в главное меню."""
+        if self.watched_window is not None:
+            self.watched_window.removeEventFilter(self)
+            self.watched_window = None
+        if self.current_tab is not None:
+            self.current_tab.suspend()
+            self.current_tab = None
         self.stacked_widget.setCurrentIndex(0)
+        self.realtime.stop()
+        if self.change_listener is not None:
+            self.change_listener.stop()
         self.close()
\ No newline at end of file
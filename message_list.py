@@ -0,0 +1,292 @@
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPainterPath
+from PyQt6.QtCore import Qt, QAbstractListModel, QEvent, QModelIndex, QRect, QSize, pyqtSignal
+
+from database import message_checksum
+
+MESSAGE_ROLE = Qt.ItemDataRole.UserRole + 1  # (ID, автор, текст, время)
+
+BUBBLE_PADDING = 15
+TEXT_INDENT = 10
+DELETE_BUTTON_SIZE = QSize(100, 30)
+
+
+def format_timestamp(timestamp):
+    return timestamp.strftime("%H:%M %d.%m.%Y") if not isinstance(timestamp, str) else timestamp
+
+
+class MessageListModel(QAbstractListModel):
+    """Сообщения чата в хронологическом порядке.
+
+    Строка — кортеж (ID, автор, текст, время), время форматируется один раз при
+    добавлении. Добавление в конец и в начало не трогает уже показанные строки.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages = []
+        self._ids = set()
+        self._checksum = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self._messages[index.row()]
+        if role == MESSAGE_ROLE:
+            return message
+        if role == Qt.ItemDataRole.DisplayRole:
+            return message[2]
+        return None
+
+    def __contains__(self, msg_id):
+        return msg_id in self._ids
+
+    def __len__(self):
+        return len(self._messages)
+
+    def state(self):
+        """Состояние показанных сообщений в формате get_conversation_state:
+        (ID последнего, количество, контрольная сумма ID)"""
+        last_id = self._messages[-1][0] if self._messages else 0
+        return last_id, len(self._messages), self._checksum
+
+    def append_messages(self, messages):
+        """Добавляет сообщения (ID, автор, текст, время) в конец, пропуская уже известные"""
+        self._insert(len(self._messages), messages)
+
+    def prepend_messages(self, messages):
+        """Добавляет более старые сообщения в начало, пропуская уже известные"""
+        self._insert(0, messages)
+
+    def remove_message(self, msg_id):
+        """Удаляет сообщение. Возвращает False, если его нет в списке."""
+        if msg_id not in self._ids:
+            return False
+        # Удаляют обычно недавние сообщения, поэтому ищем с конца
+        for row in range(len(self._messages) - 1, -1, -1):
+            if self._messages[row][0] == msg_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._messages[row]
+                self._ids.discard(msg_id)
+                self._checksum -= message_checksum(msg_id)
+                self.endRemoveRows()
+                return True
+        return False
+
+    def clear(self):
+        self.beginResetModel()
+        self._messages = []
+        self._ids = set()
+        self._checksum = 0
+        self.endResetModel()
+
+    def _insert(self, row, messages):
+        rows = []
+        for msg_id, user, text, timestamp in messages:
+            if msg_id not in self._ids:
+                self._ids.add(msg_id)
+                self._checksum += message_checksum(msg_id)
+                rows.append((msg_id, user, text, format_timestamp(timestamp)))
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(rows) - 1)
+        self._messages[row:row] = rows
+        self.endInsertRows()
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """Рисует сообщение «пузырем» с кнопкой удаления для своих сообщений.
+
+    Вместо отдельных виджетов на каждое сообщение рисуются только видимые строки;
+    высота строки вычисляется один раз для каждой ширины списка.
+    Родителем делегата должен быть MessageListView.
+    """
+
+    delete_requested = pyqtSignal(int)
+
+    def __init__(self, user_name, parent=None):
+        super().__init__(parent)
+        self.user_name = user_name
+        self.hover_pos = None
+
+        self.user_font = QFont("Inter", 14, QFont.Weight.Bold)
+        self.time_font = QFont("Inter", 10)
+        self.time_font.setItalic(True)
+        self.text_font = QFont("Inter", 16)
+        self.button_font = QFont("Inter")
+        self.button_font.setPixelSize(12)
+
+        self._header_height = max(QFontMetrics(self.user_font).height(),
+                                  QFontMetrics(self.time_font).height())
+        self._sizes = {}  # ID сообщения -> (ширина, размер)
+
+    def clear_cache(self):
+        self._sizes.clear()
+
+    def forget(self, msg_id):
+        self._sizes.pop(msg_id, None)
+
+    def _text_rect(self, rect, text):
+        left = rect.left() + BUBBLE_PADDING + TEXT_INDENT
+        width = max(rect.width() - 2 * BUBBLE_PADDING - TEXT_INDENT, 1)
+        top = rect.top() + BUBBLE_PADDING + self._header_height + 5
+        height = QFontMetrics(self.text_font).boundingRect(
+            QRect(0, 0, width, 1 << 20), Qt.TextFlag.TextWordWrap, text
+        ).height()
+        return QRect(left, top, width, height)
+
+    def delete_rect(self, rect):
+        """Кнопка удаления в правом нижнем углу сообщения"""
+        return QRect(rect.right() - BUBBLE_PADDING - DELETE_BUTTON_SIZE.width() + 1,
+                     rect.bottom() - BUBBLE_PADDING - DELETE_BUTTON_SIZE.height() + 1,
+                     DELETE_BUTTON_SIZE.width(), DELETE_BUTTON_SIZE.height())
+
+    def sizeHint(self, option, index):
+        msg_id, user, text, time_str = index.data(MESSAGE_ROLE)
+        # Сообщение занимает всю ширину списка; option.rect здесь еще не заполнен
+        view = self.parent()
+        width = view.viewport().width() - 2 * view.spacing()
+        cached = self._sizes.get(msg_id)
+        if cached and cached[0] == width:
+            return cached[1]
+
+        height = self._text_rect(QRect(0, 0, width, 0), text).bottom() + 1 + BUBBLE_PADDING
+        if user == self.user_name:
+            height += 10 + DELETE_BUTTON_SIZE.height()
+        size = QSize(width, height)
+        self._sizes[msg_id] = (width, size)
+        return size
+
+    def paint(self, painter, option, index):
+        msg_id, user, text, time_str = index.data(MESSAGE_ROLE)
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        bubble = QPainterPath()
+        bubble.addRoundedRect(rect.toRectF(), 10, 10)
+        painter.fillPath(bubble, QColor("#E0E2DB"))
+
+        header = QRect(rect.left() + BUBBLE_PADDING, rect.top() + BUBBLE_PADDING,
+                       rect.width() - 2 * BUBBLE_PADDING, self._header_height)
+        painter.setPen(QColor("#003C30"))
+        painter.setFont(self.user_font)
+        painter.drawText(header, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, user)
+        painter.setPen(QColor("#5F7470"))
+        painter.setFont(self.time_font)
+        painter.drawText(header, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, time_str)
+
+        painter.setPen(QColor("#003C30"))
+        painter.setFont(self.text_font)
+        painter.drawText(self._text_rect(rect, text), Qt.TextFlag.TextWordWrap, text)
+
+        if user == self.user_name:
+            button = self.delete_rect(rect)
+            hovered = self.hover_pos is not None and button.contains(self.hover_pos)
+            path = QPainterPath()
+            path.addRoundedRect(button.toRectF(), 5, 5)
+            painter.fillPath(path, QColor("#D9534F" if hovered else "#FF6961"))
+            painter.setPen(QColor("white"))
+            painter.setFont(self.button_font)
+            painter.drawText(button, Qt.AlignmentFlag.AlignCenter, "Удалить")
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton):
+            msg_id, user, text, time_str = index.data(MESSAGE_ROLE)
+            if user == self.user_name and self.delete_rect(option.rect).contains(event.position().toPoint()):
+                self.delete_requested.emit(msg_id)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
+class MessageListView(QListView):
+    """Список сообщений чата.
+
+    Остается внизу, пока пользователь не прокрутил историю вверх, и сообщает
+    о прокрутке к началу (top_reached), чтобы чат подгрузил более старые сообщения.
+    """
+
+    delete_requested = pyqtSignal(int)
+    top_reached = pyqtSignal()
+
+    def __init__(self, user_name, parent=None):
+        super().__init__(parent)
+        self.message_model = MessageListModel(self)
+        self.delegate = MessageDelegate(user_name, self)
+        self.setModel(self.message_model)
+        self.setItemDelegate(self.delegate)
+        self.delegate.delete_requested.connect(self.delete_requested)
+        self.message_model.modelReset.connect(self.delegate.clear_cache)
+        self.message_model.rowsAboutToBeRemoved.connect(self._forget_rows)
+
+        self.setObjectName("messageList")
+        self.setSpacing(5)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setMouseTracking(True)
+
+        self.follow_bottom = True
+        self.scroll_anchor = None
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self.on_scroll)
+        scroll_bar.rangeChanged.connect(self.on_scroll_range_changed)
+
+    def prepend_messages(self, messages):
+        """Добавляет более старые сообщения, не сдвигая видимые"""
+        scroll_bar = self.verticalScrollBar()
+        self.scroll_anchor = scroll_bar.maximum() - scroll_bar.value()
+        self.message_model.prepend_messages(messages)
+
+    def scroll_to_bottom(self):
+        # Если строки еще не разложены, прокрутка произойдет при изменении диапазона
+        self.follow_bottom = True
+        self.scrollToBottom()
+
+    def on_scroll(self, value):
+        scroll_bar = self.verticalScrollBar()
+        self.follow_bottom = value == scroll_bar.maximum()
+        if value == scroll_bar.minimum() and scroll_bar.maximum() > 0 and self.scroll_anchor is None:
+            self.top_reached.emit()
+
+    def on_scroll_range_changed(self, minimum, maximum):
+        scroll_bar = self.verticalScrollBar()
+        if self.scroll_anchor is not None:
+            scroll_bar.setValue(maximum - self.scroll_anchor)
+            self.scroll_anchor = None
+        elif self.follow_bottom:
+            scroll_bar.setValue(maximum)
+
+    def mouseMoveEvent(self, event):
+        # Перерисовываем только строку, над кнопкой которой изменилось состояние наведения
+        pos = event.position().toPoint()
+        previous = self.delegate.hover_pos
+        self.delegate.hover_pos = pos
+        for point in (pos, previous):
+            index = self.indexAt(point) if point is not None else QModelIndex()
+            if index.isValid():
+                self.viewport().update(self.visualRect(index))
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        previous = self.delegate.hover_pos
+        self.delegate.hover_pos = None
+        if previous is not None:
+            index = self.indexAt(previous)
+            if index.isValid():
+                self.viewport().update(self.visualRect(index))
+        super().leaveEvent(event)
+
+    def _forget_rows(self, parent, first, last):
+        for row in range(first, last + 1):
+            self.delegate.forget(self.message_model.index(row).data(MESSAGE_ROLE)[0])
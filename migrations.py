@@ -0,0 +1,306 @@
+"""Версионированные миграции схемы базы данных GroupTasker.
+
+Каждая миграция содержит скрипты up (применить) и down (откатить) и выполняется
+в отдельной транзакции. Примененные версии хранятся в таблице schema_migrations.
+Базовая схема необратима (down = None): ее откат удалил бы все данные групп,
+поэтому откатить миграции можно только до версии 1.
+Базовая схема создается с IF NOT EXISTS, поэтому миграции можно применить и к базе,
+созданной вручную по README.
+
+Использование:
+    python migrations.py status
+    python migrations.py up [ВЕРСИЯ]
+    python migrations.py down ВЕРСИЯ
+"""
+import argparse
+import sys
+from collections import namedtuple
+
+from database import get_connection
+
+Migration = namedtuple("Migration", "version name up down")
+
+MIGRATIONS = [
+    Migration(
+        1, "base_schema",
+        """
+        CREATE TABLE IF NOT EXISTS groups (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            code TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            password TEXT NOT NULL,
+            group_id INTEGER NOT NULL REFERENCES groups(id),
+            UNIQUE(name, group_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS notes (
+            id SERIAL PRIMARY KEY,
+            group_id INTEGER NOT NULL REFERENCES groups(id),
+            text TEXT NOT NULL,
+            user_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS tasks (
+            id SERIAL PRIMARY KEY,
+            group_id INTEGER NOT NULL REFERENCES groups(id),
+            title TEXT NOT NULL,
+            description TEXT,
+            deadline TEXT NOT NULL,
+            user_name TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS group_messages (
+            id SERIAL PRIMARY KEY,
+            group_id INTEGER NOT NULL REFERENCES groups(id),
+            user_name TEXT NOT NULL,
+            message TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS private_messages (
+            id SERIAL PRIMARY KEY,
+            group_id INTEGER NOT NULL REFERENCES groups(id),
+            sender TEXT NOT NULL,
+            receiver TEXT NOT NULL,
+            message TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        None,
+    ),
+    Migration(
+        2, "message_tombstones",
+        """
+        CREATE TABLE IF NOT EXISTS message_tombstones (
+            id SERIAL PRIMARY KEY,
+            group_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE OR REPLACE FUNCTION record_message_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO message_tombstones (group_id, message_id) VALUES (OLD.group_id, OLD.id);
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS group_messages_tombstone ON group_messages;
+        CREATE TRIGGER group_messages_tombstone
+            AFTER DELETE ON group_messages
+            FOR EACH ROW EXECUTE FUNCTION record_message_tombstone();
+        """,
+        """
+        DROP TRIGGER IF EXISTS group_messages_tombstone ON group_messages;
+        DROP FUNCTION IF EXISTS record_message_tombstone();
+        DROP TABLE IF EXISTS message_tombstones;
+        """,
+    ),
+    Migration(
+        3, "change_feed",
+        """
+        CREATE OR REPLACE FUNCTION notify_change() RETURNS trigger AS $$
+        DECLARE
+            row_data RECORD;
+            group_code TEXT;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row_data := OLD;
+            ELSE
+                row_data := NEW;
+            END IF;
+
+            SELECT code INTO group_code FROM groups WHERE id = row_data.group_id;
+            IF group_code IS NOT NULL THEN
+                PERFORM pg_notify('grouptasker_' || group_code, (
+                    jsonb_build_object('table', TG_TABLE_NAME, 'op', TG_OP,
+                                       'group_code', group_code, 'id', row_data.id)
+                    || (to_jsonb(row_data) - ARRAY['message', 'text', 'title', 'description', 'password'])
+                )::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS group_messages_notify ON group_messages;
+        CREATE TRIGGER group_messages_notify AFTER INSERT OR UPDATE OR DELETE ON group_messages
+            FOR EACH ROW EXECUTE FUNCTION notify_change();
+        DROP TRIGGER IF EXISTS private_messages_notify ON private_messages;
+        CREATE TRIGGER private_messages_notify AFTER INSERT OR UPDATE OR DELETE ON private_messages
+            FOR EACH ROW EXECUTE FUNCTION notify_change();
+        DROP TRIGGER IF EXISTS notes_notify ON notes;
+        CREATE TRIGGER notes_notify AFTER INSERT OR UPDATE OR DELETE ON notes
+            FOR EACH ROW EXECUTE FUNCTION notify_change();
+        DROP TRIGGER IF EXISTS tasks_notify ON tasks;
+        CREATE TRIGGER tasks_notify AFTER INSERT OR UPDATE OR DELETE ON tasks
+            FOR EACH ROW EXECUTE FUNCTION notify_change();
+        DROP TRIGGER IF EXISTS users_notify ON users;
+        CREATE TRIGGER users_notify AFTER INSERT OR UPDATE OR DELETE ON users
+            FOR EACH ROW EXECUTE FUNCTION notify_change();
+        """,
+        """
+        DROP TRIGGER IF EXISTS users_notify ON users;
+        DROP TRIGGER IF EXISTS tasks_notify ON tasks;
+        DROP TRIGGER IF EXISTS notes_notify ON notes;
+        DROP TRIGGER IF EXISTS private_messages_notify ON private_messages;
+        DROP TRIGGER IF EXISTS group_messages_notify ON group_messages;
+        DROP FUNCTION IF EXISTS notify_change();
+        """,
+    ),
+    Migration(
+        4, "query_indexes",
+        """
+        -- get_group_users, check_user_exists_in_group, удаление группы (внешний ключ)
+        CREATE INDEX IF NOT EXISTS users_group_id_name_idx ON users (group_id, name);
+        -- is_group_creator: первый пользователь группы
+        CREATE INDEX IF NOT EXISTS users_group_id_id_idx ON users (group_id, id);
+        -- get_notes: заметки группы по дате создания
+        CREATE INDEX IF NOT EXISTS notes_group_id_created_at_idx ON notes (group_id, created_at DESC);
+        -- get_tasks: задачи пользователя в группе по дедлайну
+        CREATE INDEX IF NOT EXISTS tasks_group_id_user_name_deadline_idx
+            ON tasks (group_id, user_name, deadline);
+        -- get_messages, get_message_changes, get_message_count, get_last_message_id
+        CREATE INDEX IF NOT EXISTS group_messages_group_id_id_idx ON group_messages (group_id, id);
+        -- get_message_changes, get_last_tombstone_id
+        CREATE INDEX IF NOT EXISTS message_tombstones_group_id_id_idx ON message_tombstones (group_id, id);
+        -- get_private_messages, get_private_message_count: переписка пары пользователей
+        CREATE INDEX IF NOT EXISTS private_messages_conversation_idx
+            ON private_messages (group_id, sender, receiver, id);
+        """,
+        """
+        DROP INDEX IF EXISTS private_messages_conversation_idx;
+        DROP INDEX IF EXISTS message_tombstones_group_id_id_idx;
+        DROP INDEX IF EXISTS group_messages_group_id_id_idx;
+        DROP INDEX IF EXISTS tasks_group_id_user_name_deadline_idx;
+        DROP INDEX IF EXISTS notes_group_id_created_at_idx;
+        DROP INDEX IF EXISTS users_group_id_id_idx;
+        DROP INDEX IF EXISTS users_group_id_name_idx;
+        """,
+    ),
+    Migration(
+        5, "covering_indexes",
+        """
+        -- Индексы миграции 4 с колонками INCLUDE: запросы, которым нужны только эти
+        -- колонки, читают один индекс (Index Only Scan) без обращения к строкам таблицы.
+        -- Длинные тексты (сообщения, заметки, задачи) в индексы не входят.
+        -- resolve_group_id, check_group_exists и соединения с groups по коду
+        ALTER TABLE groups DROP CONSTRAINT IF EXISTS groups_code_key;
+        ALTER TABLE groups ADD CONSTRAINT groups_code_key UNIQUE (code) INCLUDE (id);
+        -- check_user_exists_in_group (get_group_users уже читает только name)
+        CREATE INDEX IF NOT EXISTS users_group_id_name_covering_idx ON users (group_id, name) INCLUDE (id);
+        DROP INDEX IF EXISTS users_group_id_name_idx;
+        -- is_group_creator, get_group_overview: имя первого пользователя группы
+        CREATE INDEX IF NOT EXISTS users_group_id_id_covering_idx ON users (group_id, id) INCLUDE (name);
+        DROP INDEX IF EXISTS users_group_id_id_idx;
+        -- get_message_changes: ID удаленных сообщений
+        CREATE INDEX IF NOT EXISTS message_tombstones_group_id_id_covering_idx
+            ON message_tombstones (group_id, id) INCLUDE (message_id);
+        DROP INDEX IF EXISTS message_tombstones_group_id_id_idx;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS message_tombstones_group_id_id_idx ON message_tombstones (group_id, id);
+        DROP INDEX IF EXISTS message_tombstones_group_id_id_covering_idx;
+        CREATE INDEX IF NOT EXISTS users_group_id_id_idx ON users (group_id, id);
+        DROP INDEX IF EXISTS users_group_id_id_covering_idx;
+        CREATE INDEX IF NOT EXISTS users_group_id_name_idx ON users (group_id, name);
+        DROP INDEX IF EXISTS users_group_id_name_covering_idx;
+        ALTER TABLE groups DROP CONSTRAINT IF EXISTS groups_code_key;
+        ALTER TABLE groups ADD CONSTRAINT groups_code_key UNIQUE (code);
+        """,
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def ensure_migrations_table():
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+
+
+def get_applied_versions():
+    """Возвращает множество примененных версий миграций."""
+    ensure_migrations_table()
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT version FROM schema_migrations;")
+            return {row[0] for row in cursor.fetchall()}
+
+
+def current_version():
+    """Возвращает номер последней примененной миграции (0, если миграций не было)."""
+    return max(get_applied_versions(), default=0)
+
+
+def migrate_up(target=LATEST_VERSION):
+    """Применяет все непримененные миграции до версии target включительно."""
+    applied = get_applied_versions()
+    for migration in MIGRATIONS:
+        if migration.version > target or migration.version in applied:
+            continue
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(migration.up)
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                               (migration.version, migration.name))
+        print(f"Применена миграция {migration.version}: {migration.name}")
+
+
+def migrate_down(target):
+    """Откатывает примененные миграции с версиями больше target. Если среди них есть
+    необратимая, ничего не откатывает и возвращает False."""
+    applied = get_applied_versions()
+    pending = [migration for migration in reversed(MIGRATIONS)
+               if migration.version > target and migration.version in applied]
+    irreversible = [migration for migration in pending if migration.down is None]
+    if irreversible:
+        for migration in irreversible:
+            print(f"Миграция {migration.version} ({migration.name}) необратима, откат до версии {target} невозможен")
+        return False
+
+    for migration in pending:
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(migration.down)
+                cursor.execute("DELETE FROM schema_migrations WHERE version = %s;",
+                               (migration.version,))
+        print(f"Откачена миграция {migration.version}: {migration.name}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы базы данных GroupTasker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="показать примененные миграции")
+    up_parser = subparsers.add_parser("up", help="применить миграции")
+    up_parser.add_argument("version", type=int, nargs="?", default=LATEST_VERSION)
+    down_parser = subparsers.add_parser("down", help="откатить миграции до указанной версии")
+    down_parser.add_argument("version", type=int)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        applied = get_applied_versions()
+        for migration in MIGRATIONS:
+            mark = "x" if migration.version in applied else " "
+            print(f"[{mark}] {migration.version}: {migration.name}")
+    elif args.command == "up":
+        migrate_up(args.version)
+    elif not migrate_down(args.version):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
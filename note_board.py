@@ -1,21 +1,29 @@
-from PyQt6.QtWidgets import (QWidget, QLabel, QPushButton, QVBoxLayout,
-                             QHBoxLayout, QFrame, QInputDialog, QScrollArea, QMessageBox)
+import re
+
+from PyQt6.QtWidgets import (QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QFrame,
+                             QInputDialog, QScrollArea, QMessageBox, QFileDialog)
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
-from database import save_note, get_notes, delete_note, get_note_author
+from backend import save_note, save_notes, get_notes, delete_own_note, DELETED, NOT_OWNER
+from db_worker import get_executor
+from realtime_client import event_id, event_ids
+from realtime_rooms import group_room
 
 
 class NoteBoard(QFrame):
-    def __init__(self, group_code, user_name=None):
+    def __init__(self, group_code, user_name=None, main_window=None):
         super().__init__()
         self.group_code = group_code
         self.user_name = user_name
+        self.main_window = main_window
+        # Локальное хранилище заметок: ID -> (текст, автор, виджет); доска меняется
+        # по разнице с ним, а не перерисовывается целиком
+        self.notes = {}
+        self.executor = get_executor()
+        self.suspended = False
+        self.stale = False  # за время простоя вкладки были изменения
         self.setFixedSize(1000, 900)
-        self.setStyleSheet("""
-            border: 2px solid #5F7470; 
-            background-color: transparent;
-            border-radius: 15px;
-        """)
+        self.setObjectName("noteBoard")
 
         # Основной layout
         self.main_layout = QVBoxLayout(self)
@@ -24,24 +32,26 @@ class NoteBoard(QFrame):
         # Кнопка добавления заметки
         btn_add_note = QPushButton("Добавить заметку")
         btn_add_note.setFont(QFont("Inter", 24))
-        btn_add_note.setStyleSheet("""
-            QPushButton {
-                background-color: #E0E2DB; 
-                color: #003C30; 
-                border-radius: 10px; 
-                padding: 10px;
-            }
-            QPushButton:hover { 
-                background-color: #D0D2C8; 
-            }
-        """)
+        btn_add_note.setObjectName("boardButton")
         btn_add_note.clicked.connect(self.add_note)
-        self.main_layout.addWidget(btn_add_note, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        # Кнопка импорта заметок из файла
+        btn_import = QPushButton("Импорт")
+        btn_import.setFont(QFont("Inter", 24))
+        btn_import.setObjectName("boardButton")
+        btn_import.clicked.connect(self.import_notes)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(btn_add_note)
+        buttons_layout.addWidget(btn_import)
+        buttons_layout.addStretch()
+        self.main_layout.addLayout(buttons_layout)
 
         # Область с заметками с прокруткой
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("border: none;")
+        self.scroll_area.setObjectName("boardScroll")
 
         self.notes_container = QWidget()
         self.notes_layout = QVBoxLayout(self.notes_container)
@@ -51,29 +61,54 @@ class NoteBoard(QFrame):
         self.scroll_area.setWidget(self.notes_container)
         self.main_layout.addWidget(self.scroll_area)
 
-        # Загружаем существующие заметки
-        self.load_notes()
+        # Первые данные берем из стартового снимка главного окна, если он еще свежий
+        hydrate = getattr(main_window, "hydrate", None)
+        if hydrate is not None:
+            hydrate(self, self.load_notes)
+        else:
+            self.load_notes()
+
+        # Заметки других участников приходят через сервер событий
+        self.room = group_room(self.group_code)
+        self.realtime = getattr(main_window, "realtime", None)
+        if self.realtime is not None:
+            self.realtime.event_received.connect(self.on_realtime_event)
+            self.realtime.subscribe(self.room)
+
+        self.change_listener = getattr(main_window, "change_listener", None)
+        if self.change_listener is not None:
+            self.change_listener.changed.connect(self.on_database_change)
 
     def load_notes(self):
-        """Загружает заметки из базы данных."""
-        # Очищаем существующие заметки перед загрузкой новых
-        for i in reversed(range(self.notes_layout.count())):
-            widget = self.notes_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        notes = get_notes(self.group_code)
-        for note_id, text, user_name in notes:
-            self.add_note_to_board(note_id, text, user_name)
-
-    def add_note_to_board(self, note_id, text, user_name):
-        """Добавляет заметку на доску."""
+        """Загружает заметки из базы данных в фоновом потоке."""
+        self.executor.submit(get_notes, self.group_code, key=(self, "load"), owner=self,
+                             on_result=self.show_notes,
+                             on_error=lambda e: print(f"Ошибка при загрузке заметок: {e}"))
+
+    def hydrate(self, snapshot):
+        """Показывает заметки из стартового снимка (см. MainWindow.hydrate)."""
+        self.show_notes(snapshot["notes"])
+
+    def show_notes(self, notes):
+        """Сверяет доску с загруженными заметками: удаляет пропавшие, добавляет новые
+        и переставляет виджеты только там, где порядок отличается."""
+        loaded = {note_id: (text, user_name) for note_id, text, user_name in notes}
+        for note_id, (text, user_name, _) in list(self.notes.items()):
+            if loaded.get(note_id) != (text, user_name):
+                self.remove_note_from_board(note_id)
+
+        for index, (note_id, text, user_name) in enumerate(notes):
+            if note_id not in self.notes:
+                self.add_note_to_board(note_id, text, user_name, index)
+            elif self.notes_layout.itemAt(index).widget() is not self.notes[note_id][2]:
+                note_frame = self.notes[note_id][2]
+                self.notes_layout.removeWidget(note_frame)
+                self.notes_layout.insertWidget(index, note_frame)
+
+    def add_note_to_board(self, note_id, text, user_name, index=0):
+        """Добавляет заметку на доску на место index (по умолчанию — в начало, к новым)."""
         note_frame = QFrame()
-        note_frame.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 10px;
-            padding: 10px;
-        """)
+        note_frame.setObjectName("noteCard")
         note_frame.setFixedWidth(950)
 
         note_layout = QVBoxLayout(note_frame)
@@ -81,14 +116,14 @@ class NoteBoard(QFrame):
         # Основной текст заметки
         note_text = QLabel(text)
         note_text.setFont(QFont("Inter", 20))
-        note_text.setStyleSheet("color: #003C30;")
+        note_text.setObjectName("noteText")
         note_text.setWordWrap(True)
         note_text.setAlignment(Qt.AlignmentFlag.AlignLeft)
 
         # Имя пользователя (мелким текстом)
         user_label = QLabel(f"Автор: {user_name}")
         user_label.setFont(QFont("Inter", 12))
-        user_label.setStyleSheet("color: #5F7470; font-style: italic;")
+        user_label.setObjectName("noteAuthor")
         user_label.setAlignment(Qt.AlignmentFlag.AlignRight)
 
         # Горизонтальный layout для текста и кнопки удаления
@@ -98,24 +133,22 @@ class NoteBoard(QFrame):
         # Создаем кнопку удаления только если текущий пользователь - автор заметки
         if self.user_name == user_name:
             btn_delete = QPushButton("❌")
-            btn_delete.setStyleSheet("""
-                QPushButton {
-                    background-color: #FF6961;
-                    color: white;
-                    border-radius: 5px;
-                    padding: 5px;
-                }
-                QPushButton:hover {
-                    background-color: #D9534F;
-                }
-            """)
+            btn_delete.setObjectName("deleteButton")
             btn_delete.setFixedSize(40, 40)
             btn_delete.clicked.connect(lambda: self.remove_note(note_id))
             text_button_layout.addWidget(btn_delete)
 
         note_layout.addLayout(text_button_layout)
         note_layout.addWidget(user_label)
-        self.notes_layout.addWidget(note_frame)
+        self.notes_layout.insertWidget(index, note_frame)
+        self.notes[note_id] = (text, user_name, note_frame)
+
+    def remove_note_from_board(self, note_id):
+        """Убирает с доски одну заметку."""
+        note = self.notes.pop(note_id, None)
+        if note is not None:
+            self.notes_layout.removeWidget(note[2])
+            note[2].deleteLater()
 
     def add_note(self):
         """Добавляет заметку на доску и сохраняет в базу данных."""
@@ -124,56 +157,131 @@ class NoteBoard(QFrame):
             return
 
         dialog = QInputDialog(self)
+        dialog.setObjectName("noteDialog")
         dialog.setWindowTitle("Новая заметка")
         dialog.setLabelText("Введите текст заметки:")
-        dialog.setStyleSheet("""
-            QInputDialog {
-                background-color: #E0E2DB;
-            }
-            QLabel {
-                color: #003C30;
-                font-size: 20px;
-            }
-            QTextEdit {
-                background-color: white;
-                color: #003C30;
-                font-size: 18px;
-                border: 1px solid #5F7470;
-                border-radius: 5px;
-            }
-            QPushButton {
-                background-color: #5F7470;
-                color: white;
-                border-radius: 5px;
-                padding: 5px 10px;
-                font-size: 16px;
-            }
-            QPushButton:hover {
-                background-color: #4D615E;
-            }
-        """)
         dialog.setInputMode(QInputDialog.InputMode.TextInput)
         dialog.setOption(QInputDialog.InputDialogOption.UsePlainTextEditForTextInput)
 
         if dialog.exec() == QInputDialog.DialogCode.Accepted:
             text = dialog.textValue()
             if text.strip():
-                note_id = save_note(self.group_code, text, self.user_name)
-                self.add_note_to_board(note_id, text, self.user_name)
+                self.executor.submit(save_note, self.group_code, text, self.user_name, owner=self,
+                                     on_result=lambda note_id: self.on_note_saved(note_id, text),
+                                     on_error=lambda e: print(f"Ошибка при сохранении заметки: {e}"))
+
+    def on_note_saved(self, note_id, text):
+        if note_id in self.notes:
+            return
+        self.add_note_to_board(note_id, text, self.user_name)
+        self.publish_change("note_created", {"id": note_id})
+
+    def import_notes(self):
+        """Добавляет заметки из текстового файла (заметки разделены пустыми строками)
+        одним запросом к базе."""
+        if not self.user_name:
+            print("Ошибка: имя пользователя не установлено")
+            return
+
+        path, _ = QFileDialog.getOpenFileName(self, "Импорт заметок", "", "Текстовые файлы (*.txt);;Все файлы (*)")
+        if not path:
+            return
+        try:
+            with open(path, encoding="utf-8") as file:
+                texts = [block.strip() for block in re.split(r"\n\s*\n", file.read()) if block.strip()]
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прочитать файл: {e}", QMessageBox.StandardButton.Ok)
+            return
+
+        if texts:
+            self.executor.submit(save_notes, self.group_code, [(text, self.user_name) for text in texts],
+                                 owner=self, on_result=lambda note_ids: self.on_notes_imported(note_ids, texts),
+                                 on_error=lambda e: print(f"Ошибка при импорте заметок: {e}"))
+
+    def on_notes_imported(self, note_ids, texts):
+        # Пакет встает в начало доски одним блоком в порядке get_notes: у заметок пакета
+        # одно время создания, и первой идет заметка с большим ID
+        index = 0
+        for note_id, text in sorted(zip(note_ids, texts), reverse=True):
+            if note_id not in self.notes:
+                self.add_note_to_board(note_id, text, self.user_name, index)
+                index += 1
+        # Одно событие на весь импорт: остальные клиенты сверят доску с базой
+        self.publish_change("notes_imported", {"ids": note_ids})
 
     def remove_note(self, note_id):
         """Удаляет заметку из базы данных и обновляет доску."""
-        # Получаем автора заметки
-        author = get_note_author(note_id)
+        # Автор проверяется в том же запросе, что и удаление
+        self.executor.submit(delete_own_note, self.group_code, note_id, self.user_name, owner=self,
+                             on_result=lambda result: self.on_note_removed(note_id, result),
+                             on_error=lambda e: print(f"Ошибка при удалении заметки: {e}"))
 
-        # Проверяем, является ли текущий пользователь автором
-        if author == self.user_name:
-            delete_note(note_id)
-            self.load_notes()
-        else:
+    def on_note_removed(self, note_id, result):
+        if result == NOT_OWNER:
             QMessageBox.warning(
                 self,
                 "Ошибка",
                 "Вы можете удалять только свои заметки!",
                 QMessageBox.StandardButton.Ok
-            )
\ No newline at end of file
+            )
+            return
+        # NOT_FOUND: заметку уже удалили в другой сессии, убираем ее с доски без уведомления
+        if result == DELETED:
+            self.publish_change("note_deleted", {"id": note_id})
+        self.remove_note_from_board(note_id)
+
+    def publish_change(self, event, data):
+        """Сообщает остальным клиентам группы об изменении"""
+        if self.realtime is not None:
+            self.realtime.publish(self.room, event, data)
+
+    def suspend(self):
+        """Вкладка скрыта: отписываемся от событий, изменения только отмечаем"""
+        if self.suspended:
+            return
+        self.suspended = True
+        if self.realtime is not None:
+            self.realtime.unsubscribe(self.room)
+
+    def resume(self):
+        """Вкладка снова открыта: перезагружаем заметки, если они могли измениться"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        if self.realtime is not None:
+            self.realtime.subscribe(self.room)
+        # Без уведомлений базы пропущенные изменения не отследить
+        if self.stale or self.change_listener is None or not self.change_listener.is_active:
+            self.stale = False
+            self.load_notes()
+
+    def on_realtime_event(self, room, event, data):
+        """Событие сервера только подсказывает, что заметки изменились: доску сверяем
+        с базой, если изменение на ней еще не показано"""
+        if room != self.room or event not in ("note_created", "note_deleted", "notes_imported"):
+            return
+        if self.suspended:
+            self.stale = True
+            return
+        if event == "note_created" and event_id(data) in self.notes:
+            return
+        if event == "note_deleted" and event_id(data) is not None and event_id(data) not in self.notes:
+            return
+        if event == "notes_imported":
+            note_ids = event_ids(data)
+            if note_ids is not None and self.notes.keys() >= note_ids:
+                return
+        self.load_notes()
+
+    def on_database_change(self, table, operation, entity_id, payload):
+        """Уведомление базы: удаление применяем сразу, а новую заметку, которой еще нет
+        на доске, получаем фоновой сверкой с базой"""
+        if table != "notes":
+            return
+        if self.suspended:
+            self.stale = True
+            return
+        if operation == "DELETE":
+            self.remove_note_from_board(entity_id)
+        elif operation != "INSERT" or entity_id not in self.notes:
+            self.load_notes()
@@ -1,11 +1,18 @@
 from PyQt6.QtWidgets import (QFrame, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QScrollArea, QTextEdit, QWidget,
-                             QMessageBox, QListWidget, QListWidgetItem)
+                             QPushButton, QTextEdit, QMessageBox,
+                             QListWidget, QListWidgetItem)
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt, QTimer, QDateTime
-from database import (get_group_users, get_private_messages,
-                      save_private_message, delete_private_message,
-                      get_private_message_count)
+from PyQt6.QtCore import Qt, QDateTime
+from backend import (get_group_users, get_private_messages,
+                      save_private_message, delete_own_private_message,
+                      get_private_conversation_state, DELETED, NOT_OWNER)
+from db_worker import get_executor
+from message_list import MessageListView
+from poll_scheduler import AdaptivePoller
+from realtime_client import event_id
+from realtime_rooms import private_room
+
+PAGE_SIZE = 50  # сообщений на странице истории
 
 
 class PersonalChat(QFrame):
@@ -17,11 +24,7 @@ class PersonalChat(QFrame):
         self.current_chat_user = None
         self.last_update_time = QDateTime.currentDateTime()
         self.setFixedSize(1000, 900)
-        self.setStyleSheet("""
-            border: 2px solid #5F7470; 
-            background-color: transparent;
-            border-radius: 15px;
-        """)
+        self.setObjectName("personalChat")
 
         # Основной layout
         main_layout = QVBoxLayout(self)
@@ -35,12 +38,7 @@ class PersonalChat(QFrame):
 
         chat_label = QLabel("Личные сообщения")
         chat_label.setFixedSize(350, 70)
-        chat_label.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 15px;
-            padding: 10px;
-            color: #003C30;
-        """)
+        chat_label.setObjectName("tabTitle")
         chat_label.setFont(QFont("Inter", 24))
         chat_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         top_row.addWidget(chat_label)
@@ -49,19 +47,7 @@ class PersonalChat(QFrame):
 
         btn_home = QPushButton("Home")
         btn_home.setFixedSize(150, 70)
-        btn_home.setStyleSheet("""
-            QPushButton {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 24px;
-                color: #003C30;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-        """)
+        btn_home.setObjectName("tabButton")
         btn_home.setFont(QFont("Inter", 24))
         btn_home.clicked.connect(self.show_note_board)
         top_row.addWidget(btn_home)
@@ -74,22 +60,7 @@ class PersonalChat(QFrame):
         # Список пользователей
         self.users_list = QListWidget()
         self.users_list.setFixedWidth(250)
-        self.users_list.setStyleSheet("""
-            QListWidget {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                border: none;
-                color: #003C30;
-            }
-            QListWidget::item {
-                padding: 10px;
-                border-bottom: 1px solid #5F7470;
-            }
-            QListWidget::item:selected {
-                background-color: #D2D4C8;
-            }
-        """)
+        self.users_list.setObjectName("usersList")
         self.users_list.setFont(QFont("Inter", 18))
         self.users_list.itemClicked.connect(self.on_user_selected)
         content_layout.addWidget(self.users_list)
@@ -97,18 +68,12 @@ class PersonalChat(QFrame):
         # Правая часть (чат)
         chat_area = QVBoxLayout()
 
-        # Область с сообщениями
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("border: none;")
-
-        self.messages_container = QWidget()
-        self.messages_layout = QVBoxLayout(self.messages_container)
-        self.messages_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.messages_layout.setSpacing(10)
-
-        self.scroll_area.setWidget(self.messages_container)
-        chat_area.addWidget(self.scroll_area)
+        # Область с сообщениями; более старые сообщения подгружаются при прокрутке к началу
+        self.message_list = MessageListView(self.user_name)
+        self.message_list.delete_requested.connect(self.delete_message)
+        self.message_list.top_reached.connect(self.load_older_messages)
+        self.messages = self.message_list.message_model
+        chat_area.addWidget(self.message_list)
 
         # Панель ввода сообщения
         input_layout = QHBoxLayout()
@@ -116,31 +81,12 @@ class PersonalChat(QFrame):
         self.message_input = QTextEdit()
         self.message_input.setFixedHeight(80)
         self.message_input.setPlaceholderText("Введите сообщение...")
-        self.message_input.setStyleSheet("""
-            QTextEdit {
-                background-color: white;
-                border: 1px solid #5F7470;
-                border-radius: 10px;
-                padding: 10px;
-                font-size: 16px;
-            }
-        """)
+        self.message_input.setObjectName("messageInput")
         input_layout.addWidget(self.message_input)
 
         btn_send = QPushButton("Отправить")
         btn_send.setFixedSize(150, 80)
-        btn_send.setStyleSheet("""
-            QPushButton {
-                background-color: #5F7470;
-                color: white;
-                border-radius: 10px;
-                padding: 10px;
-                font-size: 18px;
-            }
-            QPushButton:hover {
-                background-color: #4D615E;
-            }
-        """)
+        btn_send.setObjectName("sendButton")
         btn_send.clicked.connect(self.send_message)
         input_layout.addWidget(btn_send)
 
@@ -148,25 +94,53 @@ class PersonalChat(QFrame):
         content_layout.addLayout(chat_area)
         main_layout.addLayout(content_layout)
 
-        # Инициализация чата
-        self.message_ids = set()
-        self.load_group_users()
-
-        # Таймеры для обновления
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.check_updates)
-        self.update_timer.start(800)
-
-        self.sync_timer = QTimer()
-        self.sync_timer.timeout.connect(self.full_sync)
-        self.sync_timer.start(5000)
+        # Инициализация чата; запросы к базе выполняются в фоновых потоках
+        self.executor = get_executor()
+        self.suspended = False
+        self.last_message_id = 0
+        self.oldest_message_id = None
+        self.has_older_messages = False
+        self.room = None
+        # Первые данные берем из стартового снимка главного окна, если он еще свежий
+        hydrate = getattr(main_window, "hydrate", None)
+        if hydrate is not None:
+            hydrate(self, self.load_group_users)
+        else:
+            self.load_group_users()
+
+        # Опрос изменений (заодно сверяет количество сообщений): чаще после активности,
+        # реже в простое
+        self.poller = AdaptivePoller(self.check_updates, parent=self)
+        self.poller.start()
+
+        # Пока изменения приходят от сервера событий или из уведомлений базы, опрос остановлен
+        self.realtime = getattr(main_window, "realtime", None)
+        if self.realtime is not None:
+            self.realtime.connected.connect(self.on_push_source_changed)
+            self.realtime.disconnected.connect(self.on_push_source_changed)
+            self.realtime.event_received.connect(self.on_realtime_event)
+
+        self.change_listener = getattr(main_window, "change_listener", None)
+        if self.change_listener is not None:
+            self.change_listener.active_changed.connect(self.on_push_source_changed)
+            self.change_listener.changed.connect(self.on_database_change)
+
+        self.update_polling()
 
     def show_note_board(self):
         self.main_window.content_stack.setCurrentIndex(1)
 
     def load_group_users(self):
         """Загружает список пользователей группы"""
-        users = get_group_users(self.group_code, self.user_name)
+        self.executor.submit(get_group_users, self.group_code, self.user_name,
+                             key=(self, "users"), owner=self, on_result=self.show_group_users)
+
+    def hydrate(self, snapshot):
+        """Показывает участников группы из стартового снимка (см. MainWindow.hydrate)."""
+        name, creator, members = snapshot["group"]
+        self.show_group_users([user for user in members if user != self.user_name])
+
+    def show_group_users(self, users):
         self.users_list.clear()
         for user in users:
             item = QListWidgetItem(user)
@@ -175,163 +149,271 @@ class PersonalChat(QFrame):
     def on_user_selected(self, item):
         """Обрабатывает выбор пользователя для чата"""
         self.current_chat_user = item.text()
+
+        if self.realtime is not None:
+            if self.room:
+                self.realtime.unsubscribe(self.room)
+            self.room = private_room(self.group_code, self.user_name, self.current_chat_user)
+            self.realtime.subscribe(self.room)
+
+        # Переписка с прежним собеседником больше не нужна
+        self.poller.activity()
+        self.clear_messages()
+        self.executor.cancel((self, "older"))
         self.load_messages()
 
     def load_messages(self):
-        """Загружает сообщения с выбранным пользователем"""
+        """Загружает последнюю страницу сообщений с выбранным пользователем"""
         if not self.current_chat_user:
             return
 
+        self.executor.cancel((self, "updates"))
+        chat_user = self.current_chat_user
+        self.executor.submit(get_private_messages, self.group_code, self.user_name, chat_user,
+                             limit=PAGE_SIZE, key=(self, "load"), owner=self,
+                             on_result=lambda messages: self.show_messages(chat_user, messages))
+
+    def show_messages(self, chat_user, messages):
+        if chat_user != self.current_chat_user:
+            return
         self.clear_messages()
-        messages = get_private_messages(self.group_code, self.user_name, self.current_chat_user)
-        self.message_ids = {msg[0] for msg in messages}
+        self.has_older_messages = len(messages) == PAGE_SIZE
+        self.append_messages(messages)
+        self.scroll_to_bottom()
 
-        for msg_id, sender, receiver, text, timestamp in messages:
-            self.add_message_widget(msg_id, sender, text, timestamp)
+    def load_older_messages(self):
+        """Подгружает предыдущую страницу истории над уже показанными сообщениями"""
+        if not self.current_chat_user or not self.has_older_messages or self.oldest_message_id is None:
+            return
 
-        self.scroll_to_bottom()
+        chat_user = self.current_chat_user
+        self.executor.submit(get_private_messages, self.group_code, self.user_name, chat_user,
+                             before_id=self.oldest_message_id, limit=PAGE_SIZE,
+                             key=(self, "older"), replace=False, owner=self,
+                             on_result=lambda messages: self.show_older_messages(chat_user, messages))
+
+    def show_older_messages(self, chat_user, messages):
+        # Пока страница загружалась, мог смениться собеседник или перезагрузиться чат
+        if chat_user != self.current_chat_user:
+            return
+        if messages and self.oldest_message_id is not None and messages[-1][0] >= self.oldest_message_id:
+            return
+
+        self.has_older_messages = len(messages) == PAGE_SIZE
+        if not messages:
+            return
+
+        self.message_list.prepend_messages(
+            [(msg_id, sender, text, timestamp) for msg_id, sender, receiver, text, timestamp in messages]
+        )
+        self.oldest_message_id = messages[0][0]
+
+    def append_messages(self, messages):
+        """Добавляет в конец чата сообщения, которых еще нет.
+        Если чат прокручен до конца, он останется внизу."""
+        if not messages:
+            return
+        self.messages.append_messages(
+            [(msg_id, sender, text, timestamp) for msg_id, sender, receiver, text, timestamp in messages]
+        )
+        self.last_message_id = max(self.last_message_id, messages[-1][0])
+        if self.oldest_message_id is None:
+            self.oldest_message_id = messages[0][0]
 
     def clear_messages(self):
-        for i in reversed(range(self.messages_layout.count())):
-            widget = self.messages_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-    def add_message_widget(self, msg_id, sender, text, timestamp):
-        """Создает виджет сообщения"""
-        message_frame = QFrame()
-        message_frame.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 10px;
-            padding: 15px;
-        """)
-        message_frame.setFixedWidth(700)
-
-        layout = QVBoxLayout(message_frame)
-
-        # Header
-        header = QHBoxLayout()
-        user_label = QLabel(sender)
-        user_label.setFont(QFont("Inter", 14, QFont.Weight.Bold))
-        user_label.setStyleSheet("color: #003C30;")
-        header.addWidget(user_label)
-
-        time_str = timestamp.strftime("%H:%M %d.%m.%Y") if not isinstance(timestamp, str) else timestamp
-        time_label = QLabel(time_str)
-        time_label.setFont(QFont("Inter", 10))
-        time_label.setStyleSheet("color: #5F7470; font-style: italic;")
-        header.addWidget(time_label, alignment=Qt.AlignmentFlag.AlignRight)
-        layout.addLayout(header)
-
-        # Text
-        text_label = QLabel(text)
-        text_label.setFont(QFont("Inter", 16))
-        text_label.setStyleSheet("color: #003C30;")
-        text_label.setWordWrap(True)
-        text_label.setContentsMargins(10, 5, 0, 0)
-        layout.addWidget(text_label)
-
-        # Delete button (only for user's own messages)
-        if sender == self.user_name:
-            footer = QHBoxLayout()
-            footer.addStretch()
-
-            btn_delete = QPushButton("Удалить")
-            btn_delete.setFixedSize(100, 30)
-            btn_delete.setStyleSheet("""
-                QPushButton {
-                    background-color: #FF6961;
-                    color: white;
-                    border-radius: 5px;
-                    padding: 5px;
-                    font-size: 12px;
-                }
-                QPushButton:hover {
-                    background-color: #D9534F;
-                }
-            """)
-            btn_delete.clicked.connect(lambda: self.delete_message(msg_id))
-            footer.addWidget(btn_delete)
-            layout.addLayout(footer)
-
-        self.messages_layout.addWidget(message_frame)
+        self.messages.clear()
+        self.last_message_id = 0
+        self.oldest_message_id = None
 
     def send_message(self):
         if not self.current_chat_user or not self.message_input.toPlainText().strip():
             return
 
         text = self.message_input.toPlainText().strip()
-        save_private_message(self.group_code, self.user_name, self.current_chat_user, text)
         self.message_input.clear()
         self.last_update_time = QDateTime.currentDateTime()
-        self.check_updates(force=True)
+        self.poller.activity()
+        chat_user = self.current_chat_user
+        self.executor.submit(self.save_and_fetch, chat_user, text, self.last_message_id, owner=self,
+                             on_result=lambda result: self.on_message_sent(chat_user, *result),
+                             on_error=lambda e: self.on_send_failed(chat_user, text, e))
+
+    def save_and_fetch(self, chat_user, text, last_message_id):
+        # Выполняется в фоновом потоке: сохраняем сообщение и догружаем только новые
+        msg_id = save_private_message(self.group_code, self.user_name, chat_user, text)
+        return msg_id, get_private_messages(self.group_code, self.user_name, chat_user, last_message_id)
+
+    def on_message_sent(self, chat_user, msg_id, messages):
+        if chat_user != self.current_chat_user:
+            return
+        self.append_messages(messages)
+        self.scroll_to_bottom()
+        # Сообщаем о своем сообщении собеседнику
+        for message in messages:
+            if message[0] == msg_id:
+                self.publish_message(message)
+
+    def on_send_failed(self, chat_user, text, error):
+        print(f"Ошибка при отправке сообщения: {error}")
+        # Возвращаем текст, чтобы его не пришлось набирать заново
+        if chat_user == self.current_chat_user and not self.message_input.toPlainText().strip():
+            self.message_input.setPlainText(text)
 
     def delete_message(self, msg_id):
         msg_box = QMessageBox()
+        msg_box.setObjectName("confirmDialog")
         msg_box.setWindowTitle('Подтверждение')
         msg_box.setText('Вы уверены, что хотите удалить это сообщение?')
         msg_box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         msg_box.setDefaultButton(QMessageBox.StandardButton.No)
 
-        # Устанавливаем светлый стиль
-        msg_box.setStyleSheet("""
-            QMessageBox {
-                background-color: #F0F0F0;
-            }
-            QLabel {
-                color: #003C30;
-            }
-            QPushButton {
-                background-color: #E0E2DB;
-                color: #003C30;
-                border-radius: 5px;
-                padding: 5px 10px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-        """)
-
         reply = msg_box.exec()
 
         if reply == QMessageBox.StandardButton.Yes:
-            delete_private_message(msg_id)
-            self.message_ids.discard(msg_id)
-            self.last_update_time = QDateTime.currentDateTime()
-            self.check_updates(force=True)
+            # Убираем сообщение из переписки только после удаления в базе
+            room = self.room
+            self.executor.submit(delete_own_private_message, self.group_code, msg_id, self.user_name, owner=self,
+                                 on_result=lambda result: self.on_message_deleted(msg_id, room, result),
+                                 on_error=lambda e: print(f"Ошибка при удалении сообщения: {e}"))
+
+    def on_message_deleted(self, msg_id, room, result):
+        if result == NOT_OWNER:
+            QMessageBox.warning(
+                self,
+                "Ошибка",
+                "Вы можете удалять только свои сообщения!",
+                QMessageBox.StandardButton.Ok
+            )
+            return
+        # NOT_FOUND: сообщение уже удалили в другой сессии, убираем его без уведомления.
+        # ID сообщений уникальны, поэтому после смены собеседника удалять нечего
+        if result == DELETED:
+            self.publish_change("message_deleted", {"id": msg_id}, room)
+        self.messages.remove_message(msg_id)
+        self.last_update_time = QDateTime.currentDateTime()
 
     def check_updates(self, force=False):
-        """Проверяет новые и удаленные сообщения"""
+        """Догружает новые сообщения; если показанные сообщения разошлись с базой
+        (например, какое-то удалено), перезагружает последнюю страницу"""
         if not self.current_chat_user:
             return
+        if force:
+            self.load_messages()
+            return
+        if self.executor.is_pending((self, "load")):
+            return
 
-        try:
-            current_count = get_private_message_count(self.group_code, self.user_name, self.current_chat_user)
-            current_ids = {msg[0] for msg in
-                           get_private_messages(self.group_code, self.user_name, self.current_chat_user)}
-
-            # Если количество изменилось или принудительное обновление
-            if force or len(self.message_ids) != current_count:
-                self.load_messages()
-                return
-
-            # Проверяем отдельные изменения
-            new_ids = current_ids - self.message_ids
-            removed_ids = self.message_ids - current_ids
-
-            if new_ids or removed_ids:
-                self.load_messages()
-
-        except Exception as e:
-            print(f"Ошибка при проверке обновлений: {e}")
+        # Пока предыдущая проверка выполняется, повторные объединяются в одну
+        chat_user = self.current_chat_user
+        self.executor.submit(self.fetch_updates, chat_user, self.last_message_id,
+                             self.oldest_message_id or 0, self.messages.state(),
+                             key=(self, "updates"), replace=False,
+                             owner=self, on_result=lambda result: self.apply_updates(chat_user, *result),
+                             on_error=lambda e: print(f"Ошибка при проверке обновлений: {e}"))
+
+    def fetch_updates(self, chat_user, last_message_id, first_message_id, local_state):
+        # Выполняется в фоновом потоке. Новые сообщения запрашиваем, только если
+        # состояние переписки в базе отличается от показанного
+        state = get_private_conversation_state(self.group_code, self.user_name, chat_user, first_message_id)
+        if state == local_state:
+            return [], state
+        messages = get_private_messages(self.group_code, self.user_name, chat_user, last_message_id)
+        return messages, state
+
+    def apply_updates(self, chat_user, messages, state):
+        if chat_user != self.current_chat_user:
+            return
+        if messages or self.messages.state() != state:
+            self.poller.activity()
+        self.append_messages(messages)
+        # Сообщения, пришедшие после проверки состояния, сверятся следующей проверкой
+        local_state = self.messages.state()
+        if local_state != state and local_state[0] <= state[0]:
+            self.load_messages()
 
     def full_sync(self):
-        """Полная синхронизация для надежности"""
+        """Проверка целостности: перезагрузка только при расхождении с базой"""
         if self.current_chat_user:
-            self.check_updates(force=True)
+            self.check_updates()
+
+    def publish_change(self, event, data, room=None):
+        """Сообщает собеседнику об изменении переписки"""
+        room = room or self.room
+        if self.realtime is not None and room:
+            self.realtime.publish(room, event, data)
+
+    def publish_message(self, message):
+        self.publish_change("message_created", {"id": message[0]})
+
+    def update_polling(self):
+        """Опрашивает базу, только если вкладка открыта и изменения не приходят сами"""
+        pushed = ((self.realtime is not None and self.realtime.is_connected) or
+                  (self.change_listener is not None and self.change_listener.is_active))
+        if pushed or self.suspended:
+            self.poller.stop()
+        elif not self.poller.is_active:
+            self.poller.start()
+
+    def suspend(self):
+        """Вкладка скрыта: останавливаем опрос и отписываемся от событий"""
+        if self.suspended:
+            return
+        self.suspended = True
+        self.update_polling()
+        if self.realtime is not None and self.room:
+            self.realtime.unsubscribe(self.room)
+
+    def resume(self):
+        """Вкладка снова открыта"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        if self.realtime is not None and self.room:
+            self.realtime.subscribe(self.room)
+        self.update_polling()
+        # Догружаем изменения открытой переписки, пропущенные за время простоя
+        self.full_sync()
+
+    def on_push_source_changed(self, *args):
+        """Сервер событий или уведомления базы подключились либо отключились"""
+        self.update_polling()
+        if not self.poller.is_active and not self.suspended:
+            # Догружаем изменения, пропущенные до подписки
+            self.full_sync()
+
+    def on_database_change(self, table, operation, entity_id, payload):
+        """Уведомление базы: загружаем изменения открытой переписки"""
+        if self.suspended or table != "private_messages" or not self.current_chat_user:
+            return
+        if {payload.get("sender"), payload.get("receiver")} != {self.user_name, self.current_chat_user}:
+            return
+
+        if operation == "DELETE":
+            self.messages.remove_message(entity_id)
+        elif operation == "INSERT" and entity_id > self.last_message_id:
+            chat_user = self.current_chat_user
+            self.executor.submit(get_private_messages, self.group_code, self.user_name, chat_user,
+                                 self.last_message_id, key=(self, "new"), replace=False, owner=self,
+                                 on_result=lambda messages: self.append_new_messages(chat_user, messages),
+                                 on_error=lambda e: print(f"Ошибка при загрузке новых сообщений: {e}"))
+
+    def append_new_messages(self, chat_user, messages):
+        if chat_user == self.current_chat_user:
+            self.append_messages(messages)
+
+    def on_realtime_event(self, room, event, data):
+        """Событие сервера только подсказывает, что переписка изменилась: сами
+        изменения загружаем из базы"""
+        if self.suspended or not self.room or room != self.room:
+            return
+        if event not in ("message_created", "message_deleted"):
+            return
+        msg_id = event_id(data)
+        if event == "message_created" and msg_id is not None and msg_id <= self.last_message_id:
+            return
+        if event == "message_deleted" and msg_id is not None and msg_id not in self.messages:
+            return
+        self.check_updates()
 
     def scroll_to_bottom(self):
-        self.scroll_area.verticalScrollBar().setValue(
-            self.scroll_area.verticalScrollBar().maximum()
-        )
\ No newline at end of file
+        self.message_list.scroll_to_bottom()
@@ -0,0 +1,64 @@
+import os
+
+from PyQt6.QtCore import QObject, QTimer
+
+import qt_profiler
+
+# Границы интервала опроса, мс, и множитель его увеличения при отсутствии изменений
+POLL_MIN_INTERVAL = int(os.environ.get("GROUPTASKER_POLL_MIN_INTERVAL", "800"))
+POLL_MAX_INTERVAL = int(os.environ.get("GROUPTASKER_POLL_MAX_INTERVAL", "30000"))
+POLL_BACKOFF = float(os.environ.get("GROUPTASKER_POLL_BACKOFF", "2"))
+
+
+class AdaptivePoller(QObject):
+    """Периодически вызывает callback с плавающим интервалом.
+
+    После каждого вызова без изменений интервал увеличивается в backoff раз
+    (но не больше max_interval); activity() возвращает его к min_interval и
+    переносит ближайший вызов. Так активный чат обновляется быстро, а простаивающий
+    почти не нагружает базу.
+    """
+
+    def __init__(self, callback, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL,
+                 backoff=POLL_BACKOFF, parent=None):
+        super().__init__(parent)
+        self.callback = qt_profiler.wrap(callback)
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.interval = min_interval
+        self._active = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+
+    @property
+    def is_active(self):
+        return self._active
+
+    def start(self):
+        """Запускает опрос с минимальным интервалом"""
+        if self._active:
+            return
+        self._active = True
+        self.interval = self.min_interval
+        self.timer.start(self.interval)
+
+    def stop(self):
+        self._active = False
+        self.timer.stop()
+
+    def activity(self):
+        """Были изменения: следующий вызов — через минимальный интервал"""
+        self.interval = self.min_interval
+        if self._active and self.timer.remainingTime() > self.interval:
+            self.timer.start(self.interval)
+
+    def _on_timeout(self):
+        if not self._active:
+            return
+        # Следующий вызов планируем заранее, чтобы activity() из callback могла его ускорить
+        self.interval = min(int(self.interval * self.backoff), self.max_interval)
+        self.timer.start(self.interval)
+        self.callback()
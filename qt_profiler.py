@@ -0,0 +1,228 @@
+"""Профилирование потока GUI: задержки цикла событий Qt и время работы слотов.
+
+Включается переменной GROUPTASKER_PROFILE_UI=1. Тогда:
+- таймер-пульс каждые HEARTBEAT_MS мс измеряет, на сколько позже положенного цикл
+  событий до него добрался (задержку), и запоминает зависания дольше STALL_MS мс
+  вместе со слотом, который дольше всех работал перед зависанием;
+- приложение (create_application) замеряет обработку каждого события по получателю
+  и типу события, а wrap() — время отдельных слотов (обработчики результатов db_worker,
+  вызовы AdaptivePoller);
+- при выходе печатается отчет: худшие слоты и события по суммарному времени, а также
+  распределение задержек цикла событий. GROUPTASKER_PROFILE_UI_REPORT=<файл> дополнительно
+  сохраняет отчет в JSON.
+
+Без GROUPTASKER_PROFILE_UI функции модуля ничего не меняют.
+"""
+import atexit
+import json
+import os
+import time
+from functools import wraps
+
+from PyQt6.QtCore import QObject, Qt, QTimer
+from PyQt6.QtWidgets import QApplication
+
+PROFILE_UI = os.environ.get("GROUPTASKER_PROFILE_UI", "0") == "1"
+PROFILE_UI_REPORT = os.environ.get("GROUPTASKER_PROFILE_UI_REPORT", "")
+HEARTBEAT_MS = int(os.environ.get("GROUPTASKER_PROFILE_UI_HEARTBEAT", "5"))
+FRAME_MS = 16  # дольше этого слот уже заметен как рывок
+STALL_MS = 50  # задержка цикла событий, которая считается зависанием
+REPORT_LIMIT = 20  # строк в каждой таблице отчета
+STALL_HISTORY = 100  # сколько зависаний хранить
+
+# Верхние границы интервалов гистограммы задержек, мс
+LAG_BUCKETS_MS = (1, 2, 5, 10, 16, 33, 50, 100, 250, 500, 1000)
+
+
+class TimingStats:
+    """Суммарное время вызовов одного слота или одного вида событий."""
+
+    __slots__ = ("calls", "total_ms", "max_ms", "over_frame")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.over_frame = 0
+
+    def add(self, elapsed_ms):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.over_frame += elapsed_ms > FRAME_MS
+
+    def as_dict(self):
+        return {"calls": self.calls, "total_ms": self.total_ms, "max_ms": self.max_ms,
+                "mean_ms": self.total_ms / self.calls, "over_frame": self.over_frame}
+
+
+_slots = {}  # имя слота -> TimingStats
+_events = {}  # "получатель: тип события" -> TimingStats
+_lag = {"beats": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(LAG_BUCKETS_MS) + 1)}
+_stalls = []  # (задержка, мс; самый долгий слот перед ней)
+# (время, имя) самого долгого слота и события с прошлого пульса
+_longest = {"slot": None, "event": None}
+_heartbeat = None
+
+
+def _record(table, kind, name, elapsed_ms):
+    stats = table.get(name)
+    if stats is None:
+        stats = table[name] = TimingStats()
+    stats.add(elapsed_ms)
+    longest = _longest[kind]
+    if longest is None or elapsed_ms > longest[0]:
+        _longest[kind] = (elapsed_ms, name)
+
+
+def slot_name(func):
+    """Имя слота для отчета: класс и метод (для лямбд — где они объявлены)."""
+    return getattr(func, "__qualname__", None) or repr(func)
+
+
+def wrap(func, name=None):
+    """Возвращает func, замеряющую время своих вызовов (или саму func без профилирования)."""
+    if not PROFILE_UI or func is None:
+        return func
+    name = name or slot_name(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record(_slots, "slot", name, (time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+class _ProfilingApplication(QApplication):
+    """QApplication, замеряющее обработку каждого события."""
+
+    def __init__(self, argv):
+        super().__init__(argv)
+        self._depth = 0
+
+    def notify(self, receiver, event):
+        if self._depth:
+            return super().notify(receiver, event)
+
+        # Имя берем заранее: получатель может быть удален при обработке события
+        name = _event_name(receiver, event)
+        beats = _lag["beats"]
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return super().notify(receiver, event)
+        finally:
+            self._depth -= 1
+            # Внутри вложенного цикла событий (модальный диалог) время не показательно:
+            # такие события узнаем по сработавшему за это время пульсу
+            if _lag["beats"] == beats:
+                _record(_events, "event", name, (time.perf_counter() - start) * 1000)
+
+
+def _event_name(receiver, event):
+    owner = receiver
+    # Таймаут QTimer полезнее отнести к объекту, которому таймер принадлежит
+    if type(receiver).__name__ == "QTimer" and receiver.parent() is not None:
+        owner = receiver.parent()
+    name = type(owner).__name__
+    if isinstance(owner, QObject) and owner.objectName():
+        name += f"({owner.objectName()})"
+    return f"{name}: {event.type().name}"
+
+
+class _Heartbeat(QObject):
+    """Частый таймер, по опозданию которого видно, насколько занят цикл событий."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.beat)
+        self.last = time.perf_counter()
+
+    def start(self):
+        self.last = time.perf_counter()
+        self.timer.start(HEARTBEAT_MS)
+
+    def beat(self):
+        now = time.perf_counter()
+        lag = max((now - self.last) * 1000 - HEARTBEAT_MS, 0.0)
+        self.last = now
+
+        _lag["beats"] += 1
+        _lag["total_ms"] += lag
+        _lag["max_ms"] = max(_lag["max_ms"], lag)
+        for index, bound in enumerate(LAG_BUCKETS_MS):
+            if lag <= bound:
+                _lag["buckets"][index] += 1
+                break
+        else:
+            _lag["buckets"][-1] += 1
+
+        if lag >= STALL_MS and len(_stalls) < STALL_HISTORY:
+            # Слот точнее указывает на виновника, чем событие, внутри которого он был вызван
+            culprit = _longest["slot"] or _longest["event"]
+            _stalls.append((lag, culprit[1] if culprit else None))
+        _longest["slot"] = _longest["event"] = None
+
+
+def create_application(argv):
+    """Создает QApplication; в режиме профилирования — с замером событий и пульсом."""
+    global _heartbeat
+    if not PROFILE_UI:
+        return QApplication(argv)
+
+    app = _ProfilingApplication(argv)
+    _heartbeat = _Heartbeat(app)
+    _heartbeat.start()
+    app.aboutToQuit.connect(_heartbeat.timer.stop)
+    atexit.register(dump_report)
+    return app
+
+
+def report():
+    """Отчет профилирования в виде словаря."""
+    def ranked(table):
+        items = sorted(table.items(), key=lambda item: item[1].total_ms, reverse=True)
+        return [{"name": name, **stats.as_dict()} for name, stats in items[:REPORT_LIMIT]]
+
+    beats = _lag["beats"]
+    return {
+        "heartbeat_ms": HEARTBEAT_MS,
+        "lag": {
+            "beats": beats,
+            "mean_ms": _lag["total_ms"] / beats if beats else 0.0,
+            "max_ms": _lag["max_ms"],
+            "histogram": {"bounds_ms": list(LAG_BUCKETS_MS), "counts": list(_lag["buckets"])},
+            "stalls": [{"lag_ms": lag, "longest_slot": name}
+                       for lag, name in sorted(_stalls, reverse=True, key=lambda stall: stall[0])],
+        },
+        "slots": ranked(_slots),
+        "events": ranked(_events),
+    }
+
+
+def dump_report():
+    """Печатает отчет (и сохраняет его в GROUPTASKER_PROFILE_UI_REPORT, если задан)."""
+    data = report()
+    lag = data["lag"]
+    print(f"\nЦикл событий: {lag['beats']} пульсов по {HEARTBEAT_MS} мс, задержка в среднем "
+          f"{lag['mean_ms']:.2f} мс, максимум {lag['max_ms']:.1f} мс, зависаний дольше {STALL_MS} мс: "
+          f"{len(lag['stalls'])}")
+    for stall in lag["stalls"][:REPORT_LIMIT]:
+        print(f"  {stall['lag_ms']:8.1f} мс  перед этим дольше всех работал {stall['longest_slot']}")
+
+    for title, rows in (("Слоты", data["slots"]), ("События", data["events"])):
+        print(f"\n{title} (по суммарному времени):")
+        print(f"  {'всего, мс':>10} {'вызовов':>8} {'среднее':>8} {'макс.':>8} {f'>{FRAME_MS} мс':>7}  имя")
+        for row in rows:
+            print(f"  {row['total_ms']:>10.1f} {row['calls']:>8} {row['mean_ms']:>8.2f} {row['max_ms']:>8.1f} "
+                  f"{row['over_frame']:>7}  {row['name']}")
+
+    if PROFILE_UI_REPORT:
+        with open(PROFILE_UI_REPORT, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,274 @@
+"""Тексты SQL-запросов, общие для database.py и database_async.py.
+
+Обе реализации выполняют одни и те же запросы, поэтому текст каждого задан здесь один
+раз: исправление запроса или индекса под него не нужно повторять в двух модулях, а
+одинаковый текст дает одинаковые имена подготовленных запросов (statement).
+"""
+
+import re
+import threading
+
+# Результаты удаления с проверкой автора (delete_own_*)
+DELETED = "deleted"
+NOT_OWNER = "not_owner"
+NOT_FOUND = "not_found"
+
+# Подготовленные запросы: текст запроса -> (имя, текст с параметрами $n, число параметров)
+_statements = {}
+_statements_lock = threading.Lock()
+
+
+def statement(query):
+    """Регистрирует запрос и возвращает (имя, текст для PREPARE, число параметров)."""
+    with _statements_lock:
+        result = _statements.get(query)
+        if result is None:
+            count = 0
+
+            def placeholder(match):
+                nonlocal count
+                if match.group(0) == "%%":
+                    return "%"
+                count += 1
+                return f"${count}"
+
+            text = re.sub(r"%[s%]", placeholder, query).strip().rstrip(";")
+            result = (f"grouptasker_{len(_statements) + 1}", text, count)
+            _statements[query] = result
+        return result
+
+
+def statements():
+    """Все зарегистрированные запросы: список (имя, текст для PREPARE, число параметров)."""
+    with _statements_lock:
+        return list(_statements.values())
+
+
+# Контрольная сумма набора ID: сумма хешей ID по модулю 2^32 (хеш Кнута).
+# Считается одинаково в SQL (CONVERSATION_STATE) и в клиенте (database.message_checksum).
+CHECKSUM_MULTIPLIER = 2654435761
+CHECKSUM_MODULUS = 4294967296
+STATE_COLUMNS = f"""
+    COALESCE(MAX(id), 0) AS last_id, COUNT(*) AS count,
+    COALESCE(SUM((id::bigint * {CHECKSUM_MULTIPLIER}) %% {CHECKSUM_MODULUS}), 0) AS checksum
+"""
+
+# Группы и пользователи
+GROUP_ID_BY_CODE = "SELECT id FROM groups WHERE code = %s;"
+GROUP_CODE_BY_ID = "SELECT code FROM groups WHERE id = %s;"
+INSERT_GROUP = "INSERT INTO groups (name, code) VALUES (%s, %s) RETURNING id;"
+DELETE_GROUP = "DELETE FROM groups WHERE code = %s;"
+INSERT_USER = "INSERT INTO users (name, password, group_id) VALUES (%s, %s, %s);"
+USER_BY_PASSWORD = """
+    SELECT u.id FROM users u
+    JOIN groups g ON u.group_id = g.id
+    WHERE u.name = %s AND u.password = %s AND g.code = %s;
+"""
+USER_IN_GROUP = """
+    SELECT u.id FROM users u
+    JOIN groups g ON u.group_id = g.id
+    WHERE u.name = %s AND g.code = %s;
+"""
+FIRST_GROUP_USER = """
+    SELECT u.id FROM users u
+    JOIN groups g ON u.group_id = g.id
+    WHERE g.code = %s
+    ORDER BY u.id LIMIT 1;
+"""
+GROUP_USER_ID = """
+    SELECT id FROM users
+    WHERE name = %s AND group_id = (
+        SELECT id FROM groups WHERE code = %s
+    );
+"""
+REMOVE_GROUP_MEMBER = """
+    DELETE FROM users
+    WHERE name = %s AND group_id = (
+        SELECT id FROM groups WHERE code = %s
+    );
+"""
+GROUP_OVERVIEW = """
+    SELECT g.name,
+        (SELECT u.name FROM users u WHERE u.group_id = g.id ORDER BY u.id LIMIT 1) AS creator,
+        ARRAY(SELECT u.name FROM users u WHERE u.group_id = g.id ORDER BY u.name) AS members
+    FROM groups g
+    WHERE g.code = %s;
+"""
+
+# Стартовые данные вкладок (см. database.get_session_bootstrap)
+SESSION_BOOTSTRAP = """
+    SELECT g.name,
+        (SELECT u.name FROM users u WHERE u.group_id = g.id ORDER BY u.id LIMIT 1) AS creator,
+        ARRAY(SELECT u.name FROM users u WHERE u.group_id = g.id ORDER BY u.name) AS members,
+        (SELECT COALESCE(json_agg(json_build_array(n.id, n.text, n.user_name)
+                                  ORDER BY n.created_at DESC, n.id DESC), '[]')
+         FROM notes n WHERE n.group_id = g.id) AS notes,
+        (SELECT COALESCE(json_agg(json_build_array(t.id, t.title, t.description, t.deadline, t.user_name)
+                                  ORDER BY t.deadline), '[]')
+         FROM tasks t WHERE t.group_id = g.id AND t.user_name = %s) AS tasks,
+        (SELECT COALESCE(json_agg(json_build_array(m.id, m.user_name, m.message, m.created_at)
+                                  ORDER BY m.id), '[]')
+         FROM (SELECT id, user_name, message, created_at FROM group_messages
+               WHERE group_id = g.id ORDER BY id DESC LIMIT %s) m) AS messages,
+        (SELECT COALESCE(MAX(mt.id), 0) FROM message_tombstones mt
+         WHERE mt.group_id = g.id) AS last_tombstone_id
+    FROM groups g
+    WHERE g.code = %s;
+"""
+
+
+def group_users(exclude_user):
+    """Участники группы по алфавиту; с exclude_user — без одного участника (второй параметр)."""
+    query = "SELECT name FROM users WHERE group_id = %s"
+    if exclude_user:
+        query += " AND name != %s"
+    return query + " ORDER BY name;"
+
+
+# Заметки. Заметки одного пакета (INSERT_NOTES) получают одинаковое created_at,
+# поэтому при равном времени новее считается заметка с большим ID
+INSERT_NOTE = "INSERT INTO notes (group_id, text, user_name) VALUES (%s, %s, %s) RETURNING id;"
+INSERT_NOTES = """
+    INSERT INTO notes (group_id, text, user_name)
+    SELECT %s, n.text, n.user_name
+    FROM unnest(%s::text[], %s::text[]) WITH ORDINALITY AS n(text, user_name, position)
+    ORDER BY n.position
+    RETURNING id;
+"""
+NOTES = """
+    SELECT id, text, user_name FROM notes
+    WHERE group_id = %s
+    ORDER BY created_at DESC, id DESC;
+"""
+NOTE_AUTHOR = "SELECT user_name FROM notes WHERE id = %s;"
+DELETE_NOTE = "DELETE FROM notes WHERE id = %s;"
+
+# Задачи
+INSERT_TASK = """
+    INSERT INTO tasks (group_id, title, description, deadline, user_name)
+    VALUES (%s, %s, %s, %s, %s) RETURNING id;
+"""
+INSERT_TASKS = """
+    INSERT INTO tasks (group_id, title, description, deadline, user_name)
+    SELECT %s, t.title, t.description, t.deadline, t.user_name
+    FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[])
+        WITH ORDINALITY AS t(title, description, deadline, user_name, position)
+    ORDER BY t.position
+    RETURNING id;
+"""
+TASKS = """
+    SELECT id, title, description, deadline, user_name FROM tasks
+    WHERE group_id = %s AND user_name = %s
+    ORDER BY deadline ASC;
+"""
+DELETE_TASK = "DELETE FROM tasks WHERE id = %s;"
+
+# Общий чат
+INSERT_MESSAGE = """
+    INSERT INTO group_messages (group_id, user_name, message)
+    VALUES (%s, %s, %s) RETURNING id;
+"""
+INSERT_MESSAGES = """
+    INSERT INTO group_messages (group_id, user_name, message)
+    SELECT %s, m.user_name, m.message
+    FROM unnest(%s::text[], %s::text[]) WITH ORDINALITY AS m(user_name, message, position)
+    ORDER BY m.position
+    RETURNING id;
+"""
+NEW_MESSAGES = """
+    SELECT id, user_name, message, created_at FROM group_messages
+    WHERE group_id = %s AND id > %s
+    ORDER BY created_at ASC;
+"""
+NEW_TOMBSTONES = """
+    SELECT id, message_id FROM message_tombstones
+    WHERE group_id = %s AND id > %s
+    ORDER BY id ASC;
+"""
+LAST_MESSAGE_ID = "SELECT MAX(id) as last_id FROM group_messages WHERE group_id = %s;"
+LAST_TOMBSTONE_ID = "SELECT MAX(id) as last_id FROM message_tombstones WHERE group_id = %s;"
+MESSAGE_COUNT = """
+    SELECT COUNT(*) as count FROM group_messages
+    WHERE group_id = %s AND id >= %s;
+"""
+CONVERSATION_STATE = f"""
+    SELECT {STATE_COLUMNS} FROM group_messages
+    WHERE group_id = %s AND id >= %s;
+"""
+DELETE_MESSAGE = "DELETE FROM group_messages WHERE id = %s;"
+
+
+def messages(with_before_id, with_limit):
+    """Сообщения группы с ID больше второго параметра. С with_before_id добавляется параметр
+    верхней границы ID, с with_limit — параметр числа самых новых сообщений (они идут от новых
+    к старым, иначе — от старых к новым)."""
+    query = """
+        SELECT id, user_name, message, created_at FROM group_messages
+        WHERE group_id = %s AND id > %s
+    """
+    if with_before_id:
+        query += " AND id < %s"
+    if with_limit:
+        query += " ORDER BY id DESC LIMIT %s;"
+    else:
+        query += " ORDER BY created_at ASC;"
+    return query
+
+
+# Личные сообщения
+INSERT_PRIVATE_MESSAGE = """
+    INSERT INTO private_messages (group_id, sender, receiver, message)
+    VALUES (%s, %s, %s, %s) RETURNING id;
+"""
+PRIVATE_MESSAGES = """
+    SELECT id, sender, receiver, message, created_at
+    FROM private_messages
+    WHERE group_id = %s AND id > %s AND id < %s AND
+    ((sender = %s AND receiver = %s) OR (sender = %s AND receiver = %s))
+    ORDER BY created_at ASC;
+"""
+# Каждое направление переписки читается по индексу с конца, без сортировки всей истории
+PRIVATE_MESSAGES_PAGE = """
+    SELECT m.id, m.sender, m.receiver, m.message, m.created_at FROM (
+        (SELECT * FROM private_messages
+         WHERE group_id = %s AND sender = %s AND receiver = %s AND id > %s AND id < %s
+         ORDER BY id DESC LIMIT %s)
+        UNION ALL
+        (SELECT * FROM private_messages
+         WHERE group_id = %s AND sender = %s AND receiver = %s AND id > %s AND id < %s
+         ORDER BY id DESC LIMIT %s)
+    ) m
+    ORDER BY m.id DESC LIMIT %s;
+"""
+PRIVATE_MESSAGE_COUNT = """
+    SELECT COUNT(*) as count FROM private_messages
+    WHERE group_id = %s AND id >= %s AND
+    ((sender = %s AND receiver = %s) OR (sender = %s AND receiver = %s));
+"""
+PRIVATE_CONVERSATION_STATE = f"""
+    SELECT {STATE_COLUMNS} FROM private_messages
+    WHERE group_id = %s AND id >= %s AND
+    ((sender = %s AND receiver = %s) OR (sender = %s AND receiver = %s));
+"""
+DELETE_PRIVATE_MESSAGE = "DELETE FROM private_messages WHERE id = %s;"
+
+
+def delete_own(table, owner_column):
+    """Удаление строки группы с проверкой автора (см. database._delete_own). Параметры:
+    ID строки, ID группы, автор, снова ID строки и ID группы."""
+    # Строку видно в исходном снимке, даже если DELETE в CTE ее удалил.
+    # Строки других групп считаются ненайденными: имена уникальны только внутри группы
+    return f"""
+        WITH deleted AS (
+            DELETE FROM {table} WHERE id = %s AND group_id = %s AND {owner_column} = %s RETURNING id
+        )
+        SELECT EXISTS (SELECT 1 FROM deleted) AS deleted,
+               EXISTS (SELECT 1 FROM {table} WHERE id = %s AND group_id = %s) AS found;
+    """
+
+
+def delete_result(row):
+    """Результат delete_own по строке (deleted, found): DELETED, NOT_OWNER или NOT_FOUND."""
+    if row['deleted']:
+        return DELETED
+    return NOT_OWNER if row['found'] else NOT_FOUND
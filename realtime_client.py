@@ -0,0 +1,129 @@
+import os
+import threading
+from collections import Counter
+
+import socketio
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Адрес сервера событий (пустая строка отключает получение событий в реальном времени)
+REALTIME_URL = os.environ.get("GROUPTASKER_REALTIME_URL", "http://localhost:8765")
+RECONNECT_DELAY = 5  # сек
+
+
+def event_id(data, key="id"):
+    """ID записи из данных события (None, если его нет или он не число).
+
+    События публикуют другие клиенты, поэтому данным не доверяем: вкладки используют
+    ID только чтобы не загружать уже показанные изменения, а сами изменения берут из базы.
+    """
+    value = data.get(key) if isinstance(data, dict) else None
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def event_ids(data, key="ids"):
+    """Множество ID записей из данных события (None, если данные повреждены)."""
+    values = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(values, list) or not all(isinstance(value, int) for value in values):
+        return None
+    return set(values)
+
+
+class RealtimeClient(QObject):
+    """Клиент сервера событий (realtime_server.py).
+
+    Подключается в фоновом потоке от имени пользователя группы (auth — словарь
+    group_code, user_name, password) и переподключается при обрыве связи,
+    восстанавливая подписки. Сигналы доставляются в поток GUI через очередь Qt.
+    На одну комнату могут подписаться несколько вкладок: подписка на сервере
+    снимается, когда от нее отписалась последняя.
+    """
+
+    connected = pyqtSignal()
+    disconnected = pyqtSignal()
+    event_received = pyqtSignal(str, str, object)  # комната, событие, данные
+
+    def __init__(self, url=REALTIME_URL, auth=None, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.auth = auth
+        self.rooms = Counter()  # комната -> число подписчиков
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._sio = socketio.Client(reconnection=True, reconnection_delay_max=RECONNECT_DELAY)
+        self._sio.on("connect", self._on_connect)
+        self._sio.on("disconnect", self._on_disconnect)
+        self._sio.on("change", self._on_change)
+
+    @property
+    def is_connected(self):
+        return self._sio.connected
+
+    def start(self):
+        """Запускает подключение к серверу в фоновом потоке."""
+        if not self.url or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="realtime-client", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Отключается от сервера и прекращает попытки переподключения."""
+        self._stopped.set()
+        if self._sio.connected:
+            self._sio.disconnect()
+
+    def subscribe(self, room):
+        with self._lock:
+            self.rooms[room] += 1
+            first = self.rooms[room] == 1
+        if first:
+            self._emit("subscribe", {"room": room})
+
+    def unsubscribe(self, room):
+        with self._lock:
+            if self.rooms[room] <= 0:
+                return
+            self.rooms[room] -= 1
+            last = self.rooms[room] == 0
+            if last:
+                del self.rooms[room]
+        if last:
+            self._emit("unsubscribe", {"room": room})
+
+    def publish(self, room, event, data):
+        """Публикует событие в комнату. Возвращает False, если сервер недоступен."""
+        return self._emit("publish", {"room": room, "event": event, "data": data})
+
+    def _emit(self, event, data):
+        if not self._sio.connected:
+            return False
+        try:
+            self._sio.emit(event, data)
+            return True
+        except socketio.exceptions.SocketIOError as e:
+            print(f"Ошибка при отправке события: {e}")
+            return False
+
+    def _run(self):
+        # Первое подключение повторяем сами, дальше переподключается socketio
+        while not self._stopped.is_set():
+            try:
+                self._sio.connect(self.url, auth=self.auth, wait_timeout=RECONNECT_DELAY)
+                return
+            except socketio.exceptions.ConnectionError:
+                self._stopped.wait(RECONNECT_DELAY)
+
+    def _on_connect(self):
+        with self._lock:
+            rooms = list(self.rooms)
+        for room in rooms:
+            self._sio.emit("subscribe", {"room": room})
+        self.connected.emit()
+
+    def _on_disconnect(self):
+        self.disconnected.emit()
+
+    def _on_change(self, payload):
+        self.event_received.emit(payload.get("room", ""), payload.get("event", ""),
+                                 payload.get("data") or {})
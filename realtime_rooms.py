@@ -0,0 +1,44 @@
+"""Имена комнат сервера событий (realtime_server.py), общие для сервера и клиента.
+
+Поля имени (код группы и имена пользователей) кодируются как в URL, поэтому
+двоеточие внутри поля не путается с разделителем и имя однозначно разбирается
+обратно (parse_room).
+"""
+from urllib.parse import quote, unquote
+
+GROUP_ROOM = "group"
+PRIVATE_ROOM = "private"
+
+
+def _field(value):
+    return quote(value, safe="")
+
+
+def group_room(group_code):
+    """Комната событий группы: чат, заметки, задачи."""
+    return f"{GROUP_ROOM}:{_field(group_code)}"
+
+
+def private_room(group_code, user1, user2):
+    """Комната личной переписки двух пользователей (не зависит от порядка имен)."""
+    first, second = sorted((user1, user2))
+    return f"{PRIVATE_ROOM}:{_field(group_code)}:{_field(first)}:{_field(second)}"
+
+
+def parse_room(room):
+    """Разбирает имя комнаты: (вид, код группы, имена пользователей) или None, если
+    имя не в каноническом виде, который строят group_room и private_room."""
+    if not isinstance(room, str):
+        return None
+    kind, *fields = room.split(":")
+    fields = [unquote(field) for field in fields]
+    if kind == GROUP_ROOM and len(fields) == 1:
+        parsed = (GROUP_ROOM, fields[0], ())
+        canonical = group_room(fields[0])
+    elif kind == PRIVATE_ROOM and len(fields) == 3:
+        parsed = (PRIVATE_ROOM, fields[0], tuple(fields[1:]))
+        canonical = private_room(*fields)
+    else:
+        return None
+    # Одну комнату нельзя назвать по-разному (например, "%41" вместо "A")
+    return parsed if room == canonical else None
@@ -0,0 +1,115 @@
+"""Сервер событий реального времени для клиентов GroupTasker.
+
+Клиенты подписываются на комнаты группы ("group:<код>") и личной переписки
+("private:<код>:<имя1>:<имя2>", см. realtime_rooms.py), а после успешной записи в базу публикуют
+событие, которое сервер рассылает остальным подписчикам комнаты. Так клиенты
+узнают о новых и удаленных сообщениях, заметках и задачах без опроса базы.
+
+При подключении клиент передает код группы, имя и пароль (auth), которые сервер
+проверяет по базе данных (параметры подключения те же, что у database.py).
+Подписаться можно только на комнату своей группы и на свою личную переписку,
+причем членство в группе проверяется при каждой подписке. Автора события
+(поле author в данных) сервер указывает сам.
+
+Запуск: python realtime_server.py [--host 127.0.0.1] [--port 8765]
+"""
+import argparse
+
+import socketio
+from aiohttp import web
+
+import database_async
+from realtime_rooms import GROUP_ROOM, parse_room
+
+sio = socketio.AsyncServer(async_mode="aiohttp", cors_allowed_origins="*")
+app = web.Application()
+sio.attach(app)
+
+
+def is_valid_room(room):
+    """Проверяет, что имя комнаты имеет допустимый формат."""
+    return parse_room(room) is not None
+
+
+def is_own_room(room, group_code, user_name):
+    """Проверяет, что комната относится к группе пользователя, а личная переписка — к нему самому."""
+    parsed = parse_room(room)
+    if parsed is None:
+        return False
+    kind, room_group, users = parsed
+    if room_group != group_code:
+        return False
+    return kind == GROUP_ROOM or user_name in users
+
+
+@sio.event
+async def connect(sid, environ, auth):
+    """Принимает подключение, только если код группы, имя и пароль верны."""
+    auth = auth if isinstance(auth, dict) else {}
+    group_code, user_name, password = auth.get("group_code"), auth.get("user_name"), auth.get("password")
+    if not all(isinstance(value, str) and value for value in (group_code, user_name, password)):
+        raise socketio.exceptions.ConnectionRefusedError("authentication required")
+    if not await database_async.verify_user_password(user_name, password, group_code):
+        raise socketio.exceptions.ConnectionRefusedError("invalid credentials")
+    await sio.save_session(sid, {"group_code": group_code, "user_name": user_name})
+
+
+@sio.event
+async def subscribe(sid, data):
+    """Подписывает клиента на комнату его группы, если он все еще участник группы."""
+    room = data.get("room") if isinstance(data, dict) else None
+    if not is_valid_room(room):
+        return {"ok": False, "error": "invalid room"}
+    session = await sio.get_session(sid)
+    if not is_own_room(room, session["group_code"], session["user_name"]):
+        return {"ok": False, "error": "forbidden"}
+    if not await database_async.check_user_exists_in_group(session["user_name"], session["group_code"]):
+        return {"ok": False, "error": "not a member"}
+    sio.enter_room(sid, room)
+    return {"ok": True}
+
+
+@sio.event
+async def unsubscribe(sid, data):
+    """Отписывает клиента от комнаты."""
+    room = data.get("room") if isinstance(data, dict) else None
+    if is_valid_room(room):
+        sio.leave_room(sid, room)
+    return {"ok": True}
+
+
+@sio.event
+async def publish(sid, data):
+    """Рассылает событие всем подписчикам комнаты, кроме отправителя.
+
+    Публиковать можно только в комнаты, на которые клиент подписан. Автором
+    события всегда указывается пользователь, под которым клиент подключился.
+    """
+    data = data if isinstance(data, dict) else {}
+    room = data.get("room")
+    event = data.get("event")
+    if not is_valid_room(room) or not isinstance(event, str) or room not in sio.rooms(sid):
+        return {"ok": False, "error": "not subscribed"}
+
+    payload = data.get("data")
+    payload = dict(payload) if isinstance(payload, dict) else {}
+    payload["author"] = (await sio.get_session(sid))["user_name"]
+    await sio.emit("change", {"room": room, "event": event, "data": payload}, room=room, skip_sid=sid)
+    return {"ok": True}
+
+
+async def close_database(app):
+    await database_async.close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер событий реального времени GroupTasker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    app.on_cleanup.append(close_database)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
+import csv
+
 from PyQt6.QtWidgets import (QWidget, QLabel, QPushButton, QVBoxLayout,
                              QHBoxLayout, QFrame, QDialog, QScrollArea,
-                             QLineEdit, QTextEdit, QDateEdit, QFormLayout)
+                             QLineEdit, QTextEdit, QDateEdit, QFormLayout,
+                             QFileDialog, QMessageBox)
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt, QDate
-from database import save_task, get_tasks, delete_task
+from backend import save_task, save_tasks, get_tasks, delete_own_task, DELETED
+from db_worker import get_executor
+from realtime_client import event_id, event_ids
+from realtime_rooms import group_room
 from datetime import date
 
 
@@ -13,12 +19,12 @@ class TaskBoard(QFrame):
         self.group_code = group_code
         self.user_name = user_name
         self.main_window = main_window  # Сохраняем ссылку на главное окно
+        self.task_ids = set()
+        self.executor = get_executor()
+        self.suspended = False
+        self.stale = False  # за время простоя вкладки были изменения
         self.setFixedSize(1000, 900)
-        self.setStyleSheet("""
-            border: 2px solid #5F7470; 
-            background-color: transparent;
-            border-radius: 15px;
-        """)
+        self.setObjectName("taskBoard")
 
         # Основной layout
         main_layout = QVBoxLayout(self)
@@ -33,12 +39,7 @@ class TaskBoard(QFrame):
         # Надпись "Мои задачи" слева
         tasks_label = QLabel("Мои задачи")
         tasks_label.setFixedSize(200, 70)
-        tasks_label.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 15px;
-            padding: 10px;
-            color: #003C30;
-        """)
+        tasks_label.setObjectName("tabTitle")
         tasks_label.setFont(QFont("Inter", 24))
         tasks_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         top_row.addWidget(tasks_label)
@@ -49,42 +50,26 @@ class TaskBoard(QFrame):
         # Кнопка добавления задачи (по центру)
         btn_add_task = QPushButton("Добавить задачу")
         btn_add_task.setFixedSize(300, 70)
-        btn_add_task.setStyleSheet("""
-            QPushButton {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 24px;
-                color: #003C30;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-        """)
+        btn_add_task.setObjectName("tabButton")
         btn_add_task.setFont(QFont("Inter", 24))
         btn_add_task.clicked.connect(self.add_task)
         top_row.addWidget(btn_add_task)
 
+        # Кнопка импорта задач из файла
+        btn_import = QPushButton("Импорт")
+        btn_import.setFixedSize(150, 70)
+        btn_import.setObjectName("tabButton")
+        btn_import.setFont(QFont("Inter", 24))
+        btn_import.clicked.connect(self.import_tasks)
+        top_row.addWidget(btn_import)
+
         # Растягивающий элемент
         top_row.addStretch()
 
         # Кнопка Home справа
         btn_home = QPushButton("Home")
         btn_home.setFixedSize(150, 70)
-        btn_home.setStyleSheet("""
-            QPushButton {
-                background-color: #E0E2DB;
-                border-radius: 15px;
-                padding: 10px;
-                font-size: 24px;
-                color: #003C30;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #D2D4C8;
-            }
-        """)
+        btn_home.setObjectName("tabButton")
         btn_home.setFont(QFont("Inter", 24))
         btn_home.clicked.connect(self.show_note_board)
         top_row.addWidget(btn_home)
@@ -94,7 +79,7 @@ class TaskBoard(QFrame):
         # Область с задачами с прокруткой
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("border: none;")
+        self.scroll_area.setObjectName("boardScroll")
 
         self.tasks_container = QWidget()
         self.tasks_layout = QVBoxLayout(self.tasks_container)
@@ -104,8 +89,23 @@ class TaskBoard(QFrame):
         self.scroll_area.setWidget(self.tasks_container)
         main_layout.addWidget(self.scroll_area)
 
-        # Загружаем существующие задачи
-        self.load_tasks()
+        # Первые данные берем из стартового снимка главного окна, если он еще свежий
+        hydrate = getattr(main_window, "hydrate", None)
+        if hydrate is not None:
+            hydrate(self, self.load_tasks)
+        else:
+            self.load_tasks()
+
+        # Задачи, добавленные в других сессиях пользователя, приходят через сервер событий
+        self.room = group_room(self.group_code)
+        self.realtime = getattr(main_window, "realtime", None)
+        if self.realtime is not None:
+            self.realtime.event_received.connect(self.on_realtime_event)
+            self.realtime.subscribe(self.room)
+
+        self.change_listener = getattr(main_window, "change_listener", None)
+        if self.change_listener is not None:
+            self.change_listener.changed.connect(self.on_database_change)
 
     def show_note_board(self):
         """Переключает на доску заметок"""
@@ -113,25 +113,32 @@ class TaskBoard(QFrame):
             self.main_window.content_stack.setCurrentIndex(1)
 
     def load_tasks(self):
-        """Загружает задачи из базы данных."""
+        """Загружает задачи из базы данных в фоновом потоке."""
+        self.executor.submit(get_tasks, self.group_code, self.user_name, key=(self, "load"), owner=self,
+                             on_result=self.show_tasks,
+                             on_error=lambda e: print(f"Ошибка при загрузке задач: {e}"))
+
+    def hydrate(self, snapshot):
+        """Показывает задачи из стартового снимка (см. MainWindow.hydrate)."""
+        self.show_tasks(snapshot["tasks"])
+
+    def show_tasks(self, tasks):
+        """Показывает загруженные задачи."""
         # Очищаем существующие задачи перед загрузкой новых
         for i in reversed(range(self.tasks_layout.count())):
             widget = self.tasks_layout.itemAt(i).widget()
             if widget:
                 widget.deleteLater()
+        self.task_ids = set()
 
-        tasks = get_tasks(self.group_code, self.user_name)
         for task_id, title, description, deadline, user_name in tasks:
             self.add_task_to_board(task_id, title, description, deadline, user_name)
 
     def add_task_to_board(self, task_id, title, description, deadline, user_name):
         """Добавляет задачу на доску."""
+        self.task_ids.add(task_id)
         task_frame = QFrame()
-        task_frame.setStyleSheet("""
-            background-color: #E0E2DB;
-            border-radius: 10px;
-            padding: 15px;
-        """)
+        task_frame.setObjectName("taskCard")
         task_frame.setFixedWidth(950)
 
         task_layout = QVBoxLayout(task_frame)
@@ -139,14 +146,14 @@ class TaskBoard(QFrame):
         # Заголовок задачи
         title_label = QLabel(title)
         title_label.setFont(QFont("Inter", 20, QFont.Weight.Bold))
-        title_label.setStyleSheet("color: #003C30;")
+        title_label.setObjectName("taskText")
         title_label.setWordWrap(True)
         task_layout.addWidget(title_label)
 
         # Описание задачи
         description_label = QLabel(description)
         description_label.setFont(QFont("Inter", 16))
-        description_label.setStyleSheet("color: #003C30;")
+        description_label.setObjectName("taskText")
         description_label.setWordWrap(True)
         description_label.setContentsMargins(10, 0, 0, 0)
         task_layout.addWidget(description_label)
@@ -162,7 +169,7 @@ class TaskBoard(QFrame):
 
         deadline_label = QLabel(f"Дедлайн: {deadline_str}")
         deadline_label.setFont(QFont("Inter", 12))
-        deadline_label.setStyleSheet("color: #5F7470;")
+        deadline_label.setObjectName("taskDeadline")
         footer_layout.addWidget(deadline_label)
 
         footer_layout.addStretch()
@@ -179,37 +186,29 @@ class TaskBoard(QFrame):
 
             if days_left > 0:
                 time_left_text = f"Осталось дней: {days_left}"
-                time_left_color = "#5F7470"  # Зеленый
+                time_left_state = "future"
             elif days_left == 0:
                 time_left_text = "Дедлайн сегодня!"
-                time_left_color = "#FFA500"  # Оранжевый
+                time_left_state = "today"
             else:
                 time_left_text = "Просрочено!"
-                time_left_color = "#FF6961"  # Красный
+                time_left_state = "overdue"
 
         except Exception as e:
             print(f"Ошибка при обработке дедлайна: {e}")
             time_left_text = "Ошибка даты"
-            time_left_color = "#FF0000"
+            time_left_state = "invalid"
 
         time_left_label = QLabel(time_left_text)
         time_left_label.setFont(QFont("Inter", 12))
-        time_left_label.setStyleSheet(f"color: {time_left_color}; font-style: italic;")
+        time_left_label.setObjectName("taskTimeLeft")
+        # Цвет зависит от срока (см. QLabel#taskTimeLeft в theme.py)
+        time_left_label.setProperty("deadline", time_left_state)
         footer_layout.addWidget(time_left_label)
 
         # Кнопка удаления
         btn_delete = QPushButton("❌")
-        btn_delete.setStyleSheet("""
-            QPushButton {
-                background-color: #FF6961;
-                color: white;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QPushButton:hover {
-                background-color: #D9534F;
-            }
-        """)
+        btn_delete.setObjectName("deleteButton")
         btn_delete.setFixedSize(40, 40)
         btn_delete.clicked.connect(lambda: self.remove_task(task_id))
         footer_layout.addWidget(btn_delete)
@@ -231,13 +230,125 @@ class TaskBoard(QFrame):
 
             if title:
                 # Сохраняем в базу данных и получаем ID задачи
-                task_id = save_task(self.group_code, title, description, deadline, self.user_name)
-                # Добавляем на доску
-                self.add_task_to_board(task_id, title, description, deadline, self.user_name)
+                self.executor.submit(
+                    save_task, self.group_code, title, description, deadline, self.user_name, owner=self,
+                    on_result=lambda task_id: self.on_task_saved(task_id, title, description, deadline),
+                    on_error=lambda e: print(f"Ошибка при сохранении задачи: {e}"))
+
+    def on_task_saved(self, task_id, title, description, deadline):
+        if task_id in self.task_ids:
+            return
+        # Добавляем на доску
+        self.add_task_to_board(task_id, title, description, deadline, self.user_name)
+        self.publish_change("task_created", {"id": task_id})
+
+    def import_tasks(self):
+        """Добавляет задачи из CSV-файла (строки «название;описание;дд.мм.гггг»)
+        одним запросом к базе."""
+        if not self.user_name:
+            print("Ошибка: имя пользователя не установлено")
+            return
+
+        path, _ = QFileDialog.getOpenFileName(self, "Импорт задач", "", "CSV (*.csv *.txt);;Все файлы (*)")
+        if not path:
+            return
+        tasks, skipped = [], 0
+        try:
+            with open(path, encoding="utf-8", newline="") as file:
+                for row in csv.reader(file, delimiter=";"):
+                    if not any(cell.strip() for cell in row):
+                        continue
+                    row = [cell.strip() for cell in row]
+                    if len(row) != 3 or not row[0] or not QDate.fromString(row[2], "dd.MM.yyyy").isValid():
+                        skipped += 1
+                        continue
+                    tasks.append((*row, self.user_name))
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прочитать файл: {e}", QMessageBox.StandardButton.Ok)
+            return
+
+        if skipped:
+            QMessageBox.warning(self, "Импорт задач", f"Пропущено строк с ошибками: {skipped}",
+                                QMessageBox.StandardButton.Ok)
+        if tasks:
+            self.executor.submit(save_tasks, self.group_code, tasks, owner=self,
+                                 on_result=self.on_tasks_imported,
+                                 on_error=lambda e: print(f"Ошибка при импорте задач: {e}"))
+
+    def on_tasks_imported(self, task_ids):
+        # Одно событие на весь импорт; доска перезагружается, чтобы задачи встали по дедлайнам
+        self.publish_change("tasks_imported", {"ids": task_ids})
+        self.load_tasks()
 
     def remove_task(self, task_id):
         """Удаляет задачу из базы данных и обновляет доску."""
-        delete_task(task_id)
+        # Владелец задачи проверяется в том же запросе, что и удаление
+        self.executor.submit(delete_own_task, self.group_code, task_id, self.user_name, owner=self,
+                             on_result=lambda result: self.on_task_removed(task_id, result),
+                             on_error=lambda e: print(f"Ошибка при удалении задачи: {e}"))
+
+    def on_task_removed(self, task_id, result):
+        if result == DELETED:
+            self.publish_change("task_deleted", {"id": task_id})
+        self.load_tasks()
+
+    def publish_change(self, event, data):
+        """Сообщает остальным клиентам группы об изменении"""
+        if self.realtime is not None:
+            self.realtime.publish(self.room, event, data)
+
+    def suspend(self):
+        """Вкладка скрыта: отписываемся от событий, изменения только отмечаем"""
+        if self.suspended:
+            return
+        self.suspended = True
+        if self.realtime is not None:
+            self.realtime.unsubscribe(self.room)
+
+    def resume(self):
+        """Вкладка снова открыта: перезагружаем задачи, если они могли измениться"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        if self.realtime is not None:
+            self.realtime.subscribe(self.room)
+        # Без уведомлений базы пропущенные изменения не отследить
+        if self.stale or self.change_listener is None or not self.change_listener.is_active:
+            self.stale = False
+            self.load_tasks()
+
+    def on_realtime_event(self, room, event, data):
+        """Событие сервера только подсказывает, что задачи изменились: доску сверяем
+        с базой, если изменение на ней еще не показано"""
+        if room != self.room or event not in ("task_created", "task_deleted", "tasks_imported"):
+            return
+        # Доска показывает только задачи текущего пользователя; автора события указывает сервер
+        if not isinstance(data, dict) or data.get("author") != self.user_name:
+            return
+        if self.suspended:
+            self.stale = True
+            return
+        if event == "task_created" and event_id(data) in self.task_ids:
+            return
+        if event == "task_deleted" and event_id(data) is not None and event_id(data) not in self.task_ids:
+            return
+        if event == "tasks_imported":
+            task_ids = event_ids(data)
+            if task_ids is not None and self.task_ids >= task_ids:
+                return
+        self.load_tasks()
+
+    def on_database_change(self, table, operation, entity_id, payload):
+        """Уведомление базы: перезагружаем доску, только если изменение еще не показано"""
+        if table != "tasks" or payload.get("user_name") != self.user_name:
+            return
+        if self.suspended:
+            self.stale = True
+            return
+        if operation == "INSERT" and entity_id in self.task_ids:
+            return
+        if operation == "DELETE" and entity_id not in self.task_ids:
+            return
         self.load_tasks()
 
 
@@ -246,47 +357,7 @@ class TaskDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Новая задача")
         self.setFixedSize(500, 400)
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #E0E2DB;
-            }
-            QLabel {
-                color: #003C30;
-                font-size: 16px;
-            }
-            QLineEdit, QTextEdit {
-                background-color: white;
-                color: #003C30;
-                font-size: 16px;
-                border: 1px solid #5F7470;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QPushButton {
-                background-color: #5F7470;
-                color: white;
-                border-radius: 5px;
-                padding: 8px 16px;
-                font-size: 16px;
-            }
-            QPushButton:hover {
-                background-color: #4D615E;
-            }
-            QCalendarWidget QWidget {
-                background-color: #F0F0F0;
-                color: #003C30;
-            }
-            QCalendarWidget QToolButton {
-                background-color: #E0E2DB;
-                color: #003C30;
-            }
-            QCalendarWidget QMenu {
-                background-color: #F0F0F0;
-            }
-            QCalendarWidget QSpinBox {
-                background-color: white;
-            }
-        """)
+        self.setObjectName("taskDialog")
 
         layout = QVBoxLayout(self)
 
@@ -310,30 +381,7 @@ class TaskDialog(QDialog):
         # Дополнительная стилизация календаря
         calendar = self.deadline_input.calendarWidget()
         calendar.setFixedSize(300, 200)  # Увеличил размер календаря
-        calendar.setStyleSheet("""
-            QCalendarWidget {
-                background-color: #F0F0F0;
-                color: #003C30;
-            }
-            QCalendarWidget QToolButton {
-                background-color: #E0E2DB;
-                color: #003C30;
-                font-size: 14px;
-            }
-            QCalendarWidget QMenu {
-                background-color: #F0F0F0;
-            }
-            QCalendarWidget QSpinBox {
-                background-color: white;
-                color: #003C30;
-            }
-            QCalendarWidget QAbstractItemView:enabled {
-                background-color: white;
-                color: #003C30;
-                selection-background-color: #5F7470;
-                selection-color: white;
-            }
-        """)
+        calendar.setObjectName("deadlineCalendar")
 
         form_layout.addRow("Дедлайн:", self.deadline_input)
 
@@ -0,0 +1,324 @@
+"""Оформление приложения: одна таблица стилей, которая задается QApplication один раз.
+
+Виджеты не вызывают setStyleSheet, а получают objectName (и при необходимости
+динамические свойства), по которым их находят селекторы ниже. Так Qt разбирает стили
+один раз, а не для каждой созданной заметки или задачи.
+
+Правила вида "#X, #X * { ... }" действуют на виджет и все вложенные в него, как стиль
+без селектора, заданный самому виджету. Более вложенные контейнеры идут ниже по тексту,
+поэтому их правила перекрывают внешние.
+"""
+
+STYLESHEET = """
+/* Стартовое окно (main.py) */
+#appRoot, #appRoot * {
+    background-color: #F0F0F0;
+}
+QLabel#appTitle {
+    color: #5F7470;
+}
+QPushButton#startButton {
+    background-color: #D2D4C8;
+    border-radius: 15px;
+    font-size: 32px; font-weight: normal;
+    color: #003C30;
+    width: 500px;
+    height: 175px;
+}
+QPushButton#startButton:hover {
+    background-color: #C2C4B8;
+}
+
+/* Главное окно (main_window.py) */
+#mainWindow, #mainWindow * {
+    background-color: #F0F0F0;
+}
+QLabel#headerLabel {
+    color: #5F7470;
+}
+#menuFrame, #menuFrame * {
+    background-color: #E0E2DB;
+    border-radius: 15px;
+}
+QPushButton#menuButton {
+    color: #003C30;
+    background-color: transparent;
+    border: none;
+    text-align: left;
+    padding: 10px;
+}
+QPushButton#menuButton:hover {
+    font-weight: bold;
+    background-color: #D2D4C8;
+    border-radius: 10px;
+}
+
+/* Вкладки: доска заметок, задачи, общий и личный чат, группа */
+#noteBoard, #noteBoard *, #taskBoard, #taskBoard *,
+#groupChat, #groupChat *, #personalChat, #personalChat *,
+#groupView, #groupView * {
+    border: 2px solid #5F7470;
+    background-color: transparent;
+    border-radius: 15px;
+}
+QLabel#tabTitle {
+    background-color: #E0E2DB;
+    border-radius: 15px;
+    padding: 10px;
+    color: #003C30;
+}
+QPushButton#tabButton {
+    background-color: #E0E2DB;
+    border-radius: 15px;
+    padding: 10px;
+    font-size: 24px;
+    color: #003C30;
+    border: none;
+}
+QPushButton#tabButton:hover {
+    background-color: #D2D4C8;
+}
+QPushButton#boardButton {
+    background-color: #E0E2DB;
+    color: #003C30;
+    border-radius: 10px;
+    padding: 10px;
+}
+QPushButton#boardButton:hover {
+    background-color: #D0D2C8;
+}
+#boardScroll, #boardScroll * {
+    border: none;
+}
+QPushButton#deleteButton {
+    background-color: #FF6961;
+    color: white;
+    border-radius: 5px;
+    padding: 5px;
+}
+QPushButton#deleteButton:hover {
+    background-color: #D9534F;
+}
+
+/* Заметка */
+QFrame#noteCard, #noteCard * {
+    background-color: #E0E2DB;
+    border-radius: 10px;
+    padding: 10px;
+}
+QLabel#noteText {
+    color: #003C30;
+}
+QLabel#noteAuthor {
+    color: #5F7470;
+    font-style: italic;
+}
+
+/* Задача; цвет оставшегося времени зависит от свойства deadline */
+QFrame#taskCard, #taskCard * {
+    background-color: #E0E2DB;
+    border-radius: 10px;
+    padding: 15px;
+}
+QLabel#taskText {
+    color: #003C30;
+}
+QLabel#taskDeadline {
+    color: #5F7470;
+}
+QLabel#taskTimeLeft {
+    color: #5F7470;
+    font-style: italic;
+}
+QLabel#taskTimeLeft[deadline="today"] {
+    color: #FFA500;
+}
+QLabel#taskTimeLeft[deadline="overdue"] {
+    color: #FF6961;
+}
+QLabel#taskTimeLeft[deadline="invalid"] {
+    color: #FF0000;
+}
+
+/* Чаты и список участников группы */
+QListWidget#usersList {
+    background-color: #E0E2DB;
+    border-radius: 15px;
+    padding: 10px;
+    border: none;
+    color: #003C30;
+}
+QListWidget#usersList::item {
+    padding: 10px;
+    border-bottom: 1px solid #5F7470;
+}
+QListWidget#usersList::item:selected {
+    background-color: #D2D4C8;
+}
+#messageList, #messageList * {
+    border: none;
+    background-color: transparent;
+}
+QTextEdit#messageInput {
+    background-color: white;
+    border: 1px solid #5F7470;
+    border-radius: 10px;
+    padding: 10px;
+    font-size: 16px;
+}
+QPushButton#sendButton {
+    background-color: #5F7470;
+    color: white;
+    border-radius: 10px;
+    padding: 10px;
+    font-size: 18px;
+}
+QPushButton#sendButton:hover {
+    background-color: #4D615E;
+}
+
+/* Группа (group_view.py) */
+QPushButton#groupButton, QPushButton#groupDangerButton {
+    border-radius: 15px;
+    padding: 10px;
+    font-size: 20px;
+    border: none;
+}
+QPushButton#groupButton {
+    background-color: #E0E2DB;
+    color: #003C30;
+}
+QPushButton#groupButton:hover {
+    background-color: #D2D4C8;
+}
+QPushButton#groupButton:disabled {
+    color: #5F7470;
+}
+QPushButton#groupDangerButton {
+    background-color: #FF6961;
+    color: white;
+}
+QPushButton#groupDangerButton:hover {
+    background-color: #D9534F;
+}
+QPushButton#groupDangerButton:disabled {
+    background-color: #5F7470;
+}
+
+/* Диалоги */
+QMessageBox#messageDialog {
+    background-color: #F0F0F0;
+}
+#messageDialog QLabel {
+    color: #003C30;
+}
+
+QMessageBox#confirmDialog {
+    background-color: #F0F0F0;
+}
+#confirmDialog QLabel {
+    color: #003C30;
+}
+#confirmDialog QPushButton {
+    background-color: #E0E2DB;
+    color: #003C30;
+    border-radius: 5px;
+    padding: 5px 10px;
+    min-width: 80px;
+}
+#confirmDialog QPushButton:hover {
+    background-color: #D2D4C8;
+}
+
+QInputDialog#noteDialog {
+    background-color: #E0E2DB;
+}
+#noteDialog QLabel {
+    color: #003C30;
+    font-size: 20px;
+}
+#noteDialog QTextEdit {
+    background-color: white;
+    color: #003C30;
+    font-size: 18px;
+    border: 1px solid #5F7470;
+    border-radius: 5px;
+}
+#noteDialog QPushButton {
+    background-color: #5F7470;
+    color: white;
+    border-radius: 5px;
+    padding: 5px 10px;
+    font-size: 16px;
+}
+#noteDialog QPushButton:hover {
+    background-color: #4D615E;
+}
+
+QDialog#taskDialog {
+    background-color: #E0E2DB;
+}
+#taskDialog QLabel {
+    color: #003C30;
+    font-size: 16px;
+}
+#taskDialog QLineEdit, #taskDialog QTextEdit {
+    background-color: white;
+    color: #003C30;
+    font-size: 16px;
+    border: 1px solid #5F7470;
+    border-radius: 5px;
+    padding: 5px;
+}
+#taskDialog QPushButton {
+    background-color: #5F7470;
+    color: white;
+    border-radius: 5px;
+    padding: 8px 16px;
+    font-size: 16px;
+}
+#taskDialog QPushButton:hover {
+    background-color: #4D615E;
+}
+#taskDialog QCalendarWidget QWidget {
+    background-color: #F0F0F0;
+    color: #003C30;
+}
+#taskDialog QCalendarWidget QToolButton {
+    background-color: #E0E2DB;
+    color: #003C30;
+}
+#taskDialog QCalendarWidget QMenu {
+    background-color: #F0F0F0;
+}
+#taskDialog QCalendarWidget QSpinBox {
+    background-color: white;
+}
+QCalendarWidget#deadlineCalendar {
+    background-color: #F0F0F0;
+    color: #003C30;
+}
+QCalendarWidget#deadlineCalendar QToolButton {
+    background-color: #E0E2DB;
+    color: #003C30;
+    font-size: 14px;
+}
+QCalendarWidget#deadlineCalendar QMenu {
+    background-color: #F0F0F0;
+}
+QCalendarWidget#deadlineCalendar QSpinBox {
+    background-color: white;
+    color: #003C30;
+}
+QCalendarWidget#deadlineCalendar QAbstractItemView:enabled {
+    background-color: white;
+    color: #003C30;
+    selection-background-color: #5F7470;
+    selection-color: white;
+}
+"""
+
+
+def apply(app):
+    """Задает оформление всему приложению; вызывается один раз после создания QApplication."""
+    app.setStyleSheet(STYLESHEET)